@@ -1,3 +1,6 @@
+from enum import Enum
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
 from sqlmodel import SQLModel, create_engine, Session
 
 DATABASE_URL = "sqlite:///scripts.db"
@@ -5,6 +8,86 @@ engine = create_engine(DATABASE_URL, echo=True)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    add_missing_columns()
+    relax_not_null_columns()
+
+def _sql_default(value) -> str:
+    """Render a simple Python column default as an SQL literal"""
+    if isinstance(value, Enum):
+        # SQLAlchemy stores enums by member name
+        return f"'{value.name}'"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return "NULL"
+
+def add_missing_columns():
+    """Add columns introduced after a table was first created.
+
+    create_all() only creates missing tables, so databases created by older
+    versions would otherwise lack newer model fields.
+    """
+    inspector = inspect(engine)
+    existing_tables = inspector.get_table_names()
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                default = "NULL"
+                if column.default is not None and column.default.is_scalar:
+                    default = _sql_default(column.default.arg)
+                connection.execute(text(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type} DEFAULT {default}'
+                ))
+                if column.index:
+                    connection.execute(text(
+                        f'CREATE INDEX IF NOT EXISTS "ix_{table.name}_{column.name}" '
+                        f'ON "{table.name}" ("{column.name}")'
+                    ))
+                print(f"Added column {table.name}.{column.name}")
+
+def relax_not_null_columns():
+    """Drop NOT NULL from columns that became optional after a table was first created.
+
+    SQLite can't change a column's constraints, so such a table is rebuilt
+    from the current model and its rows copied over.
+    """
+    inspector = inspect(engine)
+    existing_tables = inspector.get_table_names()
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {column["name"]: column for column in inspector.get_columns(table.name)}
+        relaxed = [
+            column.name for column in table.columns
+            if column.nullable and not column.primary_key
+            and column.name in existing_columns and not existing_columns[column.name]["nullable"]
+        ]
+        if not relaxed:
+            continue
+        table_name = engine.dialect.identifier_preparer.format_table(table)
+        create = str(CreateTable(table).compile(dialect=engine.dialect)).replace(
+            f"CREATE TABLE {table_name} ", f'CREATE TABLE "_new_{table.name}" ', 1
+        )
+        columns = ", ".join(f'"{column.name}"' for column in table.columns if column.name in existing_columns)
+        with engine.begin() as connection:
+            connection.execute(text(create))
+            connection.execute(text(
+                f'INSERT INTO "_new_{table.name}" ({columns}) SELECT {columns} FROM "{table.name}"'
+            ))
+            connection.execute(text(f'DROP TABLE "{table.name}"'))
+            connection.execute(text(f'ALTER TABLE "_new_{table.name}" RENAME TO "{table.name}"'))
+            for index in table.indexes:
+                index.create(connection)
+        print(f"Made {table.name} columns optional: {', '.join(relaxed)}")
 
 def get_session():
     """Regular session for context manager usage"""
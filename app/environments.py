@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: inline script metadata is not read
+    tomllib = None
+
+from executor import run_command
+
+# Where dependency environments are built, one directory per dependency hash
+ENV_DIR = os.getenv(
+    "SCRIPTPILOT_ENV_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "environments")
+)
+# Environments kept on disk; the least recently used unused ones are removed beyond this
+MAX_ENVIRONMENTS = int(os.getenv("SCRIPTPILOT_MAX_ENVIRONMENTS", "20"))
+# How long installing one environment's packages may take
+ENV_BUILD_TIMEOUT_SECONDS = float(os.getenv("SCRIPTPILOT_ENV_BUILD_TIMEOUT_SECONDS", "900"))
+
+# Written once an environment is fully installed; its mtime records the last use
+READY_MARKER = ".scriptpilot-ready"
+
+# PEP 723 inline script metadata: a "# /// script" ... "# ///" comment block
+INLINE_METADATA = re.compile(r"(?m)^# /// script\s*$\s(?P<content>(^#(| .*)$\s)+)^# ///$")
+
+class InvalidDependencies(ValueError):
+    """Raised for dependency lists that can't be installed safely"""
+
+class EnvironmentBuildError(Exception):
+    """Raised when installing a script's dependencies fails"""
+
+def parse_dependencies(text: Optional[str]) -> List[str]:
+    """Requirement lines from a requirements.txt style block, without comments or blanks.
+
+    Installer options (-r, -e, --index-url, ...) are rejected: they could read
+    files on the server or install from arbitrary locations.
+    """
+    requirements = []
+    for line in (text or "").splitlines():
+        line = line.split(" #", 1)[0].strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("-"):
+            raise InvalidDependencies(f"Installer options are not allowed: {line}")
+        requirements.append(line)
+    return sorted(set(requirements))
+
+def inline_dependencies(script_path: str) -> List[str]:
+    """Dependencies declared in a Python script's PEP 723 block, e.g.
+
+        # /// script
+        # dependencies = ["requests<3", "rich"]
+        # ///
+    """
+    if tomllib is None or not script_path.lower().endswith(".py"):
+        return []
+    try:
+        with open(script_path, "r", encoding="utf-8") as f:
+            match = INLINE_METADATA.search(f.read())
+    except (OSError, UnicodeDecodeError):
+        return []
+    if match is None:
+        return []
+    content = "".join(line[2:] if line.startswith("# ") else line[1:] for line in match.group("content").splitlines(True))
+    try:
+        dependencies = tomllib.loads(content).get("dependencies", [])
+    except tomllib.TOMLDecodeError as e:
+        raise InvalidDependencies(f"Invalid inline script metadata: {e}")
+    if not isinstance(dependencies, list) or not all(isinstance(d, str) for d in dependencies):
+        raise InvalidDependencies("Inline script metadata dependencies must be a list of strings")
+    return parse_dependencies("\n".join(dependencies))
+
+def script_dependencies(declared: Optional[str], script_path: str) -> List[str]:
+    """A script's dependencies: the declared list, else its inline metadata block"""
+    return parse_dependencies(declared) if declared and declared.strip() else inline_dependencies(script_path)
+
+@dataclass
+class Environment:
+    """An installed dependency environment and how runs use it"""
+    key: str
+    path: str
+    interpreter: Optional[str] = None  # Replaces the runtime's interpreter, e.g. the venv's python
+    env: Dict[str, str] = field(default_factory=dict)
+
+    def wrap(self, command: List[str]) -> List[str]:
+        return [self.interpreter, *command[1:]] if self.interpreter else command
+
+def _venv_bin(path: str) -> str:
+    return os.path.join(path, "Scripts" if os.name == "nt" else "bin")
+
+async def _install(command: List[str], cwd: str, what: str):
+    try:
+        result = await run_command(command, cwd=cwd, timeout=ENV_BUILD_TIMEOUT_SECONDS)
+    except subprocess.TimeoutExpired:
+        raise EnvironmentBuildError(f"Installing {what} timed out ({ENV_BUILD_TIMEOUT_SECONDS:g} seconds maximum)")
+    except FileNotFoundError as e:
+        raise EnvironmentBuildError(f"Could not install {what}: {e}")
+    if result.returncode != 0:
+        output = (result.stderr.strip() or result.stdout.strip())[-4000:]
+        raise EnvironmentBuildError(f"Installing {what} failed (exit code {result.returncode}):\n{output}")
+
+async def _build_python(path: str, interpreter: str, requirements: List[str]) -> Environment:
+    await _install([interpreter, "-m", "venv", path], path, "a Python virtual environment")
+    requirements_file = os.path.join(path, "requirements.txt")
+    with open(requirements_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(requirements) + "\n")
+    python = os.path.join(_venv_bin(path), "python.exe" if os.name == "nt" else "python")
+    await _install(
+        [python, "-m", "pip", "install", "--disable-pip-version-check", "--no-input", "-r", requirements_file],
+        path, "Python packages"
+    )
+    return _python_environment(path)
+
+def _python_environment(path: str) -> Environment:
+    bin_dir = _venv_bin(path)
+    return Environment(
+        key=os.path.basename(path),
+        path=path,
+        interpreter=os.path.join(bin_dir, "python.exe" if os.name == "nt" else "python"),
+        env={"VIRTUAL_ENV": path, "PATH": bin_dir + os.pathsep + os.environ.get("PATH", "")}
+    )
+
+async def _build_node(path: str, interpreter: str, requirements: List[str]) -> Environment:
+    npm = shutil.which("npm")
+    if npm is None:
+        raise EnvironmentBuildError("npm is not installed on this host")
+    await _install(
+        [npm, "install", "--prefix", path, "--no-audit", "--no-fund", *requirements],
+        path, "npm packages"
+    )
+    return _node_environment(path)
+
+def _node_environment(path: str) -> Environment:
+    return Environment(
+        key=os.path.basename(path),
+        path=path,
+        env={"NODE_PATH": os.path.join(path, "node_modules")}
+    )
+
+# Language -> (build an environment, describe an already built one)
+ENVIRONMENT_BUILDERS = {
+    "Python": (_build_python, _python_environment),
+    "JavaScript": (_build_node, _node_environment),
+}
+
+def supports_dependencies(language: str) -> bool:
+    return language in ENVIRONMENT_BUILDERS
+
+def environment_key(language: str, interpreter: str, requirements: List[str]) -> str:
+    """Content hash of everything an environment is built from"""
+    payload = json.dumps({"language": language, "interpreter": interpreter, "requirements": requirements}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+class EnvironmentCache:
+    """Dependency environments shared by every script with the same dependencies.
+
+    One environment is built per (language, interpreter, requirements) hash;
+    concurrent runs needing the same one wait for a single build. Environments
+    in use are never evicted; beyond max_environments the least recently used
+    others are removed.
+    """
+
+    def __init__(self, directory: str = ENV_DIR, max_environments: int = MAX_ENVIRONMENTS):
+        self.directory = directory
+        self.max_environments = max_environments
+        self.in_use: Dict[str, int] = {}
+        self._builds: Dict[str, asyncio.Lock] = {}
+        self.builds = 0
+        self.reuses = 0
+
+    def _ready(self, path: str) -> bool:
+        return os.path.exists(os.path.join(path, READY_MARKER))
+
+    async def acquire(self, language: str, interpreter: str, requirements: List[str]) -> Environment:
+        """The environment for these requirements, built if needed; release() it after the run"""
+        if not supports_dependencies(language):
+            raise EnvironmentBuildError(f"Dependencies are not supported for {language} scripts")
+        build, describe = ENVIRONMENT_BUILDERS[language]
+        key = environment_key(language, interpreter, requirements)
+        path = os.path.join(self.directory, key)
+        # Counted from the start so a build in progress isn't evicted by another
+        self.in_use[key] = self.in_use.get(key, 0) + 1
+        try:
+            lock = self._builds.setdefault(key, asyncio.Lock())
+            async with lock:
+                if self._ready(path):
+                    self.reuses += 1
+                    environment = describe(path)
+                else:
+                    # Remains of a build that failed or was interrupted
+                    await asyncio.to_thread(shutil.rmtree, path, True)
+                    os.makedirs(path)
+                    print(f"Building {language} environment {key} ({len(requirements)} dependencies)")
+                    try:
+                        environment = await build(path, interpreter, requirements)
+                        with open(os.path.join(path, READY_MARKER), "w") as f:
+                            json.dump({"language": language, "interpreter": interpreter, "requirements": requirements}, f)
+                    except BaseException:
+                        shutil.rmtree(path, ignore_errors=True)
+                        raise
+                    self.builds += 1
+            os.utime(os.path.join(path, READY_MARKER))
+        except BaseException:
+            self.release(key)
+            raise
+        await asyncio.to_thread(self.evict)
+        return environment
+
+    def release(self, key: str):
+        remaining = self.in_use.get(key, 0) - 1
+        if remaining > 0:
+            self.in_use[key] = remaining
+        else:
+            self.in_use.pop(key, None)
+
+    def environments(self) -> List[dict]:
+        """Built environments, most recently used first"""
+        if not os.path.isdir(self.directory):
+            return []
+        environments = []
+        for key in os.listdir(self.directory):
+            marker = os.path.join(self.directory, key, READY_MARKER)
+            try:
+                with open(marker, "r") as f:
+                    details = json.load(f)
+                last_used = os.path.getmtime(marker)
+            except (OSError, ValueError):
+                continue
+            environments.append({
+                "key": key,
+                "language": details.get("language"),
+                "requirements": details.get("requirements", []),
+                "last_used": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(last_used)),
+                "in_use": self.in_use.get(key, 0),
+                "_last_used": last_used
+            })
+        environments.sort(key=lambda environment: environment["_last_used"], reverse=True)
+        for environment in environments:
+            del environment["_last_used"]
+        return environments
+
+    def remove(self, key: str) -> bool:
+        """Delete an environment that no run is using; False if it is in use"""
+        if self.in_use.get(key):
+            return False
+        shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+        return True
+
+    def evict(self):
+        """Remove the least recently used environments beyond max_environments. Blocking."""
+        if self.max_environments <= 0:
+            return
+        for environment in self.environments()[self.max_environments:]:
+            if self.remove(environment["key"]):
+                print(f"Evicted {environment['language']} environment {environment['key']}")
+
+    def stats(self) -> dict:
+        return {
+            "directory": self.directory,
+            "max_environments": self.max_environments,
+            "builds": self.builds,
+            "reuses": self.reuses,
+            "environments": self.environments()
+        }
+
+# Shared cache of the API process (worker agents keep their own)
+environment_cache = EnvironmentCache()
@@ -0,0 +1,564 @@
+import asyncio
+import os
+import signal
+import subprocess
+import traceback
+from contextlib import nullcontext
+from dataclasses import asdict, fields
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.orm import defer
+from sqlmodel import select
+
+from database import get_session
+from environments import environment_cache, parse_dependencies, script_dependencies, EnvironmentBuildError, InvalidDependencies
+from executor import (
+    run_command, execution_pool, signal_process_group, limits_for_language,
+    ExecutionTimeout, ProcessResult, ResourceLimits, DEFAULT_TIMEOUT_SECONDS
+)
+from leader_election import SERVER_ID, server_gone
+from models import ExecutionHistory, ExecutionPriority, ExecutionStatus, RunParameters, Schedule, Script
+from output_store import OutputSpool, delete_logs, logged_execution_ids
+from remote_workers import remote_dispatcher, RemoteExecutionError
+from result_cache import result_cache, cache_key
+from run_parameters import dump_parameters
+from script_store import hash_file, snapshot_script
+from warm_pool import warm_python_pool
+from workspaces import create_workspace, release_workspace, delete_artifacts
+
+# How much recent output a live execution keeps for late subscribers
+LIVE_REPLAY_BYTES = 1024 * 1024
+# Events a slow subscriber may fall behind before it is disconnected
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+class LiveExecution:
+    """A queued or running execution: its process, and fan-out of its output to stream subscribers"""
+
+    def __init__(self, execution_id: int):
+        self.execution_id = execution_id
+        self.replay: List[tuple] = []
+        self.replay_size = 0
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.finished = False
+        self.done = asyncio.Event()
+        self.pid: Optional[int] = None  # Local process (group leader) once started
+        self.started_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+        self.cancel_requested = False
+        self.flight_key: Optional[str] = None
+
+    def process_started(self, pid: int):
+        self.pid = pid
+        self.started_at = datetime.utcnow()
+
+    def publish(self, stream: str, text: str):
+        event = (stream, text)
+        self.replay.append(event)
+        self.replay_size += len(text)
+        # Keep only the most recent output for subscribers that join late
+        while self.replay_size > LIVE_REPLAY_BYTES and len(self.replay) > 1:
+            _, dropped = self.replay.pop(0)
+            self.replay_size -= len(dropped)
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Subscriber can't keep up; cut it off rather than buffer without bound
+                self.subscribers.discard(queue)
+                _close_queue(queue)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE + len(self.replay) + 1)
+        for event in self.replay:
+            queue.put_nowait(event)
+        if self.finished:
+            queue.put_nowait(None)
+        else:
+            self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def finish(self):
+        self.finished = True
+        self.done.set()
+        for queue in list(self.subscribers):
+            _close_queue(queue)
+        self.subscribers.clear()
+
+def _close_queue(queue: asyncio.Queue):
+    """Signal end-of-stream to a subscriber, dropping backlog if its queue is full"""
+    if queue.full():
+        while not queue.empty():
+            queue.get_nowait()
+    queue.put_nowait(None)
+
+# Executions currently queued or running in this process, by execution ID
+live_executions: Dict[int, LiveExecution] = {}
+# Single-flight runs in progress: flight key -> execution ID
+in_flight: Dict[str, int] = {}
+
+# Queue class of runs that don't ask for a specific one
+DEFAULT_PRIORITIES = {
+    "manual": ExecutionPriority.INTERACTIVE,
+    "schedule": ExecutionPriority.SCHEDULED,
+    "pipeline": ExecutionPriority.SCHEDULED,
+    "batch": ExecutionPriority.BULK
+}
+
+# Strong references to background runs so they aren't garbage collected
+_background_tasks: Set[asyncio.Task] = set()
+
+def create_execution_record(
+    script: Script,
+    triggered_by: str = "manual",
+    executed_by: Optional[int] = None,
+    schedule_id: Optional[int] = None,
+    batch_id: Optional[int] = None,
+    pipeline_run_id: Optional[int] = None,
+    pipeline_step: Optional[str] = None,
+    parameters: Optional[RunParameters] = None,
+    priority: Optional[ExecutionPriority] = None,
+    flight_key: Optional[str] = None
+) -> ExecutionHistory:
+    """Insert a queued ExecutionHistory row so the run has an ID before it starts.
+
+    With a flight_key the run is registered so identical requests arriving
+    before it finishes can attach to it (see find_in_flight).
+    """
+    with get_session() as session:
+        execution = ExecutionHistory(
+            script_id=script.id,
+            schedule_id=schedule_id,
+            filename=script.filename,
+            language=script.language,
+            status=ExecutionStatus.QUEUED,
+            triggered_by=triggered_by,
+            executed_by=executed_by,
+            batch_id=batch_id,
+            pipeline_run_id=pipeline_run_id,
+            pipeline_step=pipeline_step,
+            parameters=dump_parameters(parameters),
+            priority=priority or DEFAULT_PRIORITIES.get(triggered_by, ExecutionPriority.INTERACTIVE),
+            server_id=SERVER_ID
+        )
+        session.add(execution)
+        session.commit()
+        session.refresh(execution)
+        live = live_executions[execution.id] = LiveExecution(execution.id)
+        if flight_key:
+            live.flight_key = flight_key
+            in_flight[flight_key] = execution.id
+        return execution
+
+def single_flight_key(script: Script, parameters: Optional[RunParameters] = None) -> str:
+    """Identifies requests that would start an identical process"""
+    return f"{script.id}:{dump_parameters(parameters) or ''}"
+
+def find_in_flight(flight_key: str) -> Optional[int]:
+    """ID of the unfinished run registered under this key, if any"""
+    execution_id = in_flight.get(flight_key)
+    if execution_id is None or execution_id not in live_executions:
+        return None
+    return execution_id
+
+async def wait_for_execution(execution_id: int) -> Optional[ExecutionHistory]:
+    """Wait until a live execution finished and return its record"""
+    live = live_executions.get(execution_id)
+    if live is not None:
+        await live.done.wait()
+    return get_execution_record(execution_id)
+
+def get_execution_record(execution_id: int) -> Optional[ExecutionHistory]:
+    with get_session() as session:
+        return session.get(ExecutionHistory, execution_id)
+
+def result_key_for(script: Script, command: List[str], cwd: str,
+                   parameters: Optional[RunParameters] = None) -> Optional[str]:
+    """Result cache key of a run, or None if the script isn't cacheable"""
+    if not script.cacheable:
+        return None
+    # Inline dependency metadata is part of the script contents already
+    return cache_key(
+        script.id, hash_file(os.path.join(cwd, script.filename)), command,
+        parameters.model_dump() if parameters else None,
+        parse_dependencies(script.dependencies)
+    )
+
+def lookup_cached_result(script: Script, command: List[str], cwd: str,
+                         parameters: Optional[RunParameters] = None) -> Tuple[Optional[str], Optional[ExecutionHistory]]:
+    """For cacheable scripts, the result cache key of this run and a still valid earlier result"""
+    key = result_key_for(script, command, cwd, parameters)
+    if key is None:
+        return None, None
+    execution_id = result_cache.get(key)
+    if execution_id is None:
+        return key, None
+    execution = get_execution_record(execution_id)
+    if execution is None or execution.script_id != script.id:
+        # The cached execution was deleted since (and its ID possibly reused)
+        result_cache.discard(key)
+        return key, None
+    return key, execution
+
+def remember_result(key: Optional[str], execution: ExecutionHistory, ttl: Optional[float] = None):
+    """Cache a finished run under its key; only successful runs are reused"""
+    if key and execution.status == ExecutionStatus.COMPLETED and execution.success:
+        result_cache.put(key, execution.id, ttl)
+
+def _update_execution(execution_id: int, **fields) -> ExecutionHistory:
+    with get_session() as session:
+        execution = session.get(ExecutionHistory, execution_id)
+        for name, value in fields.items():
+            setattr(execution, name, value)
+        session.add(execution)
+        session.commit()
+        session.refresh(execution)
+        return execution
+
+def effective_timeout(script: Script, schedule: Optional[Schedule] = None) -> float:
+    """Timeout for a run: the schedule's setting, then the script's, then the default"""
+    for timeout in (schedule.timeout_seconds if schedule else None, script.timeout_seconds):
+        if timeout:
+            return timeout
+    return DEFAULT_TIMEOUT_SECONDS
+
+def effective_limits(script: Script) -> ResourceLimits:
+    """Resource limits for a run: the script's settings on top of the language's and server's"""
+    overrides = ResourceLimits(**{field.name: getattr(script, field.name) for field in fields(ResourceLimits)})
+    return limits_for_language(script.language).merged(overrides)
+
+def _stop_over_output_limit(execution_id: int, live: LiveExecution, limit_mb: int):
+    """Kill a run whose output went over its limit"""
+    print(f"Execution {execution_id} exceeded its output limit ({limit_mb} MB)")
+    if live.pid is not None:
+        signal_process_group(live.pid, signal.SIGKILL)
+    else:
+        remote_dispatcher.abort(execution_id, f"Output limit exceeded ({limit_mb} MB)")
+
+def _result_fields(result: ProcessResult, spool: OutputSpool) -> dict:
+    """ExecutionHistory fields describing a finished (or stopped) process"""
+    usage = asdict(result.usage) if result.usage else {}
+    return dict(
+        execution_time_seconds=round(result.wall_time_seconds, 3),
+        stdout=result.stdout,
+        stderr=result.stderr,
+        stdout_size=spool.sizes["stdout"],
+        stderr_size=spool.sizes["stderr"],
+        output_truncated=spool.truncated(),
+        finished_at=datetime.utcnow(),
+        **usage
+    )
+
+async def run_execution(
+    execution: ExecutionHistory,
+    command: List[str],
+    cwd: str,
+    user_id: Optional[int] = None,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    parameters: Optional[RunParameters] = None
+) -> ExecutionHistory:
+    """Run a queued execution through the shared pool and record its outcome.
+
+    command is the interpreter and script; parameters adds arguments after
+    it and environment variables. Output is published to stream subscribers
+    while the process runs. Returns the finished ExecutionHistory row; the
+    status tells how the run ended.
+    """
+    parameters = parameters or RunParameters()
+    live = live_executions.setdefault(execution.id, LiveExecution(execution.id))
+    # Separate task so cancel_execution can stop this run without cancelling the caller
+    live.task = asyncio.ensure_future(_attempt_execution(execution, command, cwd, user_id, timeout, parameters, live))
+    try:
+        # asyncio.wait doesn't cancel the run when the caller is cancelled, which
+        # tells a cancel request for this run apart from the caller being stopped
+        try:
+            await asyncio.wait({live.task})
+        except asyncio.CancelledError:
+            live.task.cancel()
+            await asyncio.wait({live.task})  # Let the run record how it ended
+            raise
+        if live.task.cancelled() and live.cancel_requested:
+            return get_execution_record(execution.id)
+        return live.task.result()
+    finally:
+        live.finish()
+        live_executions.pop(execution.id, None)
+        if live.flight_key and in_flight.get(live.flight_key) == execution.id:
+            del in_flight[live.flight_key]
+
+async def _attempt_execution(
+    execution: ExecutionHistory,
+    command: List[str],
+    cwd: str,
+    user_id: Optional[int],
+    timeout: float,
+    parameters: RunParameters,
+    live: LiveExecution
+) -> ExecutionHistory:
+    remote = remote_dispatcher.should_dispatch(execution.language)
+    with get_session() as session:
+        script = session.get(Script, execution.script_id)
+    limits = effective_limits(script) if script else limits_for_language(execution.language)
+    spool = None
+    workspace = None
+    environment = None
+    try:
+        # Remote runs wait for a worker instead of a local pool slot
+        priority = ExecutionPriority(execution.priority).rank
+        async with (nullcontext() if remote else execution_pool.slot(execution.language, user_id, priority)):
+            spool = OutputSpool(
+                execution.id,
+                max_bytes=(limits.output_limit_mb or 0) * 1024 * 1024,
+                on_limit=lambda: _stop_over_output_limit(execution.id, live, limits.output_limit_mb)
+            )
+            try:
+                script_path = os.path.join(cwd, execution.filename)
+                requirements = script_dependencies(script.dependencies if script else None, script_path)
+                if remote:
+                    script_hash = snapshot_script(script_path)
+                    _update_execution(execution.id, script_hash=script_hash)
+                    result = await remote_dispatcher.run(
+                        execution, script_hash, timeout, on_output=live.publish, output=spool,
+                        args=parameters.args, env=parameters.env, priority=priority, limits=limits,
+                        dependencies=requirements
+                    )
+                else:
+                    _update_execution(execution.id, status=ExecutionStatus.RUNNING, executed_at=datetime.utcnow())
+                    # Own scratch directory so concurrent runs don't see each other's files
+                    workspace = create_workspace(execution.id, script_path)
+                    run_command_line, run_env = command, parameters.env
+                    if requirements:
+                        # Built on first use, then shared by every script with the same dependencies
+                        environment = await environment_cache.acquire(execution.language, command[0], requirements)
+                        run_command_line, run_env = environment.wrap(command), {**environment.env, **parameters.env}
+                    # Plain `python script.py` runs go to a warm worker when enabled
+                    runner = warm_python_pool.run_command if warm_python_pool.accepts(run_command_line) else run_command
+                    result = await runner(
+                        run_command_line + parameters.args, cwd=workspace, timeout=timeout,
+                        on_output=live.publish, output=spool, env=run_env,
+                        on_spawn=live.process_started, limits=limits
+                    )
+                if spool.limit_exceeded:
+                    limit_hit = f"Output limit exceeded ({limits.output_limit_mb} MB)"
+                else:
+                    limit_hit = limits.violation(result)
+                return _update_execution(
+                    execution.id,
+                    status=ExecutionStatus.COMPLETED,
+                    exit_code=result.returncode,
+                    success=result.returncode == 0 and not limit_hit,
+                    error_message=limit_hit,
+                    **_result_fields(result, spool)
+                )
+            except ExecutionTimeout as e:
+                # Keep what the script wrote before it was stopped
+                return _update_execution(
+                    execution.id,
+                    status=ExecutionStatus.TIMED_OUT,
+                    exit_code=-1,  # Special code for timeout
+                    success=False,
+                    error_message=f"Script execution timed out ({timeout:g} seconds maximum)",
+                    **_result_fields(e.result, spool)
+                )
+            except subprocess.TimeoutExpired:
+                return _update_execution(
+                    execution.id,
+                    status=ExecutionStatus.TIMED_OUT,
+                    exit_code=-1,
+                    execution_time_seconds=timeout,
+                    success=False,
+                    error_message=f"Script execution timed out ({timeout:g} seconds maximum)",
+                    finished_at=datetime.utcnow()
+                )
+            except FileNotFoundError:
+                return _update_execution(
+                    execution.id,
+                    status=ExecutionStatus.ERROR,
+                    exit_code=-2,  # Special code for missing interpreter
+                    success=False,
+                    error_message=f"Required interpreter not found for {execution.language} scripts",
+                    finished_at=datetime.utcnow()
+                )
+            except (EnvironmentBuildError, InvalidDependencies) as e:
+                return _update_execution(
+                    execution.id,
+                    status=ExecutionStatus.ERROR,
+                    exit_code=-2,  # Same as a missing interpreter: the script never started
+                    success=False,
+                    error_message=f"Could not prepare dependencies: {e}",
+                    finished_at=datetime.utcnow()
+                )
+            except RemoteExecutionError as e:
+                return _update_execution(
+                    execution.id,
+                    status=ExecutionStatus.ERROR,
+                    exit_code=-3,
+                    success=False,
+                    error_message=str(e),
+                    stdout=spool.text("stdout"),
+                    stderr=spool.text("stderr"),
+                    stdout_size=spool.sizes["stdout"],
+                    stderr_size=spool.sizes["stderr"],
+                    finished_at=datetime.utcnow()
+                )
+            except Exception as e:
+                return _update_execution(
+                    execution.id,
+                    status=ExecutionStatus.ERROR,
+                    exit_code=-3,  # Special code for general errors
+                    success=False,
+                    error_message=f"Execution failed: {str(e)}\nTraceback: {traceback.format_exc()}",
+                    finished_at=datetime.utcnow()
+                )
+    except asyncio.CancelledError:
+        if live.cancel_requested:
+            # The process tree was killed on the way out; keep its output so far
+            output = dict(
+                stdout=spool.text("stdout"),
+                stderr=spool.text("stderr"),
+                stdout_size=spool.sizes["stdout"],
+                stderr_size=spool.sizes["stderr"]
+            ) if spool is not None else {}
+            _update_execution(
+                execution.id,
+                status=ExecutionStatus.CANCELLED,
+                exit_code=-5,  # Special code for cancelled runs
+                success=False,
+                error_message="Execution was cancelled",
+                finished_at=datetime.utcnow(),
+                **output
+            )
+        else:
+            _update_execution(
+                execution.id,
+                status=ExecutionStatus.ERROR,
+                exit_code=-3,
+                success=False,
+                error_message="Execution was interrupted before it finished",
+                finished_at=datetime.utcnow()
+            )
+        raise
+    finally:
+        if environment is not None:
+            environment_cache.release(environment.key)
+        if workspace is not None:
+            # Removing a large tree can take a while; don't hold up the result
+            run_in_background(asyncio.to_thread(
+                release_workspace, execution.id, execution.filename,
+                bool(script and script.retain_artifacts)
+            ))
+
+async def cancel_execution(execution_id: int) -> bool:
+    """Stop a queued or running execution and wait until it is recorded as cancelled.
+
+    Killing is done by cancelling the run: local process trees get SIGKILL,
+    queued runs leave the pool queue and remote runs are revoked, which makes
+    their worker stop the process. Returns False if the execution isn't live.
+    """
+    live = live_executions.get(execution_id)
+    if live is None or live.task is None or live.task.done():
+        return False
+    live.cancel_requested = True
+    live.task.cancel()
+    await asyncio.wait({live.task})
+    return True
+
+def running_executions() -> List[dict]:
+    """Registry view of every execution queued or running in this process"""
+    if not live_executions:
+        return []
+    with get_session() as session:
+        executions = session.exec(
+            select(ExecutionHistory).options(
+                defer(ExecutionHistory.stdout), defer(ExecutionHistory.stderr)
+            ).where(ExecutionHistory.id.in_(list(live_executions)))
+        ).all()
+    now = datetime.utcnow()
+    running = []
+    for execution in executions:
+        live = live_executions.get(execution.id)
+        if live is None:
+            continue
+        started_at = live.started_at or (execution.executed_at if execution.status == ExecutionStatus.RUNNING else None)
+        running.append({
+            "execution_id": execution.id,
+            "script_id": execution.script_id,
+            "filename": execution.filename,
+            "language": execution.language,
+            "status": execution.status,
+            "pid": live.pid,
+            "worker_id": execution.worker_id,
+            "started_at": started_at.isoformat() if started_at else None,
+            "running_seconds": round((now - started_at).total_seconds(), 1) if started_at else None,
+            "triggered_by": execution.triggered_by,
+            "executed_by": execution.executed_by,
+            "cancel_requested": live.cancel_requested
+        })
+    return sorted(running, key=lambda entry: entry["execution_id"])
+
+def mark_interrupted_executions() -> Set[int]:
+    """Close out runs left queued or running by server processes that have exited.
+
+    Other server processes may share the database; their runs are left
+    alone and their IDs returned.
+    """
+    with get_session() as session:
+        unfinished = session.exec(
+            select(ExecutionHistory).options(
+                defer(ExecutionHistory.stdout), defer(ExecutionHistory.stderr)
+            ).where(
+                ExecutionHistory.status.in_([ExecutionStatus.QUEUED, ExecutionStatus.RUNNING])
+            )
+        ).all()
+        stale = [execution for execution in unfinished if server_gone(execution.server_id)]
+        for execution in stale:
+            execution.status = ExecutionStatus.ERROR
+            execution.success = False
+            execution.exit_code = -3
+            execution.error_message = "Execution was interrupted by a server restart"
+            execution.finished_at = datetime.utcnow()
+            session.add(execution)
+        session.commit()
+        if stale:
+            print(f"Marked {len(stale)} interrupted executions as failed")
+        return {execution.id for execution in unfinished} - {execution.id for execution in stale}
+
+def delete_executions(execution_ids: List[int]) -> int:
+    """Delete finished executions with their log files and retained artifacts.
+
+    Runs still queued or running are left alone. Returns how many were deleted.
+    """
+    deletable = [execution_id for execution_id in execution_ids if execution_id not in live_executions]
+    if not deletable:
+        return 0
+    with get_session() as session:
+        session.execute(delete(ExecutionHistory).where(ExecutionHistory.id.in_(deletable)))
+        session.commit()
+    for execution_id in deletable:
+        delete_logs(execution_id)
+        delete_artifacts(execution_id)
+    return len(deletable)
+
+def sweep_orphaned_logs():
+    """Remove log files of executions that no longer exist, e.g. deleted while the server was down"""
+    logged = logged_execution_ids()
+    if not logged:
+        return
+    with get_session() as session:
+        existing = set(session.exec(select(ExecutionHistory.id)).all())
+    orphaned = logged - existing
+    for execution_id in orphaned:
+        delete_logs(execution_id)
+    if orphaned:
+        print(f"Removed logs of {len(orphaned)} deleted executions")
+
+def run_in_background(coro) -> asyncio.Task:
+    """Start a run without waiting for it, keeping a reference until it finishes"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
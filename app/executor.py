@@ -0,0 +1,677 @@
+import asyncio
+import codecs
+import locale
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from types import SimpleNamespace
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; limits are not applied there
+    resource = None
+
+# Default maximum runtime for a single script execution (5 minutes)
+DEFAULT_TIMEOUT_SECONDS = 300.0
+# Upper bound for per-script and per-schedule timeouts (24 hours)
+MAX_TIMEOUT_SECONDS = float(os.getenv("SCRIPTPILOT_MAX_TIMEOUT_SECONDS", str(24 * 60 * 60)))
+
+# Seconds a stopped run gets between SIGTERM and SIGKILL
+KILL_GRACE_SECONDS = float(os.getenv("SCRIPTPILOT_KILL_GRACE_SECONDS", "5"))
+# How long to keep reading output that was still in the pipes when a run was stopped
+DRAIN_TIMEOUT_SECONDS = 1.0
+
+# Concurrency limits for the shared execution pool (0 = unlimited)
+MAX_CONCURRENT_RUNS = int(os.getenv("SCRIPTPILOT_MAX_CONCURRENT_RUNS", str((os.cpu_count() or 1) * 2)))
+MAX_RUNS_PER_USER = int(os.getenv("SCRIPTPILOT_MAX_RUNS_PER_USER", "0"))
+# Per-language limits, e.g. "Python=8,Bash=4,PowerShell=2"
+LANGUAGE_LIMITS = os.getenv("SCRIPTPILOT_LANGUAGE_LIMITS", "")
+# Resource limits applied to every run / per language, e.g.
+# "memory_limit_mb=2048,cpu_limit_seconds=600" and "Python:memory_limit_mb=1024;Bash:process_limit=64"
+RESOURCE_LIMITS = os.getenv("SCRIPTPILOT_RESOURCE_LIMITS", "")
+LANGUAGE_RESOURCE_LIMITS = os.getenv("SCRIPTPILOT_LANGUAGE_RESOURCE_LIMITS", "")
+# A queued run moves up one priority class for every this many seconds it waits (0 = no aging)
+PRIORITY_AGING_SECONDS = float(os.getenv("SCRIPTPILOT_PRIORITY_AGING_SECONDS", "60"))
+
+def effective_priority(priority: int, waited: float, aging_seconds: float = PRIORITY_AGING_SECONDS) -> float:
+    """Priority rank (lower is served first) after aging a run that waited `waited` seconds"""
+    if aging_seconds <= 0:
+        return priority
+    return priority - waited / aging_seconds
+
+@dataclass
+class ResourceUsage:
+    """Resources consumed by a finished child process (from wait4's rusage)"""
+    cpu_user_seconds: float
+    cpu_system_seconds: float
+    peak_rss_kb: int
+    io_read_blocks: int
+    io_write_blocks: int
+
+    @classmethod
+    def from_rusage(cls, rusage) -> "ResourceUsage":
+        # Note: Linux carries the spawning process's footprint over exec into
+        # ru_maxrss, so small scripts report at least the server's own RSS
+        maxrss = rusage.ru_maxrss
+        if sys.platform == "darwin":
+            # macOS reports bytes, Linux kilobytes
+            maxrss //= 1024
+        return cls(
+            cpu_user_seconds=round(rusage.ru_utime, 4),
+            cpu_system_seconds=round(rusage.ru_stime, 4),
+            peak_rss_kb=maxrss,
+            io_read_blocks=rusage.ru_inblock,
+            io_write_blocks=rusage.ru_oublock
+        )
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "ResourceUsage":
+        return cls.from_rusage(SimpleNamespace(**values))
+
+# Fragments of the fatal error interpreters print when an allocation or fork fails
+_MEMORY_ERROR_MARKERS = ("MemoryError", "Cannot allocate memory", "out of memory", "bad_alloc", "failed to allocate")
+_FORK_ERROR_MARKERS = ("Resource temporarily unavailable", "BlockingIOError", "fork: retry", "Cannot fork")
+
+def _killed_by(returncode: int, signal_name: str) -> bool:
+    """Whether a process ended on a signal this platform has"""
+    number = getattr(signal, signal_name, None)
+    return number is not None and returncode == -number
+
+def _fatal_error(stderr: str) -> str:
+    """The last line a failed process wrote to stderr, where interpreters report the error that ended it"""
+    lines = [line for line in stderr.splitlines() if line.strip()]
+    return lines[-1] if lines else ""
+
+@dataclass
+class ResourceLimits:
+    """Per-run limits; None leaves the server's own limit in place.
+
+    All but the output limit are rlimits set in the child before exec (POSIX
+    only). process_limit is RLIMIT_NPROC, which the kernel counts per user
+    rather than per run and does not enforce for root.
+    """
+    memory_limit_mb: Optional[int] = None  # Address space (RLIMIT_AS)
+    cpu_limit_seconds: Optional[int] = None  # CPU time (RLIMIT_CPU)
+    process_limit: Optional[int] = None  # Processes/threads (RLIMIT_NPROC)
+    file_size_limit_mb: Optional[int] = None  # Largest file the script may write (RLIMIT_FSIZE)
+    output_limit_mb: Optional[int] = None  # stdout + stderr; enforced by the output sink
+
+    @classmethod
+    def parse(cls, value: str) -> "ResourceLimits":
+        """Limits from "name=value,..." (names as the fields above)"""
+        limits = cls()
+        for item in filter(None, (part.strip() for part in value.split(","))):
+            name, _, number = item.partition("=")
+            name = name.strip()
+            try:
+                if not hasattr(limits, name):
+                    raise ValueError(name)
+                setattr(limits, name, int(number))
+            except ValueError:
+                print(f"Ignoring invalid resource limit: {item}")
+        return limits
+
+    def merged(self, overrides: "ResourceLimits") -> "ResourceLimits":
+        """These limits with every limit set in overrides replaced"""
+        values = asdict(self)
+        values.update({name: value for name, value in asdict(overrides).items() if value is not None})
+        return ResourceLimits(**values)
+
+    def rlimits(self) -> Dict[str, Tuple[int, int]]:
+        """(soft, hard) per resource module constant name"""
+        mb = 1024 * 1024
+        limits = {}
+        if self.memory_limit_mb:
+            limits["RLIMIT_AS"] = (self.memory_limit_mb * mb,) * 2
+        if self.cpu_limit_seconds:
+            # SIGXCPU at the soft limit, SIGKILL a second later if it is ignored
+            limits["RLIMIT_CPU"] = (self.cpu_limit_seconds, self.cpu_limit_seconds + 1)
+        if self.process_limit:
+            limits["RLIMIT_NPROC"] = (self.process_limit,) * 2
+        if self.file_size_limit_mb:
+            limits["RLIMIT_FSIZE"] = (self.file_size_limit_mb * mb,) * 2
+        return limits
+
+    def apply(self):
+        """Set the rlimits on the current process (used as preexec_fn)"""
+        for name, (soft, hard) in self.rlimits().items():
+            current_soft, current_hard = resource.getrlimit(getattr(resource, name))
+            if current_hard != resource.RLIM_INFINITY:
+                # An unprivileged process can't raise its hard limit
+                soft, hard = min(soft, current_hard), min(hard, current_hard)
+            resource.setrlimit(getattr(resource, name), (soft, hard))
+
+    def preexec_fn(self) -> Optional[Callable[[], None]]:
+        return self.apply if resource is not None and self.rlimits() else None
+
+    def violation(self, result: "ProcessResult") -> Optional[str]:
+        """Which limit a failed run most likely hit, judged by how it ended.
+
+        Only limits that were actually applied count. Signals and CPU usage
+        are the evidence for CPU and file size limits; memory and process
+        limits leave none, so for them the error that ended the process (the
+        last stderr line) must be an allocation or fork failure.
+        """
+        code = result.returncode
+        if code == 0 or self.preexec_fn() is None:
+            return None
+        fatal_error = _fatal_error(result.stderr or "")
+        if self.cpu_limit_seconds:
+            cpu_used = result.usage.cpu_user_seconds + result.usage.cpu_system_seconds if result.usage else 0
+            if _killed_by(code, "SIGXCPU") or (_killed_by(code, "SIGKILL") and cpu_used >= self.cpu_limit_seconds):
+                return f"CPU time limit exceeded ({self.cpu_limit_seconds} s)"
+        if self.file_size_limit_mb and (_killed_by(code, "SIGXFSZ") or "File too large" in fatal_error):
+            return f"File size limit exceeded ({self.file_size_limit_mb} MB)"
+        if code < 0:
+            return None  # Killed by a signal no limit sends
+        if self.memory_limit_mb and any(marker in fatal_error for marker in _MEMORY_ERROR_MARKERS):
+            return f"Memory limit exceeded ({self.memory_limit_mb} MB address space)"
+        if self.process_limit and any(marker in fatal_error for marker in _FORK_ERROR_MARKERS):
+            return f"Process limit exceeded ({self.process_limit} processes)"
+        return None
+
+def parse_language_resource_limits(value: str) -> Dict[str, ResourceLimits]:
+    """Per-language limits from "Python:memory_limit_mb=1024,cpu_limit_seconds=60;Bash:..." """
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(";"))):
+        language, _, settings = item.partition(":")
+        limits[language.strip().lower()] = ResourceLimits.parse(settings)
+    return limits
+
+_default_limits = ResourceLimits.parse(RESOURCE_LIMITS)
+_language_limits = parse_language_resource_limits(LANGUAGE_RESOURCE_LIMITS)
+
+def limits_for_language(language: str) -> ResourceLimits:
+    """Server-wide limits with the language's own settings on top"""
+    return _default_limits.merged(_language_limits.get((language or "").lower(), ResourceLimits()))
+
+@dataclass
+class ProcessResult:
+    """Outcome of a finished script process"""
+    returncode: int
+    stdout: str
+    stderr: str
+    wall_time_seconds: float = 0.0
+    usage: Optional[ResourceUsage] = None
+
+class ExecutionTimeout(subprocess.TimeoutExpired):
+    """TimeoutExpired that keeps what the process produced before it was stopped"""
+
+    def __init__(self, command: List[str], timeout: float, result: ProcessResult):
+        super().__init__(command, timeout, output=result.stdout, stderr=result.stderr)
+        self.result = result
+
+# Size of each incremental read from a child's stdout/stderr pipe
+READ_CHUNK_SIZE = 64 * 1024
+
+# Called with ("stdout" | "stderr", text) for every chunk a process writes
+OutputCallback = Callable[[str, str], None]
+
+def decode_output(data: bytes) -> str:
+    """Decode process output the same way subprocess.run(text=True) does"""
+    if not data:
+        return ""
+    text = data.decode(locale.getpreferredencoding(False), errors="replace")
+    # Universal newlines, matching text mode
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+class BufferedOutput:
+    """Default output sink: keeps everything a process writes in memory"""
+
+    def __init__(self):
+        self.buffers = {"stdout": bytearray(), "stderr": bytearray()}
+
+    def write(self, stream: str, data: bytes):
+        self.buffers[stream].extend(data)
+
+    def close(self):
+        pass
+
+    def text(self, stream: str) -> str:
+        return decode_output(bytes(self.buffers[stream]))
+
+async def _run_in_thread(
+    command: List[str],
+    cwd: str,
+    timeout: float,
+    output,
+    on_output: Optional[OutputCallback] = None,
+    env: Optional[Dict[str, str]] = None
+) -> int:
+    """Fallback for event loops without subprocess support (e.g. SelectorEventLoop on Windows)"""
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(
+        None,
+        lambda: subprocess.run(command, cwd=cwd, env=env, capture_output=True, timeout=timeout)
+    )
+    for stream, data in (("stdout", result.stdout), ("stderr", result.stderr)):
+        output.write(stream, data)
+        # No incremental reads available here; publish everything at the end
+        if on_output and data:
+            on_output(stream, decode_output(data))
+    return result.returncode
+
+async def pump_stream(
+    stream: asyncio.StreamReader,
+    name: str,
+    output,
+    on_output: Optional[OutputCallback]
+):
+    """Read a pipe chunk by chunk until EOF, publishing each chunk as it arrives"""
+    decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))(errors="replace")
+    while True:
+        chunk = await stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        output.write(name, chunk)
+        if on_output:
+            text = decoder.decode(chunk)
+            if text:
+                on_output(name, text.replace("\r\n", "\n"))
+    if on_output:
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            on_output(name, tail)
+
+async def open_pipe_readers(pipes: Dict[str, object]) -> Dict[str, asyncio.StreamReader]:
+    """Attach asyncio stream readers to raw pipe file objects"""
+    loop = asyncio.get_running_loop()
+    readers = {}
+    for name, pipe in pipes.items():
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda reader=reader: asyncio.StreamReaderProtocol(reader), pipe)
+        readers[name] = reader
+    return readers
+
+def signal_process_group(pgid: int, sig: int) -> bool:
+    """Send a signal to a process group; False if the group no longer exists"""
+    try:
+        os.killpg(pgid, sig)
+        return True
+    except (ProcessLookupError, PermissionError):
+        return False
+
+async def terminate_process_group(pgid: int, exited: asyncio.Future, grace: float = KILL_GRACE_SECONDS):
+    """Stop a run and everything it started: SIGTERM the group, SIGKILL what's left after the grace period"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + grace
+    signal_process_group(pgid, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(asyncio.shield(exited), timeout=grace)
+    except asyncio.TimeoutError:
+        pass
+    # The script itself may be gone while its children are still shutting down
+    while loop.time() < deadline and signal_process_group(pgid, 0):
+        await asyncio.sleep(0.1)
+    signal_process_group(pgid, signal.SIGKILL)
+    await asyncio.shield(exited)
+
+def _reap_with_rusage(pid: int, loop: asyncio.AbstractEventLoop, future: asyncio.Future):
+    """Block in wait4 on a helper thread and hand (returncode, usage) back to the loop"""
+    try:
+        _, status, rusage = os.wait4(pid, 0)
+        result = (os.waitstatus_to_exitcode(status), ResourceUsage.from_rusage(rusage))
+    except ChildProcessError:
+        result = (255, None)
+
+    def deliver():
+        if not future.done():
+            future.set_result(result)
+    loop.call_soon_threadsafe(deliver)
+
+class _PosixChild:
+    """Child started with Popen and reaped with wait4 so its rusage is kept.
+
+    asyncio's own child watcher reaps with waitpid and throws the resource
+    usage away, hence the separate reaper thread per child. The child leads
+    its own session so the whole process tree can be signalled at once.
+    """
+
+    def __init__(self, process: subprocess.Popen, readers: Dict[str, asyncio.StreamReader], exited: asyncio.Future):
+        self.process = process
+        self.readers = readers
+        self.exited = exited
+
+    @classmethod
+    async def spawn(cls, command: List[str], cwd: str, env: Optional[Dict[str, str]] = None,
+                    limits: Optional[ResourceLimits] = None) -> "_PosixChild":
+        loop = asyncio.get_running_loop()
+        process = subprocess.Popen(
+            command,
+            cwd=cwd,
+            env=env,
+            preexec_fn=limits.preexec_fn() if limits else None,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True
+        )
+        readers = await open_pipe_readers({"stdout": process.stdout, "stderr": process.stderr})
+        exited = loop.create_future()
+        threading.Thread(
+            target=_reap_with_rusage, args=(process.pid, loop, exited),
+            name=f"reaper-{process.pid}", daemon=True
+        ).start()
+        return cls(process, readers, exited)
+
+    def kill(self):
+        signal_process_group(self.process.pid, signal.SIGKILL)
+
+    async def terminate(self):
+        await terminate_process_group(self.process.pid, self.exited)
+
+    async def wait(self):
+        returncode, usage = await asyncio.shield(self.exited)
+        # We reaped the child ourselves; keep Popen from trying again
+        self.process.returncode = returncode
+        return returncode, usage
+
+class _AsyncioChild:
+    """Child started through asyncio (platforms without wait4); no rusage"""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.readers = {"stdout": process.stdout, "stderr": process.stderr}
+
+    @classmethod
+    async def spawn(cls, command: List[str], cwd: str, env: Optional[Dict[str, str]] = None,
+                    limits: Optional[ResourceLimits] = None) -> "_AsyncioChild":
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            cwd=cwd,
+            env=env,
+            preexec_fn=limits.preexec_fn() if limits else None,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        return cls(process)
+
+    def kill(self):
+        if self.process.returncode is None:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+
+    async def terminate(self):
+        if self.process.returncode is None:
+            try:
+                self.process.terminate()
+            except ProcessLookupError:
+                pass
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout=KILL_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            self.kill()
+
+    async def wait(self):
+        return await self.process.wait(), None
+
+async def run_child(
+    child,
+    command: List[str],
+    timeout: Optional[float],
+    output,
+    on_output: Optional[OutputCallback],
+    started: float
+) -> ProcessResult:
+    """Pump a started child's output until it exits and collect the result.
+
+    A child that outlives the timeout is stopped with terminate() and
+    ExecutionTimeout is raised with the output it produced until then. On
+    cancellation the child is killed outright.
+    """
+    def pump_all():
+        return asyncio.gather(
+            pump_stream(child.readers["stdout"], "stdout", output, on_output),
+            pump_stream(child.readers["stderr"], "stderr", output, on_output)
+        )
+
+    async def communicate():
+        await pump_all()
+        return await child.wait()
+
+    timed_out = False
+    try:
+        try:
+            returncode, usage = await asyncio.wait_for(communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            await child.terminate()
+            returncode, usage = await child.wait()
+            # Pick up whatever was still sitting in the pipes
+            try:
+                await asyncio.wait_for(pump_all(), timeout=DRAIN_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        except asyncio.CancelledError:
+            # Don't leave an orphaned process tree behind if the request goes away
+            child.kill()
+            raise
+    finally:
+        output.close()
+
+    result = ProcessResult(
+        returncode=returncode,
+        stdout=output.text("stdout"),
+        stderr=output.text("stderr"),
+        wall_time_seconds=time.monotonic() - started,
+        usage=usage
+    )
+    if timed_out:
+        raise ExecutionTimeout(command, timeout, result)
+    return result
+
+async def run_command(
+    command: List[str],
+    cwd: str,
+    timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS,
+    on_output: Optional[OutputCallback] = None,
+    output=None,
+    env: Optional[Dict[str, str]] = None,
+    on_spawn: Optional[Callable[[int], None]] = None,
+    limits: Optional[ResourceLimits] = None
+) -> ProcessResult:
+    """Run a command without blocking the event loop.
+
+    Output is read incrementally, written to the output sink (in memory
+    unless e.g. an OutputSpool is given) and handed to on_output while the
+    process runs. env adds variables to the server's environment, limits
+    sets rlimits on the child and on_spawn is called with the PID once the
+    process started. Raises ExecutionTimeout (a subprocess.TimeoutExpired) if the
+    process outlives the timeout and FileNotFoundError if the interpreter is
+    missing, mirroring subprocess.run.
+    """
+    if output is None:
+        output = BufferedOutput()
+
+    if env:
+        env = dict(os.environ, **env)
+
+    started = time.monotonic()
+    try:
+        if hasattr(os, "wait4"):
+            child = await _PosixChild.spawn(command, cwd, env, limits)
+        else:
+            child = await _AsyncioChild.spawn(command, cwd, env, limits)
+    except NotImplementedError:
+        try:
+            returncode = await _run_in_thread(command, cwd, timeout, output, on_output, env)
+        finally:
+            output.close()
+        return ProcessResult(
+            returncode=returncode,
+            stdout=output.text("stdout"),
+            stderr=output.text("stderr"),
+            wall_time_seconds=time.monotonic() - started
+        )
+    except BaseException:
+        output.close()
+        raise
+    if on_spawn:
+        on_spawn(child.process.pid)
+    return await run_child(child, command, timeout, output, on_output, started)
+
+def parse_language_limits(value: str) -> Dict[str, int]:
+    """Parse "Python=8,Bash=4" into {"python": 8, "bash": 4}"""
+    limits = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        language, limit = item.split("=", 1)
+        try:
+            limits[language.strip().lower()] = int(limit)
+        except ValueError:
+            print(f"Ignoring invalid language limit: {item}")
+    return limits
+
+class _Waiter(NamedTuple):
+    future: asyncio.Future
+    language: str
+    user_id: Optional[int]
+    priority: int
+    enqueued_at: float
+
+class ExecutionPool:
+    """Bounded pool of execution slots with global, per-language and per-user limits.
+
+    Runs that can't get a slot wait in a queue and are started as soon as
+    capacity frees up, lowest priority rank first and in arrival order within
+    a rank. Waiting ages a run towards rank 0 so low priority work still gets
+    through under sustained load. A waiter blocked only by its own language
+    or user limit does not hold up the runs queued behind it.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 0,
+        language_limits: Optional[Dict[str, int]] = None,
+        max_per_user: int = 0,
+        aging_seconds: float = 0.0
+    ):
+        self.max_concurrent = max_concurrent
+        self.language_limits = {k.lower(): v for k, v in (language_limits or {}).items()}
+        self.max_per_user = max_per_user
+        self.aging_seconds = aging_seconds
+        self._running = 0
+        self._running_by_language: Dict[str, int] = {}
+        self._running_by_user: Dict[int, int] = {}
+        self._waiters = deque()
+
+    @classmethod
+    def from_env(cls) -> "ExecutionPool":
+        return cls(
+            max_concurrent=MAX_CONCURRENT_RUNS,
+            language_limits=parse_language_limits(LANGUAGE_LIMITS),
+            max_per_user=MAX_RUNS_PER_USER,
+            aging_seconds=PRIORITY_AGING_SECONDS
+        )
+
+    def _has_capacity(self, language: str, user_id: Optional[int]) -> bool:
+        if self.max_concurrent and self._running >= self.max_concurrent:
+            return False
+        language_limit = self.language_limits.get(language)
+        if language_limit and self._running_by_language.get(language, 0) >= language_limit:
+            return False
+        if self.max_per_user and user_id is not None:
+            if self._running_by_user.get(user_id, 0) >= self.max_per_user:
+                return False
+        return True
+
+    def _take(self, language: str, user_id: Optional[int]):
+        self._running += 1
+        self._running_by_language[language] = self._running_by_language.get(language, 0) + 1
+        if user_id is not None:
+            self._running_by_user[user_id] = self._running_by_user.get(user_id, 0) + 1
+
+    def _queue_order(self) -> list:
+        """Waiters in the order they should get slots: aged priority, then arrival"""
+        now = time.monotonic()
+        return sorted(
+            self._waiters,
+            key=lambda waiter: (
+                effective_priority(waiter.priority, now - waiter.enqueued_at, self.aging_seconds),
+                waiter.enqueued_at
+            )
+        )
+
+    def _dispatch(self):
+        """Hand free slots to queued runs by priority"""
+        for waiter in self._queue_order():
+            future, language, user_id = waiter.future, waiter.language, waiter.user_id
+            if future.done():
+                self._waiters.remove(waiter)
+                continue
+            if self.max_concurrent and self._running >= self.max_concurrent:
+                break
+            if self._has_capacity(language, user_id):
+                self._take(language, user_id)
+                self._waiters.remove(waiter)
+                future.set_result(None)
+
+    async def acquire(self, language: str, user_id: Optional[int] = None, priority: int = 0):
+        """Wait until a slot is available for this language and user"""
+        language = (language or "").lower()
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(future, language, user_id, priority, time.monotonic())
+        self._waiters.append(waiter)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted just as we were cancelled; give it back
+                self.release(language, user_id)
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, language: str, user_id: Optional[int] = None):
+        """Return a slot to the pool and start the next queued run"""
+        language = (language or "").lower()
+        self._running -= 1
+        self._running_by_language[language] -= 1
+        if user_id is not None:
+            self._running_by_user[user_id] -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, language: str, user_id: Optional[int] = None, priority: int = 0):
+        await self.acquire(language, user_id, priority)
+        try:
+            yield
+        finally:
+            self.release(language, user_id)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running,
+            "queued": sum(1 for waiter in self._waiters if not waiter.future.done()),
+            "queued_by_priority": self._queued_by_priority(),
+            "running_by_language": {k: v for k, v in self._running_by_language.items() if v},
+            "running_by_user": {k: v for k, v in self._running_by_user.items() if v},
+            "limits": {
+                "priority_aging_seconds": self.aging_seconds,
+                "max_concurrent": self.max_concurrent,
+                "per_language": self.language_limits,
+                "per_user": self.max_per_user
+            }
+        }
+
+    def _queued_by_priority(self) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        for waiter in self._waiters:
+            if not waiter.future.done():
+                counts[waiter.priority] = counts.get(waiter.priority, 0) + 1
+        return counts
+
+# Shared pool used by manual and scheduled executions
+execution_pool = ExecutionPool.from_env()
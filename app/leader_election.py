@@ -0,0 +1,163 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import case, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database import engine
+from models import SchedulerLease
+
+# "elect" competes for the scheduler lease, "off" only serves HTTP (e.g. extra API workers)
+SCHEDULER_MODE = os.getenv("SCRIPTPILOT_SCHEDULER_MODE", "elect").lower()
+# A leader that hasn't renewed its lease for this long is replaced
+LEADER_LEASE_SECONDS = float(os.getenv("SCRIPTPILOT_LEADER_LEASE_SECONDS", "30"))
+# Identifies this server process in the lease and in the runs it executes
+SERVER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+def server_gone(server_id: Optional[str]) -> bool:
+    """Whether the server process behind a SERVER_ID has exited.
+
+    Processes on other hosts can't be checked and count as running; records
+    without an owner (from older versions) count as gone.
+    """
+    if not server_id:
+        return True
+    hostname, pid, _ = server_id.rsplit("-", 2)
+    if hostname != socket.gethostname():
+        return False
+    if server_id == SERVER_ID:
+        return False
+    if int(pid) == os.getpid() or os.name != "posix":
+        # Our PID was reused from an earlier process, or there is no cheap liveness check
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+class LeaderElection:
+    """Lease-based leader election through a row in the application database.
+
+    Every process campaigns every lease/3 seconds. The holder renews its
+    lease; anyone else takes over once the lease has expired, so a crashed
+    leader is replaced within one lease period. A process that can't renew
+    steps down right away rather than risk two leaders.
+    """
+
+    def __init__(self, name: str, lease_seconds: float = LEADER_LEASE_SECONDS,
+                 on_elected: Optional[Callable[[], None]] = None,
+                 on_demoted: Optional[Callable[[], None]] = None,
+                 on_renewed: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.holder_id = SERVER_ID
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.on_renewed = on_renewed
+        self.is_leader = False
+        self.elected_at: Optional[datetime] = None
+
+    @property
+    def renew_interval(self) -> float:
+        return self.lease_seconds / 3
+
+    def _try_acquire(self) -> bool:
+        """Take or renew the lease; True if this process holds it afterwards. Blocking."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        with engine.begin() as connection:
+            result = connection.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == self.name,
+                    or_(SchedulerLease.holder == self.holder_id, SchedulerLease.expires_at < now)
+                )
+                .values(
+                    holder=self.holder_id,
+                    expires_at=expires_at,
+                    acquired_at=case((SchedulerLease.holder == self.holder_id, SchedulerLease.acquired_at), else_=now)
+                )
+            )
+            if result.rowcount == 1:
+                return True
+        # Nobody has ever held it
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(SchedulerLease).values(
+                    name=self.name, holder=self.holder_id, acquired_at=now, expires_at=expires_at
+                ))
+            return True
+        except IntegrityError:
+            return False
+
+    def _release(self):
+        with engine.begin() as connection:
+            connection.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder_id)
+                .values(expires_at=datetime.utcnow())
+            )
+
+    def current_lease(self) -> Optional[SchedulerLease]:
+        with engine.connect() as connection:
+            row = connection.execute(select(SchedulerLease).where(SchedulerLease.name == self.name)).first()
+        return SchedulerLease(**row._mapping) if row else None
+
+    async def campaign(self):
+        """One election round: renew or take the lease, and act on any change of role"""
+        try:
+            acquired = await asyncio.to_thread(self._try_acquire)
+        except Exception as e:
+            print(f"Could not renew {self.name} lease: {e}")
+            acquired = False
+
+        if acquired and not self.is_leader:
+            self.is_leader = True
+            self.elected_at = datetime.utcnow()
+            print(f"Elected {self.name} leader ({self.holder_id})")
+            if self.on_elected:
+                await asyncio.to_thread(self.on_elected)
+        elif not acquired and self.is_leader:
+            self.is_leader = False
+            self.elected_at = None
+            print(f"Lost {self.name} leadership ({self.holder_id})")
+            if self.on_demoted:
+                await asyncio.to_thread(self.on_demoted)
+        elif acquired and self.on_renewed:
+            self.on_renewed()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            await self.campaign()
+
+    async def resign(self):
+        """Give up the lease on shutdown so another process takes over without waiting for it to expire"""
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        if self.on_demoted:
+            await asyncio.to_thread(self.on_demoted)
+        try:
+            await asyncio.to_thread(self._release)
+        except Exception as e:
+            print(f"Could not release {self.name} lease: {e}")
+
+    def status(self) -> dict:
+        lease = self.current_lease()
+        return {
+            "mode": SCHEDULER_MODE,
+            "process": self.holder_id,
+            "is_leader": self.is_leader,
+            "elected_at": self.elected_at.isoformat() if self.elected_at else None,
+            "leader": lease.holder if lease and lease.expires_at > datetime.utcnow() else None,
+            "lease_expires_at": lease.expires_at.isoformat() if lease else None,
+            "lease_seconds": self.lease_seconds
+        }
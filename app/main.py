@@ -1,25 +1,64 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Path, Form, Query, Request, Depends
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Path, Form, Query, Request, Depends, Body
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse, FileResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from database import create_db_and_tables
-from models import Script, ExecutionHistory, Schedule, ScheduleType, ScheduleStatus, User, UserRole, AuditLog
+from models import Script, ExecutionHistory, ExecutionSummary, ExecutionBatch, ExecutionStatus, Schedule, ScheduleType, ScheduleStatus, User, UserRole, AuditLog
+from models import OverlapPolicy, MisfirePolicy, ScheduleDecision, ScheduleDecisionKind, ScheduleForecastRequest
+from models import Pipeline, PipelineStep, PipelineStepCreate, PipelineRun, PipelineRunStatus, PipelineCreate, RunParameters, MatrixRunRequest, ExecutionPriority
 from database import get_session
 from auth import get_current_user_from_token, require_admin, require_admin_or_editor
 from auth_routes import router as auth_router
+from worker_routes import router as worker_router
+from executor import execution_pool, MAX_TIMEOUT_SECONDS, ResourceLimits
+from output_store import log_path
+from workspaces import list_artifacts, resolve_artifact, sweep_workspaces
+from environments import environment_cache, parse_dependencies, supports_dependencies, InvalidDependencies
+from warm_pool import warm_python_pool
+from runtimes import runtime_registry, RuntimeNotAvailable
+from remote_workers import remote_dispatcher
+from executions import (
+    create_execution_record, run_execution, run_in_background, live_executions,
+    get_execution_record, mark_interrupted_executions, effective_timeout,
+    cancel_execution, running_executions, single_flight_key, find_in_flight, wait_for_execution,
+    lookup_cached_result, remember_result, result_key_for, delete_executions, sweep_orphaned_logs
+)
+from result_cache import result_cache
+from pipelines import (
+    validate_steps, create_pipeline_run, run_pipeline, step_dependencies, mark_interrupted_pipeline_runs, PipelineError
+)
+from schedule_store import (
+    create_job_store, schedule_job_id, schedule_fingerprint, local_next_run, stored_schedule_jobs, save_schedule_jobs
+)
+from schedule_dispatch import (
+    ShiftedTrigger, spread_offset, dispatch_limiter, dispatch_metrics, MAX_JITTER_SECONDS
+)
+from schedule_policies import ScheduleExecutor, overlap_control, due_run_times, record_decision
+from schedule_forecast import (
+    ForecastEntry, forecast_load, expected_runtimes, MAX_FORECAST_HOURS, MAX_FORECAST_BUCKETS, MAX_FORECAST_PROPOSED,
+    FORECAST_HISTORY_DAYS
+)
+from leader_election import LeaderElection, SCHEDULER_MODE, SERVER_ID, server_gone
+from run_parameters import validate_parameters, parse_parameters_form, load_parameters, dump_parameters, expand_matrix, InvalidParameters
 from sqlmodel import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from sqlmodel import select
+from sqlalchemy import delete, func, or_
+from sqlalchemy.orm import defer
 
 import os
+import copy
 import shutil
-import subprocess
 import asyncio
 from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.base import STATE_PAUSED
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.events import EVENT_JOB_SUBMITTED
 from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.util import convert_to_datetime
 import json
 
 app = FastAPI(title="ScriptPilot", description="Automated Script Management & Scheduling Platform")
@@ -33,17 +72,55 @@ templates = Jinja2Templates(directory=templates_dir)
 
 # Include authentication routes
 app.include_router(auth_router)
+# Endpoints used by remote worker agents (see worker_agent.py)
+app.include_router(worker_router)
 
-# Initialize the background scheduler
-scheduler = BackgroundScheduler()
-scheduler.start()
+# Background scheduler; jobs persist in the app database. Every process starts it
+# paused so schedule changes reach the shared job store, but only the elected
+# leader resumes it and fires triggers. Schedule jobs go to ScheduleExecutor,
+# which applies each schedule's misfire policy to its due fire times.
+job_store = create_job_store()
+scheduler = BackgroundScheduler(
+    jobstores={"default": job_store},
+    executors={
+        "default": ThreadPoolExecutor(),
+        "schedules": ScheduleExecutor(lambda job, run_times: fire_schedule_job(job, run_times))
+    }
+)
+scheduler.add_listener(
+    lambda event: dispatch_metrics.record_fire(event.scheduled_run_times)
+    if event.job_id.startswith("schedule_") else None,
+    EVENT_JOB_SUBMITTED
+)
+
+# Event loop that owns the execution pool; scheduler threads submit runs to it
+main_loop: Optional[asyncio.AbstractEventLoop] = None
 
 @app.on_event("startup")
 async def on_startup():
+    global main_loop
+    main_loop = asyncio.get_running_loop()
     create_db_and_tables()
+    running_elsewhere = mark_interrupted_executions()
+    mark_interrupted_pipeline_runs()
+    sweep_workspaces(keep=running_elsewhere)
+    sweep_orphaned_logs()
+    await runtime_registry.probe()
     await create_default_admin()
-    # Load existing schedules from database
-    load_schedules_from_db()
+    scheduler.start(paused=True)
+    if SCHEDULER_MODE == "elect":
+        # Decide leadership before serving, so a single instance schedules right away
+        await scheduler_election.campaign()
+    if remote_dispatcher.enabled:
+        await require_single_api_process()
+    if SCHEDULER_MODE == "elect":
+        run_in_background(scheduler_election.run())
+    python_runtime = runtime_registry.for_filename("script.py")
+    if python_runtime.available:
+        await warm_python_pool.start(python_runtime.path)
+    if remote_dispatcher.enabled:
+        print(f"Remote workers enabled (mode: {remote_dispatcher.mode})")
+        run_in_background(remote_dispatcher.watch_leases())
 
 async def create_default_admin():
     """Create default admin user if no users exist"""
@@ -86,30 +163,168 @@ async def create_default_admin():
         session.close()
 
 @app.on_event("shutdown")
-def on_shutdown():
+async def on_shutdown():
+    await scheduler_election.resign()
     scheduler.shutdown()
+    await warm_python_pool.stop()
+
+# Query options that skip loading (and decompressing) captured output, for
+# listings and statistics that never look at it
+WITHOUT_OUTPUT = (defer(ExecutionHistory.stdout), defer(ExecutionHistory.stderr))
+
+# Most scripts a single batch request may start
+MAX_BATCH_SIZE = 500
 
 # Directory to store uploaded scripts
 UPLOAD_DIR = os.path.join(current_dir, "scripts")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+def start_scheduling():
+    """Became the scheduler leader: bring stored jobs up to date, then start firing them"""
+    load_schedules_from_db()
+    scheduler.resume()
+
+def stop_scheduling():
+    scheduler.pause()
+
+scheduler_election = LeaderElection(
+    "scheduler",
+    on_elected=start_scheduling,
+    on_demoted=stop_scheduling,
+    # Jobs other processes added to the store are picked up on the next wakeup
+    on_renewed=scheduler.wakeup
+)
+
+async def require_single_api_process():
+    """Refuse to start remote execution next to other API processes.
+
+    Workers claim runs from an in-memory queue, and cancel, single-flight and
+    the result cache only see this process's runs, so every request has to
+    reach the same process. It must hold the scheduler lease to prove no
+    other process is running; a lease left by a process that exited is
+    waited out.
+    """
+    if SCHEDULER_MODE != "elect":
+        raise RuntimeError("Remote execution needs a single API process with SCRIPTPILOT_SCHEDULER_MODE=elect")
+    while not scheduler_election.is_leader:
+        lease = scheduler_election.current_lease()
+        if lease is None or not server_gone(lease.holder):
+            raise RuntimeError(
+                f"Remote execution needs a single API process, but {lease.holder if lease else 'another process'} "
+                "holds the scheduler lease"
+            )
+        print(f"Waiting for the lease of exited process {lease.holder} to expire")
+        await asyncio.sleep(scheduler_election.renew_interval)
+        await scheduler_election.campaign()
+
 def load_schedules_from_db():
-    """Load all active schedules from the database and add them to the scheduler"""
+    """Reconcile the persistent job store with the active schedules.
+
+    Jobs survive restarts, so only schedules whose job is missing or was built
+    from different settings are added again. Changed next_run values are
+    written in a single transaction.
+    """
     try:
+        stored_jobs = stored_schedule_jobs(job_store, scheduler.timezone)
         with get_session() as session:
             active_schedules = session.exec(
                 select(Schedule).where(Schedule.status == ScheduleStatus.ACTIVE)
             ).all()
-            
-            for schedule in active_schedules:
-                add_schedule_to_scheduler(schedule)
-                
-        print(f"Loaded {len(active_schedules)} active schedules from database")
+        
+        updates = []
+        rebuilt = 0
+        for schedule in active_schedules:
+            job_id = schedule_job_id(schedule.id)
+            fingerprint = schedule_fingerprint(schedule)
+            if schedule.job_fingerprint == fingerprint and stored_jobs:
+                # Unchanged. A missing job has no fire times left (e.g. a one-off that already
+                # fired) unless the whole store is empty, i.e. it was reset
+                next_run = stored_jobs.get(job_id)
+            else:
+                next_run = add_schedule_to_scheduler(schedule, save_next_run=False)
+                rebuilt += 1
+            if next_run != schedule.next_run or fingerprint != schedule.job_fingerprint:
+                updates.append({"id": schedule.id, "next_run": next_run, "job_fingerprint": fingerprint})
+        
+        # Jobs of schedules deleted, paused or completed while no scheduler was running
+        stale_jobs = stored_jobs.keys() - {schedule_job_id(schedule.id) for schedule in active_schedules}
+        for job_id in stale_jobs:
+            scheduler.remove_job(job_id)
+        
+        save_schedule_jobs(updates)
+        print(
+            f"Loaded {len(active_schedules)} active schedules from database "
+            f"({rebuilt} rebuilt, {len(stale_jobs)} stale jobs removed)"
+        )
     except Exception as e:
         print(f"Error loading schedules: {e}")
 
-def add_schedule_to_scheduler(schedule: Schedule):
-    """Add a schedule to the APScheduler"""
+def _cron_trigger(start_date, end_date, templates: Optional[dict] = None, **fields) -> CronTrigger:
+    """A CronTrigger; with a templates dict, triggers with the same fields share one parsed copy of them"""
+    if templates is None:
+        return CronTrigger(start_date=start_date, end_date=end_date, **fields)
+    key = tuple(sorted(fields.items()))
+    if key not in templates:
+        templates[key] = CronTrigger(**fields)
+    trigger = copy.copy(templates[key])
+    trigger.start_date = convert_to_datetime(start_date, trigger.timezone, "start_date")
+    trigger.end_date = convert_to_datetime(end_date, trigger.timezone, "end_date")
+    return trigger
+
+def build_schedule_trigger(schedule: Schedule, cron_templates: Optional[dict] = None):
+    """The APScheduler trigger a schedule fires on, or None if it can't be built.
+
+    Pass the same cron_templates dict when building many triggers at once
+    (e.g. for a forecast) so each distinct cron expression is parsed once.
+    """
+    trigger = None
+    
+    if schedule.schedule_type == ScheduleType.ONCE:
+        trigger = DateTrigger(run_date=schedule.start_time)
+        
+    elif schedule.schedule_type == ScheduleType.DAILY:
+        trigger = IntervalTrigger(days=1, start_date=schedule.start_time, end_date=schedule.end_time)
+        
+    elif schedule.schedule_type == ScheduleType.WEEKLY:
+        trigger = IntervalTrigger(weeks=1, start_date=schedule.start_time, end_date=schedule.end_time)
+        
+    elif schedule.schedule_type == ScheduleType.MONTHLY:
+        # Run monthly on the same day of month
+        trigger = _cron_trigger(
+            schedule.start_time, schedule.end_time, cron_templates,
+            day=schedule.start_time.day,
+            hour=schedule.start_time.hour,
+            minute=schedule.start_time.minute
+        )
+        
+    elif schedule.schedule_type == ScheduleType.CRON and schedule.cron_expression:
+        # Parse cron expression
+        cron_parts = schedule.cron_expression.split()
+        if len(cron_parts) == 5:
+            minute, hour, day, month, day_of_week = cron_parts
+            trigger = _cron_trigger(
+                schedule.start_time, schedule.end_time, cron_templates,
+                minute=minute, hour=hour, day=day, 
+                month=month, day_of_week=day_of_week
+            )
+    
+    # Spread recurring runs away from round times so schedules don't all fire at once
+    if trigger and schedule.schedule_type != ScheduleType.ONCE and (schedule.spread or schedule.jitter_seconds):
+        trigger = ShiftedTrigger(
+            trigger,
+            offset_seconds=spread_offset(schedule.id) if schedule.spread else 0,
+            jitter_seconds=schedule.jitter_seconds or 0
+        )
+    
+    return trigger
+
+def add_schedule_to_scheduler(schedule: Schedule, save_next_run: bool = True) -> Optional[datetime]:
+    """Add a schedule to the APScheduler and return its next run time.
+
+    With save_next_run=False the caller writes next_run itself, e.g. for many
+    schedules at once.
+    """
+    next_run = None
     try:
         # Remove existing job if it exists
         try:
@@ -117,38 +332,7 @@ def add_schedule_to_scheduler(schedule: Schedule):
         except:
             pass  # Job doesn't exist, that's fine
         
-        # Create trigger based on schedule type
-        trigger = None
-        
-        if schedule.schedule_type == ScheduleType.ONCE:
-            trigger = DateTrigger(run_date=schedule.start_time)
-            
-        elif schedule.schedule_type == ScheduleType.DAILY:
-            trigger = IntervalTrigger(days=1, start_date=schedule.start_time, end_date=schedule.end_time)
-            
-        elif schedule.schedule_type == ScheduleType.WEEKLY:
-            trigger = IntervalTrigger(weeks=1, start_date=schedule.start_time, end_date=schedule.end_time)
-            
-        elif schedule.schedule_type == ScheduleType.MONTHLY:
-            # Run monthly on the same day of month
-            trigger = CronTrigger(
-                day=schedule.start_time.day,
-                hour=schedule.start_time.hour,
-                minute=schedule.start_time.minute,
-                start_date=schedule.start_time,
-                end_date=schedule.end_time
-            )
-            
-        elif schedule.schedule_type == ScheduleType.CRON and schedule.cron_expression:
-            # Parse cron expression
-            cron_parts = schedule.cron_expression.split()
-            if len(cron_parts) == 5:
-                minute, hour, day, month, day_of_week = cron_parts
-                trigger = CronTrigger(
-                    minute=minute, hour=hour, day=day, 
-                    month=month, day_of_week=day_of_week,
-                    start_date=schedule.start_time, end_date=schedule.end_time
-                )
+        trigger = build_schedule_trigger(schedule)
         
         if trigger:
             scheduler.add_job(
@@ -157,141 +341,226 @@ def add_schedule_to_scheduler(schedule: Schedule):
                 args=[schedule.id],
                 id=f"schedule_{schedule.id}",
                 name=f"Schedule: {schedule.name}",
-                misfire_grace_time=300  # 5 minutes grace time
+                executor="schedules",
+                # Every due fire time reaches fire_schedule_job, which applies the
+                # schedule's misfire policy and grace time
+                coalesce=False,
+                misfire_grace_time=None
             )
-            
-            # Update next_run time
-            with get_session() as session:
-                db_schedule = session.get(Schedule, schedule.id)
-                if db_schedule:
-                    job = scheduler.get_job(f"schedule_{schedule.id}")
-                    if job:
-                        db_schedule.next_run = job.next_run_time
-                        session.commit()
+            job = scheduler.get_job(f"schedule_{schedule.id}")
+            if job:
+                next_run = local_next_run(job.next_run_time)
+        
+        # Update next_run time
+        if save_next_run:
+            save_schedule_jobs([
+                {"id": schedule.id, "next_run": next_run, "job_fingerprint": schedule_fingerprint(schedule)}
+            ])
                         
     except Exception as e:
         print(f"Error adding schedule {schedule.id} to scheduler: {e}")
+    return next_run
+
+def fire_schedule_job(job, run_times: List[datetime]):
+    """Called by ScheduleExecutor with every fire time of a schedule job that came due.
+
+    Fire times usually arrive one at a time; several, or late ones, mean the
+    scheduler was paused, down or busy. The schedule's misfire policy decides
+    which of them still run, and anything else is recorded as a decision.
+    """
+    schedule_id = job.args[0]
+    if not scheduler_election.is_leader:
+        print(f"Not the scheduler leader, skipping scheduled execution {schedule_id}")
+        return
+    with get_session() as session:
+        schedule = session.get(Schedule, schedule_id)
+    if not schedule or schedule.status != ScheduleStatus.ACTIVE:
+        return
+    
+    now = datetime.now(run_times[-1].tzinfo)
+    to_run, missed, merged = due_run_times(
+        run_times, now, schedule.misfire_policy, schedule.misfire_grace_seconds
+    )
+    if missed:
+        record_decision(
+            schedule_id, ScheduleDecisionKind.MISSED,
+            f"{len(missed)} fire time(s) more than {schedule.misfire_grace_seconds} seconds late",
+            scheduled_for=missed[-1], count=len(missed)
+        )
+    if merged:
+        record_decision(
+            schedule_id, ScheduleDecisionKind.COALESCED,
+            f"{len(merged) + 1} late fire times ran once",
+            scheduled_for=to_run[-1], count=len(merged)
+        )
+    if len(to_run) > 1:
+        record_decision(
+            schedule_id, ScheduleDecisionKind.CAUGHT_UP,
+            f"{len(to_run)} late fire times each ran",
+            scheduled_for=to_run[-1], count=len(to_run)
+        )
+    for run_time in to_run:
+        execute_scheduled_script(schedule_id, run_time)
+
+def execute_scheduled_script(schedule_id: int, scheduled_for: Optional[datetime] = None):
+    """Entry point for APScheduler jobs"""
+    if not scheduler_election.is_leader:
+        # Leadership moved while this job was being fired; the new leader runs it
+        print(f"Not the scheduler leader, skipping scheduled execution {schedule_id}")
+        return None
+    return submit_scheduled_run(schedule_id, triggered=True, scheduled_for=scheduled_for)
+
+def submit_scheduled_run(schedule_id: int, triggered: bool = False, scheduled_for: Optional[datetime] = None):
+    """Hand a schedule's run over to the event loop.
+
+    The run goes through the shared execution pool; the calling thread is
+    released immediately instead of being held while the run is queued.
+    Returns a concurrent future.
+    """
+    if main_loop is None or main_loop.is_closed():
+        print(f"Event loop not running, skipping scheduled execution {schedule_id}")
+        return None
+    return asyncio.run_coroutine_threadsafe(
+        run_scheduled_script(schedule_id, triggered, scheduled_for), main_loop
+    )
+
+async def run_scheduled_script(schedule_id: int, triggered: bool = False, scheduled_for: Optional[datetime] = None):
+    """Run a schedule once.
 
-def execute_scheduled_script(schedule_id: int):
-    """Execute a script as part of a schedule"""
+    Runs fired by the schedule's trigger go through its overlap policy and
+    the global dispatch rate limit; run-now starts right away and returns the
+    execution (or pipeline run), raising ScheduleRunFailed if it couldn't start.
+    """
+    if not triggered:
+        return await _execute_schedule(schedule_id)
+    
+    with get_session() as session:
+        schedule = session.get(Schedule, schedule_id)
+    if not schedule or schedule.status != ScheduleStatus.ACTIVE:
+        return
+    admitted, decision, detail = await overlap_control.enter(
+        schedule_id, schedule.overlap_policy, schedule.max_instances
+    )
+    if decision:
+        await asyncio.to_thread(record_decision, schedule_id, decision, detail, scheduled_for)
+    if not admitted:
+        print(f"Skipping scheduled run of {schedule.name}: {detail}")
+        return
     try:
-        with get_session() as session:
-            schedule = session.get(Schedule, schedule_id)
-            if not schedule or schedule.status != ScheduleStatus.ACTIVE:
-                return
-            
-            script = session.get(Script, schedule.script_id)
-            if not script:
-                print(f"Script {schedule.script_id} not found for schedule {schedule_id}")
-                return
-            
-            print(f"Executing scheduled script: {script.filename} (Schedule: {schedule.name})")
-            
-            # Execute the script
-            file_path = os.path.join(UPLOAD_DIR, script.filename)
-            if not os.path.exists(file_path):
-                print(f"Script file not found: {file_path}")
-                return
-            
-            # Determine command based on file extension
-            file_ext = os.path.splitext(script.filename)[1].lower()
-            if file_ext == ".py":
-                command = ["python", script.filename]
-            elif file_ext == ".ps1":
-                command = ["powershell", "-ExecutionPolicy", "Bypass", "-File", script.filename]
-            elif file_ext == ".sh":
-                command = ["bash", script.filename]
-            elif file_ext == ".js":
-                command = ["node", script.filename]
-            elif file_ext in [".bat", ".cmd"]:
-                command = ["cmd", "/c", script.filename]
-            elif file_ext == ".rb":
-                command = ["ruby", script.filename]
-            elif file_ext == ".php":
-                command = ["php", script.filename]
-            elif file_ext == ".pl":
-                command = ["perl", script.filename]
-            elif file_ext == ".r":
-                command = ["Rscript", script.filename]
-            else:
-                print(f"Unsupported script type: {file_ext}")
-                return
-            
-            # Execute
-            start_time = datetime.utcnow()
-            try:
-                result = subprocess.run(
-                    command,
-                    cwd=UPLOAD_DIR,
-                    capture_output=True,
-                    text=True,
-                    timeout=300.0
-                )
-                
-                execution_time = (datetime.utcnow() - start_time).total_seconds()
-                
-                # Save execution history
-                execution_record = ExecutionHistory(
-                    script_id=schedule.script_id,
-                    schedule_id=schedule_id,
-                    filename=script.filename,
-                    language=script.language,
-                    exit_code=result.returncode,
-                    execution_time_seconds=round(execution_time, 2),
-                    stdout=result.stdout,
-                    stderr=result.stderr,
-                    executed_at=start_time,
-                    success=result.returncode == 0,
-                    triggered_by="schedule"
-                )
-                
-                session.add(execution_record)
-                
-                # Update schedule info
-                schedule.last_run = start_time
-                schedule.run_count += 1
-                
-                # Check if we've reached max runs
-                if schedule.max_runs and schedule.run_count >= schedule.max_runs:
-                    schedule.status = ScheduleStatus.COMPLETED
-                    scheduler.remove_job(f"schedule_{schedule_id}")
-                    print(f"Schedule {schedule.name} completed after {schedule.run_count} runs")
-                else:
-                    # Update next run time
-                    job = scheduler.get_job(f"schedule_{schedule_id}")
-                    if job:
-                        schedule.next_run = job.next_run_time
-                
-                session.commit()
-                
-                print(f"Scheduled execution completed: {script.filename}, exit_code: {result.returncode}")
-                
-            except subprocess.TimeoutExpired:
-                # Handle timeout
-                execution_record = ExecutionHistory(
-                    script_id=schedule.script_id,
-                    schedule_id=schedule_id,
-                    filename=script.filename,
-                    language=script.language,
-                    exit_code=-1,
-                    execution_time_seconds=300.0,
-                    stdout="",
-                    stderr="",
-                    executed_at=start_time,
-                    success=False,
-                    error_message="Script execution timed out (5 minutes maximum)",
-                    triggered_by="schedule"
-                )
-                
-                session.add(execution_record)
-                schedule.last_run = start_time
-                schedule.run_count += 1
-                session.commit()
-                
-                print(f"Scheduled execution timed out: {script.filename}")
-                
+        # Global cap on how fast triggered runs start, so a burst of triggers is smoothed out
+        dispatch_metrics.record_dispatch(await dispatch_limiter.acquire())
+        await _execute_schedule(schedule_id)
     except Exception as e:
         print(f"Error executing scheduled script {schedule_id}: {e}")
+    finally:
+        await overlap_control.leave(schedule_id)
+
+class ScheduleRunFailed(Exception):
+    """A schedule's run could not be started"""
+
+async def _execute_schedule(schedule_id: int) -> Union[ExecutionHistory, PipelineRun]:
+    """Execute a script (or pipeline) as part of a schedule; returns its execution record"""
+    with get_session() as session:
+        schedule = session.get(Schedule, schedule_id)
+        if not schedule or schedule.status != ScheduleStatus.ACTIVE:
+            raise ScheduleRunFailed(f"Schedule {schedule_id} is not active")
+    
+    if schedule.pipeline_id:
+        return await run_scheduled_pipeline(schedule)
+    
+    with get_session() as session:
+        script = session.get(Script, schedule.script_id)
+        if not script:
+            raise ScheduleRunFailed(f"Script {schedule.script_id} not found for schedule {schedule_id}")
+        
+        print(f"Executing scheduled script: {script.filename} (Schedule: {schedule.name})")
+        
+        # Execute the script
+        file_path = os.path.join(UPLOAD_DIR, script.filename)
+        if not os.path.exists(file_path):
+            raise ScheduleRunFailed(f"Script file not found: {script.filename}")
+        
+        # Resolve the interpreter from the runtime registry (probed at startup)
+        try:
+            command = runtime_registry.command_for(script.filename)
+        except RuntimeNotAvailable as e:
+            raise ScheduleRunFailed(f"Cannot run scheduled script {script.filename}: {e}")
+        
+        # Scheduled runs count against the schedule creator (or script owner)
+        run_as = schedule.created_by or script.owner_id
+        timeout = effective_timeout(script, schedule)
+        parameters = load_parameters(schedule.parameters)
+        result_key, cached = lookup_cached_result(script, command, UPLOAD_DIR, parameters)
+        flight_key = None
+        if schedule.single_flight or script.single_flight:
+            flight_key = single_flight_key(script, parameters)
+        running_id = find_in_flight(flight_key) if flight_key and cached is None else None
+        if cached is None and running_id is None:
+            execution = create_execution_record(
+                script, triggered_by="schedule", schedule_id=schedule_id,
+                parameters=parameters, priority=schedule.priority, flight_key=flight_key
+            )
+    
+    if cached is not None:
+        # Nothing changed since an earlier identical run; reuse its result
+        print(f"Scheduled run of {script.filename} served from cache (execution {cached.id})")
+        execution = cached
+    elif running_id is not None:
+        # Single-flight: an identical run is still going, e.g. run-now while the job fires
+        print(f"Scheduled run of {script.filename} attached to execution {running_id} in progress")
+        execution = await wait_for_execution(running_id)
+    else:
+        execution = await run_execution(
+            execution, command, cwd=UPLOAD_DIR, user_id=run_as, timeout=timeout, parameters=parameters
+        )
+        remember_result(result_key, execution, script.cache_ttl_seconds)
+    
+    record_schedule_run(schedule_id, datetime.utcnow() if cached is not None else execution.executed_at)
+    
+    if execution.status == ExecutionStatus.TIMED_OUT:
+        print(f"Scheduled execution timed out: {execution.filename}")
+    else:
+        print(f"Scheduled execution finished: {execution.filename}, exit_code: {execution.exit_code}")
+    return execution
+
+async def run_scheduled_pipeline(schedule: Schedule) -> PipelineRun:
+    """Run the pipeline a schedule points at"""
+    run_as = schedule.created_by
+    pipeline_run = create_pipeline_run(
+        schedule.pipeline_id, triggered_by="schedule", started_by=run_as, schedule_id=schedule.id
+    )
+    print(f"Executing scheduled pipeline {schedule.pipeline_id} (Schedule: {schedule.name}, run {pipeline_run.id})")
+    pipeline_run = await run_pipeline(pipeline_run, cwd=UPLOAD_DIR, user_id=run_as, priority=schedule.priority)
+    record_schedule_run(schedule.id, pipeline_run.started_at)
+    print(f"Scheduled pipeline run {pipeline_run.id} finished: {pipeline_run.status.value}")
+    return pipeline_run
+
+def record_schedule_run(schedule_id: int, run_at: datetime):
+    """Count a finished scheduled run and complete the schedule once max_runs is reached"""
+    with get_session() as session:
+        schedule = session.get(Schedule, schedule_id)
+        if not schedule:
+            return
+        
+        # Update schedule info
+        schedule.last_run = run_at
+        schedule.run_count += 1
+        
+        # Check if we've reached max runs
+        if schedule.max_runs and schedule.run_count >= schedule.max_runs:
+            schedule.status = ScheduleStatus.COMPLETED
+            try:
+                scheduler.remove_job(f"schedule_{schedule_id}")
+            except:
+                pass  # Job might already be gone (e.g. one-off run)
+            print(f"Schedule {schedule.name} completed after {schedule.run_count} runs")
+        else:
+            # Update next run time
+            job = scheduler.get_job(f"schedule_{schedule_id}")
+            if job:
+                schedule.next_run = local_next_run(job.next_run_time)
+        
+        session.commit()
 
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
@@ -303,20 +572,90 @@ async def login_page(request: Request):
     """Serve the login page"""
     return templates.TemplateResponse("login.html", {"request": request})
 
+def validate_timeout(timeout_seconds: Optional[float]):
+    """Reject timeouts outside 0 < timeout <= MAX_TIMEOUT_SECONDS"""
+    if timeout_seconds is None:
+        return
+    if not isinstance(timeout_seconds, (int, float)) or not 0 < timeout_seconds <= MAX_TIMEOUT_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"timeout_seconds must be between 0 and {MAX_TIMEOUT_SECONDS:g}"
+        )
+
+def validate_cache_ttl(cache_ttl_seconds: Optional[float]):
+    """Reject non-positive cache lifetimes; None uses SCRIPTPILOT_RESULT_CACHE_TTL_SECONDS (default 3600)"""
+    if cache_ttl_seconds is None:
+        return
+    if isinstance(cache_ttl_seconds, bool) or not isinstance(cache_ttl_seconds, (int, float)) or cache_ttl_seconds <= 0:
+        raise HTTPException(status_code=400, detail="cache_ttl_seconds must be positive")
+
+# Script flags that can be switched on or off through the content update endpoint
+SCRIPT_FLAG_FIELDS = ["cacheable", "single_flight", "retain_artifacts"]
+
+RESOURCE_LIMIT_FIELDS = list(ResourceLimits.__dataclass_fields__)
+
+def validate_resource_limit(name: str, value) -> Optional[int]:
+    """Check a script resource limit; None means the language/server limit applies"""
+    if value is None:
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"{name} must be an integer")
+    if value <= 0:
+        raise HTTPException(status_code=400, detail=f"{name} must be positive")
+    return value
+
+def validate_dependencies(value: Optional[str]) -> Optional[str]:
+    """Normalized requirements.txt style dependency list; None when nothing is declared"""
+    try:
+        requirements = parse_dependencies(value)
+    except InvalidDependencies as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return "\n".join(requirements) or None
+
 @app.post("/upload/")
 async def upload_script(
     file: UploadFile = File(...),
     description: str = Form(default=""),
+    timeout_seconds: float = Form(default=None),
+    cacheable: bool = Form(default=False),
+    cache_ttl_seconds: float = Form(default=None),
+    single_flight: bool = Form(default=False),
+    retain_artifacts: bool = Form(default=False),
+    dependencies: str = Form(default=None),
+    memory_limit_mb: int = Form(default=None),
+    cpu_limit_seconds: int = Form(default=None),
+    process_limit: int = Form(default=None),
+    file_size_limit_mb: int = Form(default=None),
+    output_limit_mb: int = Form(default=None),
     current_user: User = Depends(get_current_user_from_token)
 ):
     filename = file.filename
-    file_ext = os.path.splitext(filename)[1].lower()
-
-    # Extended list of supported file types
-    supported_extensions = [".py", ".ps1", ".sh", ".js", ".bat", ".cmd", ".rb", ".php", ".pl", ".r"]
+    validate_timeout(timeout_seconds)
+    validate_cache_ttl(cache_ttl_seconds)
+    limits = {
+        "memory_limit_mb": memory_limit_mb,
+        "cpu_limit_seconds": cpu_limit_seconds,
+        "process_limit": process_limit,
+        "file_size_limit_mb": file_size_limit_mb,
+        "output_limit_mb": output_limit_mb
+    }
+    for name, value in limits.items():
+        validate_resource_limit(name, value)
+    dependencies = validate_dependencies(dependencies)
+    runtime = runtime_registry.for_filename(filename)
     
-    if file_ext not in supported_extensions:
+    if runtime is None:
+        supported_extensions = runtime_registry.supported_extensions
         raise HTTPException(status_code=400, detail=f"Unsupported file type. Supported: {', '.join(supported_extensions)}")
+    if not runtime.available:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No {runtime.language} interpreter is installed on this server"
+        )
+    if dependencies and not supports_dependencies(runtime.language):
+        raise HTTPException(status_code=400, detail=f"Dependencies are not supported for {runtime.language} scripts")
 
     # Check if file already exists for this user
     with get_session() as session:
@@ -338,20 +677,7 @@ async def upload_script(
     with open(file_path, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
 
-    # Determine language with extended mapping
-    language_map = {
-        ".py": "Python",
-        ".ps1": "PowerShell", 
-        ".sh": "Bash",
-        ".js": "JavaScript",
-        ".bat": "Batch",
-        ".cmd": "Batch",
-        ".rb": "Ruby",
-        ".php": "PHP",
-        ".pl": "Perl",
-        ".r": "R"
-    }
-    language = language_map.get(file_ext, "Unknown")
+    language = runtime.language
 
     # Save metadata to DB with user ownership
     with get_session() as session:
@@ -359,7 +685,14 @@ async def upload_script(
             filename=filename, 
             language=language, 
             description=description,
-            owner_id=current_user.id
+            timeout_seconds=timeout_seconds,
+            cacheable=cacheable,
+            cache_ttl_seconds=cache_ttl_seconds,
+            single_flight=single_flight,
+            retain_artifacts=retain_artifacts,
+            dependencies=dependencies,
+            owner_id=current_user.id,
+            **limits
         )
         session.add(script)
         session.commit()
@@ -445,9 +778,84 @@ def search_scripts(
 @app.post("/scripts/{script_id}/execute/")
 async def execute_script(
     script_id: int, 
+    wait: bool = Query(default=True),
+    parameters: Optional[RunParameters] = Body(default=None),
     current_user: User = Depends(require_admin_or_editor)
 ):
-    """Execute a script by its database ID - requires admin or editor role"""
+    """Execute a script by its database ID - requires admin or editor role
+    
+    An optional JSON body {"args": [...], "env": {...}} passes command line
+    arguments and environment variables to the script. With wait=false the
+    run is started in the background and its ID is returned immediately for
+    use with /executions/{id}/stream.
+    """
+    script, command = _prepare_manual_run(script_id, current_user)
+    if parameters is not None:
+        try:
+            validate_parameters(parameters)
+        except InvalidParameters as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # Cacheable scripts reuse an earlier identical run instead of starting a process
+    result_key, cached = lookup_cached_result(script, command, UPLOAD_DIR, parameters)
+    if cached is not None:
+        return _execution_response(cached, script, cached=True)
+    
+    # Single-flight scripts attach duplicate requests to the identical run already in progress
+    flight_key = single_flight_key(script, parameters) if script.single_flight else None
+    running_id = find_in_flight(flight_key) if flight_key else None
+    
+    if running_id is None:
+        timeout = effective_timeout(script)
+        execution = create_execution_record(
+            script, triggered_by="manual", executed_by=current_user.id,
+            parameters=parameters, flight_key=flight_key
+        )
+    
+    if not wait:
+        if running_id is None:
+            # Return right away; progress can be followed on the stream endpoint
+            run_in_background(_run_manual_execution(
+                execution, command, current_user.id, timeout, result_key, script.cache_ttl_seconds, parameters
+            ))
+        execution_id = running_id if running_id is not None else execution.id
+        return JSONResponse(
+            status_code=202,
+            content={
+                "execution_id": execution_id,
+                "script_id": script_id,
+                "filename": script.filename,
+                "status": get_execution_record(execution_id).status if running_id else execution.status,
+                "stream_url": f"/executions/{execution_id}/stream",
+                "coalesced": running_id is not None
+            }
+        )
+    
+    if running_id is not None:
+        execution = await wait_for_execution(running_id)
+    else:
+        execution = await _run_manual_execution(
+            execution, command, current_user.id, timeout, result_key, script.cache_ttl_seconds, parameters
+        )
+    
+    if execution.status == ExecutionStatus.TIMED_OUT:
+        # Output produced before the timeout is kept on the execution record
+        raise HTTPException(
+            status_code=408,
+            detail=f"{execution.error_message}; partial output saved as execution {execution.id}"
+        )
+    if execution.status == ExecutionStatus.ERROR:
+        raise HTTPException(status_code=500, detail=execution.error_message)
+    if execution.status == ExecutionStatus.CANCELLED:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Execution {execution.id} was cancelled; output until then is saved on the record"
+        )
+    
+    return _execution_response(execution, script, coalesced=running_id is not None)
+
+def _prepare_manual_run(script_id: int, current_user: User):
+    """Load a script the user may run and resolve its command; raises HTTPException otherwise"""
     
     # Get script from database
     with get_session() as session:
@@ -464,179 +872,69 @@ async def execute_script(
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Script file not found on disk")
     
-    # Determine the command to run based on file extension
-    file_ext = os.path.splitext(script.filename)[1].lower()
-    
-    # Extended execution support for multiple script types
-    if file_ext == ".py":
-        command = ["python", script.filename]
-    elif file_ext == ".ps1":
-        command = ["powershell", "-ExecutionPolicy", "Bypass", "-File", script.filename]
-    elif file_ext == ".sh":
-        command = ["bash", script.filename]
-    elif file_ext == ".js":
-        command = ["node", script.filename]
-    elif file_ext in [".bat", ".cmd"]:
-        command = ["cmd", "/c", script.filename]
-    elif file_ext == ".rb":
-        command = ["ruby", script.filename]
-    elif file_ext == ".php":
-        command = ["php", script.filename]
-    elif file_ext == ".pl":
-        command = ["perl", script.filename]
-    elif file_ext == ".r":
-        command = ["Rscript", script.filename]
-    else:
-        raise HTTPException(status_code=400, detail=f"Unsupported script type: {file_ext}")
+    # Resolve the interpreter from the runtime registry (probed at startup)
+    try:
+        command = runtime_registry.command_for(script.filename)
+    except RuntimeNotAvailable as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
+    return script, command
+
+def _execution_response(execution: ExecutionHistory, script: Script, cached: bool = False, coalesced: bool = False) -> dict:
+    return {
+        "execution_id": execution.id,
+        "script_id": script.id,
+        "filename": script.filename,
+        "language": script.language,
+        "exit_code": execution.exit_code,
+        "execution_time_seconds": execution.execution_time_seconds,
+        "stdout": execution.stdout,
+        "stderr": execution.stderr,
+        "executed_at": execution.executed_at.isoformat(),
+        "success": execution.success,
+        "cached": cached,  # True when this is the stored result of an earlier identical run
+        "coalesced": coalesced  # True when this request attached to an identical run already in progress
+    }
+
+async def _run_manual_execution(
+    execution: ExecutionHistory,
+    command: List[str],
+    user_id: int,
+    timeout: float,
+    result_key: Optional[str] = None,
+    cache_ttl: Optional[float] = None,
+    parameters: Optional[RunParameters] = None
+) -> ExecutionHistory:
+    """Run a manually triggered execution and audit its outcome"""
+    execution = await run_execution(
+        execution, command, cwd=UPLOAD_DIR, user_id=user_id, timeout=timeout, parameters=parameters
+    )
+    remember_result(result_key, execution, cache_ttl)
     
-    try:
-        # Execute the script with timeout
-        start_time = datetime.utcnow()
-        
-        # Run the script with a timeout of 300 seconds (5 minutes)
-        # Use subprocess.run for Windows compatibility
-        result = subprocess.run(
-            command,
-            cwd=UPLOAD_DIR,  # Set working directory to scripts folder
-            capture_output=True,
-            text=True,
-            timeout=300.0  # 5 minute timeout
-        )
-        
-        end_time = datetime.utcnow()
-        execution_time = (end_time - start_time).total_seconds()
-        
-        # Create execution history record
-        execution_record = ExecutionHistory(
-            script_id=script_id,
-            filename=script.filename,
-            language=script.language,
-            exit_code=result.returncode,
-            execution_time_seconds=round(execution_time, 2),
-            stdout=result.stdout,
-            stderr=result.stderr,
-            executed_at=start_time,
-            success=result.returncode == 0,
-            triggered_by="manual",
-            executed_by_user_id=current_user.id
-        )
-        
-        # Save execution history to database
+    if execution.status == ExecutionStatus.COMPLETED:
         with get_session() as session:
-            session.add(execution_record)
-            
             # Create audit log entry for execution
             create_audit_log(
                 session=session,
-                user_id=current_user.id,
+                user_id=user_id,
                 action="execute",
                 resource_type="script", 
-                resource_id=script_id,
+                resource_id=execution.script_id,
                 details={
-                    "filename": script.filename,
-                    "success": result.returncode == 0,
-                    "execution_time": round(execution_time, 2),
-                    "exit_code": result.returncode
+                    "filename": execution.filename,
+                    "success": execution.success,
+                    "execution_time": execution.execution_time_seconds,
+                    "exit_code": execution.exit_code
                 }
             )
-            
-            session.commit()
-            session.refresh(execution_record)
-        
-        return {
-            "execution_id": execution_record.id,
-            "script_id": script_id,
-            "filename": script.filename,
-            "language": script.language,
-            "exit_code": result.returncode,
-            "execution_time_seconds": round(execution_time, 2),
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "executed_at": start_time.isoformat(),
-            "success": result.returncode == 0
-        }
-        
-    except subprocess.TimeoutExpired:
-        # Save timeout execution to history
-        execution_record = ExecutionHistory(
-            script_id=script_id,
-            filename=script.filename,
-            language=script.language,
-            exit_code=-1,  # Special code for timeout
-            execution_time_seconds=300.0,  # Max timeout
-            stdout="",
-            stderr="",
-            executed_at=start_time,
-            success=False,
-            error_message="Script execution timed out (5 minutes maximum)",
-            triggered_by="manual",
-            executed_by_user_id=current_user.id
-        )
-        
-        with get_session() as session:
-            session.add(execution_record)
             session.commit()
-        
-        raise HTTPException(
-            status_code=408, 
-            detail="Script execution timed out (5 minutes maximum)"
-        )
-    except FileNotFoundError:
-        # Save interpreter not found to history
-        execution_record = ExecutionHistory(
-            script_id=script_id,
-            filename=script.filename,
-            language=script.language,
-            exit_code=-2,  # Special code for missing interpreter
-            execution_time_seconds=0.0,
-            stdout="",
-            stderr="",
-            executed_at=start_time,
-            success=False,
-            error_message=f"Required interpreter not found for {script.language} scripts",
-            triggered_by="manual"
-        )
-        
-        with get_session() as session:
-            session.add(execution_record)
-            session.commit()
-        
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Required interpreter not found for {script.language} scripts"
-        )
-    except Exception as e:
-        import traceback
-        error_details = f"Execution failed: {str(e)}\nTraceback: {traceback.format_exc()}"
-        
-        # Save general execution error to history
-        execution_record = ExecutionHistory(
-            script_id=script_id,
-            filename=script.filename,
-            language=script.language,
-            exit_code=-3,  # Special code for general errors
-            execution_time_seconds=0.0,
-            stdout="",
-            stderr="",
-            executed_at=start_time,
-            success=False,
-            error_message=error_details,
-            triggered_by="manual"
-        )
-        
-        with get_session() as session:
-            session.add(execution_record)
-            session.commit()
-        
-        raise HTTPException(
-            status_code=500, 
-            detail=error_details
-        )
+    
+    return execution
 
 @app.post("/scripts/execute/{filename}")
 async def execute_script_by_filename(
     filename: str,
+    parameters: Optional[RunParameters] = Body(default=None),
     current_user: User = Depends(require_admin_or_editor)
 ):
     """Execute a script by its filename - requires admin or editor role"""
@@ -655,9 +953,9 @@ async def execute_script_by_filename(
             raise HTTPException(status_code=403, detail="Not authorized to execute this script")
     
     # Delegate to the main execution function
-    return await execute_script(script.id, current_user)
+    return await execute_script(script.id, wait=True, parameters=parameters, current_user=current_user)
 
-@app.get("/executions/", response_model=List[ExecutionHistory])
+@app.get("/executions/", response_model=List[ExecutionSummary])
 def list_execution_history(
     limit: int = Query(default=50, le=200),
     offset: int = Query(default=0, ge=0),
@@ -669,7 +967,7 @@ def list_execution_history(
     """Get execution history with optional filtering and pagination - RBAC filtered"""
     
     with get_session() as session:
-        query = select(ExecutionHistory).order_by(ExecutionHistory.executed_at.desc())
+        query = select(ExecutionHistory).options(*WITHOUT_OUTPUT).order_by(ExecutionHistory.executed_at.desc())
         
         # Apply RBAC filtering
         if current_user.role != UserRole.ADMIN:
@@ -707,119 +1005,905 @@ def get_execution_details(
         
         # Check RBAC - non-admins can only see their own script executions
         if current_user.role != UserRole.ADMIN:
-            script = session.get(Script, execution.script_id)
-            if script and script.owner_id != current_user.id:
-                raise HTTPException(status_code=403, detail="Not authorized to view this execution")
+            script = session.get(Script, execution.script_id)
+            if script and script.owner_id != current_user.id:
+                raise HTTPException(status_code=403, detail="Not authorized to view this execution")
+        
+        return execution
+
+@app.get("/executions/{execution_id}/stream")
+async def stream_execution_output(
+    execution_id: int,
+    current_user: User = Depends(get_current_user_from_token)
+):
+    """Stream stdout/stderr of an execution as Server-Sent Events while it runs.
+    
+    Emits "stdout" and "stderr" events with JSON-encoded text chunks and a final
+    "end" event with the execution's status and exit code.
+    """
+    
+    with get_session() as session:
+        execution = session.get(ExecutionHistory, execution_id)
+        if not execution:
+            raise HTTPException(status_code=404, detail="Execution not found")
+        
+        # Check RBAC - non-admins can only see their own script executions
+        if current_user.role != UserRole.ADMIN:
+            script = session.get(Script, execution.script_id)
+            if script and script.owner_id != current_user.id:
+                raise HTTPException(status_code=403, detail="Not authorized to view this execution")
+    
+    live = live_executions.get(execution_id)
+    
+    def sse(event: str, data) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    async def event_stream():
+        if live is not None:
+            queue = live.subscribe()
+            try:
+                while True:
+                    event = await queue.get()
+                    if event is None:
+                        break
+                    stream, text = event
+                    yield sse(stream, text)
+            finally:
+                live.unsubscribe(queue)
+            finished = get_execution_record(execution_id)
+        else:
+            # Already finished; replay the stored output
+            finished = execution
+            if finished.stdout:
+                yield sse("stdout", finished.stdout)
+            if finished.stderr:
+                yield sse("stderr", finished.stderr)
+        
+        yield sse("end", {
+            "execution_id": execution_id,
+            "status": finished.status,
+            "exit_code": finished.exit_code,
+            "success": finished.success,
+            "error_message": finished.error_message
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/executions/{execution_id}/output/{stream}")
+def get_execution_output(
+    execution_id: int,
+    stream: str = Path(..., pattern="^(stdout|stderr)$"),
+    current_user: User = Depends(get_current_user_from_token)
+):
+    """Download the full stdout or stderr log of an execution.
+    
+    Supports HTTP Range requests so large logs can be read piece by piece.
+    """
+    
+    with get_session() as session:
+        execution = session.get(ExecutionHistory, execution_id)
+        if not execution:
+            raise HTTPException(status_code=404, detail="Execution not found")
+        
+        # Check RBAC - non-admins can only see their own script executions
+        if current_user.role != UserRole.ADMIN:
+            script = session.get(Script, execution.script_id)
+            if script and script.owner_id != current_user.id:
+                raise HTTPException(status_code=403, detail="Not authorized to view this execution")
+    
+    path = log_path(execution_id, stream)
+    if os.path.exists(path):
+        return FileResponse(
+            path,
+            media_type="text/plain; charset=utf-8",
+            filename=f"execution_{execution_id}.{stream}.log",
+            content_disposition_type="inline"
+        )
+    
+    # Executions recorded before output spooling only have the inline copy
+    return PlainTextResponse(getattr(execution, stream) or "")
+
+def _check_execution_access(execution_id: int, current_user: User):
+    with get_session() as session:
+        execution = session.get(ExecutionHistory, execution_id)
+        if not execution:
+            raise HTTPException(status_code=404, detail="Execution not found")
+        
+        # Check RBAC - non-admins can only see their own script executions
+        if current_user.role != UserRole.ADMIN:
+            script = session.get(Script, execution.script_id)
+            if script and script.owner_id != current_user.id:
+                raise HTTPException(status_code=403, detail="Not authorized to view this execution")
+
+@app.delete("/executions/{execution_id}")
+def delete_execution(
+    execution_id: int,
+    current_user: User = Depends(require_admin_or_editor)
+):
+    """Delete a finished execution with its log files and artifacts - requires admin or editor role"""
+    _check_execution_access(execution_id, current_user)
+    if execution_id in live_executions:
+        raise HTTPException(status_code=409, detail="Execution is still running; cancel it first")
+    delete_executions([execution_id])
+    return {"message": f"Execution {execution_id} deleted successfully"}
+
+@app.get("/executions/{execution_id}/artifacts/")
+def get_execution_artifacts(
+    execution_id: int,
+    current_user: User = Depends(get_current_user_from_token)
+):
+    """List the files retained from an execution's working directory"""
+    _check_execution_access(execution_id, current_user)
+    return {"execution_id": execution_id, "artifacts": list_artifacts(execution_id)}
+
+@app.get("/executions/{execution_id}/artifacts/{artifact_path:path}")
+def download_execution_artifact(
+    execution_id: int,
+    artifact_path: str,
+    current_user: User = Depends(get_current_user_from_token)
+):
+    """Download a file an execution left in its working directory"""
+    _check_execution_access(execution_id, current_user)
+    path = resolve_artifact(execution_id, artifact_path)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return FileResponse(path, filename=os.path.basename(path))
+
+@app.get("/scripts/{script_id}/executions/", response_model=List[ExecutionSummary])
+def get_script_execution_history(
+    script_id: int,
+    limit: int = Query(default=20, le=100),
+    current_user: User = Depends(get_current_user_from_token)
+):
+    """Get execution history for a specific script with RBAC check"""
+    
+    with get_session() as session:
+        # Verify script exists
+        script = session.get(Script, script_id)
+        if not script:
+            raise HTTPException(status_code=404, detail="Script not found")
+        
+        # Check ownership if not admin
+        if current_user.role != UserRole.ADMIN and script.owner_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized to view this script's executions")
+        
+        # Get executions for this script
+        query = select(ExecutionHistory).options(*WITHOUT_OUTPUT).where(
+            ExecutionHistory.script_id == script_id
+        ).order_by(ExecutionHistory.executed_at.desc()).limit(limit)
+        
+        executions = session.exec(query).all()
+        return executions
+
+def summarize_resource_usage(executions: List[ExecutionHistory]) -> dict:
+    """Aggregate CPU, memory and I/O usage over executions that recorded it"""
+    measured = [e for e in executions if e.cpu_user_seconds is not None]
+    total_cpu = sum(e.cpu_user_seconds + e.cpu_system_seconds for e in measured)
+
+    cpu_by_script = {}
+    peak_by_script = {}
+    for execution in measured:
+        cpu_by_script[execution.filename] = (
+            cpu_by_script.get(execution.filename, 0.0)
+            + execution.cpu_user_seconds + execution.cpu_system_seconds
+        )
+        peak_by_script[execution.filename] = max(peak_by_script.get(execution.filename, 0), execution.peak_rss_kb or 0)
+
+    top_cpu = sorted(cpu_by_script.items(), key=lambda x: x[1], reverse=True)[:5]
+    top_memory = sorted(peak_by_script.items(), key=lambda x: x[1], reverse=True)[:5]
+
+    return {
+        "measured_executions": len(measured),
+        "total_cpu_user_seconds": round(sum(e.cpu_user_seconds for e in measured), 3),
+        "total_cpu_system_seconds": round(sum(e.cpu_system_seconds for e in measured), 3),
+        "average_cpu_seconds": round(total_cpu / len(measured), 3) if measured else 0.0,
+        "max_peak_rss_kb": max((e.peak_rss_kb or 0 for e in measured), default=0),
+        "total_io_read_blocks": sum(e.io_read_blocks or 0 for e in measured),
+        "total_io_write_blocks": sum(e.io_write_blocks or 0 for e in measured),
+        "top_cpu_scripts": [{"filename": filename, "cpu_seconds": round(cpu, 3)} for filename, cpu in top_cpu],
+        "top_memory_scripts": [{"filename": filename, "peak_rss_kb": peak} for filename, peak in top_memory]
+    }
+
+@app.get("/executions/stats/")
+def get_execution_statistics(current_user: User = Depends(get_current_user_from_token)):
+    """Get overall execution statistics with RBAC filtering"""
+    
+    with get_session() as session:
+        # Apply RBAC filtering for executions
+        if current_user.role == UserRole.ADMIN:
+            # Admins can see all executions
+            total_executions = session.exec(
+                select(ExecutionHistory).options(*WITHOUT_OUTPUT).where(ExecutionHistory.id.isnot(None))
+            ).all()
+        else:
+            # Non-admins can only see executions from their own scripts
+            user_scripts = session.exec(
+                select(Script.id).where(Script.owner_id == current_user.id)
+            ).all()
+            total_executions = session.exec(
+                select(ExecutionHistory).options(*WITHOUT_OUTPUT).where(ExecutionHistory.script_id.in_(user_scripts))
+            ).all()
+        
+        total_count = len(total_executions)
+        successful_count = len([e for e in total_executions if e.success])
+        failed_count = total_count - successful_count
+        
+        # Average execution time
+        avg_execution_time = 0.0
+        if total_executions:
+            avg_execution_time = sum(e.execution_time_seconds for e in total_executions) / total_count
+        
+        # Most executed scripts
+        script_execution_counts = {}
+        for execution in total_executions:
+            script_execution_counts[execution.filename] = script_execution_counts.get(execution.filename, 0) + 1
+        
+        most_executed = sorted(script_execution_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+        
+        return {
+            "total_executions": total_count,
+            "successful_executions": successful_count,
+            "failed_executions": failed_count,
+            "success_rate": round((successful_count / total_count * 100) if total_count > 0 else 0, 2),
+            "average_execution_time_seconds": round(avg_execution_time, 2),
+            "most_executed_scripts": [{"filename": filename, "count": count} for filename, count in most_executed],
+            "resource_usage": summarize_resource_usage(total_executions)
+        }
+
+@app.get("/executions/cache/")
+def get_result_cache_statistics(current_user: User = Depends(get_current_user_from_token)):
+    """Get hit/miss statistics of the result cache for cacheable scripts"""
+    return result_cache.stats()
+
+@app.delete("/executions/cache/")
+def clear_result_cache(current_user: User = Depends(require_admin)):
+    """Drop all cached results - admin only"""
+    result_cache.clear()
+    return {"message": "Result cache cleared"}
+
+@app.get("/executions/pool/")
+def get_execution_pool_status(current_user: User = Depends(get_current_user_from_token)):
+    """Get current execution pool usage and limits"""
+    stats = execution_pool.stats()
+    stats["queued_by_priority"] = {
+        priority.value: stats["queued_by_priority"].get(priority.rank, 0) for priority in ExecutionPriority
+    }
+    return stats
+
+@app.get("/executions/running/")
+def list_running_executions(current_user: User = Depends(get_current_user_from_token)):
+    """List queued and running executions with their PID and start time - users see their own"""
+    running = running_executions()
+    if current_user.role != UserRole.ADMIN:
+        running = [entry for entry in running if entry["executed_by"] == current_user.id]
+    return running
+
+@app.post("/executions/{execution_id}/cancel")
+async def cancel_running_execution(
+    execution_id: int,
+    current_user: User = Depends(require_admin_or_editor)
+):
+    """Stop a queued or running execution and its process tree - requires admin or editor role"""
+    execution = get_execution_record(execution_id)
+    if not execution:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    
+    # Editors may cancel their own runs and runs of scripts they own
+    if current_user.role != UserRole.ADMIN and execution.executed_by != current_user.id:
+        with get_session() as session:
+            script = session.get(Script, execution.script_id)
+            if not script or script.owner_id != current_user.id:
+                raise HTTPException(status_code=403, detail="Not authorized to cancel this execution")
+    
+    if not await cancel_execution(execution_id):
+        if execution.status in (ExecutionStatus.QUEUED, ExecutionStatus.RUNNING) and execution.server_id != SERVER_ID:
+            # Runs are only tracked by the process that started them
+            raise HTTPException(
+                status_code=409,
+                detail=f"Execution is running in another server process ({execution.server_id})"
+            )
+        raise HTTPException(
+            status_code=409,
+            detail=f"Execution is not running (status: {execution.status.value})"
+        )
+    
+    with get_session() as session:
+        create_audit_log(
+            session=session,
+            user_id=current_user.id,
+            action="cancel",
+            resource_type="execution",
+            resource_id=execution_id,
+            details={"filename": execution.filename}
+        )
+        session.commit()
+    
+    execution = get_execution_record(execution_id)
+    return {
+        "execution_id": execution_id,
+        "status": execution.status,
+        "exit_code": execution.exit_code,
+        "message": f"Execution {execution_id} cancelled"
+    }
+
+@app.get("/runtimes/")
+def list_runtimes(current_user: User = Depends(get_current_user_from_token)):
+    """List supported script types and the interpreters found on this server"""
+    return runtime_registry.to_dict()
+
+@app.post("/runtimes/refresh/")
+async def refresh_runtimes(current_user: User = Depends(require_admin)):
+    """Re-detect interpreters, e.g. after installing one - admin only"""
+    await runtime_registry.probe()
+    return runtime_registry.to_dict()
+
+@app.get("/environments/")
+def list_dependency_environments(current_user: User = Depends(require_admin)):
+    """List cached dependency environments, most recently used first - admin only"""
+    return environment_cache.stats()
+
+@app.delete("/environments/{environment_key}")
+def delete_dependency_environment(environment_key: str, current_user: User = Depends(require_admin)):
+    """Remove a cached dependency environment; the next run that needs it rebuilds it - admin only"""
+    if not any(environment["key"] == environment_key for environment in environment_cache.environments()):
+        raise HTTPException(status_code=404, detail="Environment not found")
+    if not environment_cache.remove(environment_key):
+        raise HTTPException(status_code=409, detail="Environment is in use by a running execution")
+    return {"message": "Environment removed", "key": environment_key}
+
+# ===== BATCH EXECUTION ENDPOINTS =====
+
+@app.post("/batches/", status_code=202)
+async def create_batch(
+    script_ids: List[int] = Body(..., embed=True),
+    current_user: User = Depends(require_admin_or_editor)
+):
+    """Start several scripts with one request - requires admin or editor role
+    
+    All scripts are queued at once and run in parallel as far as the execution
+    pool allows. Returns immediately with the batch ID; results can be polled
+    on /batches/{id} or followed on /batches/{id}/stream.
+    """
+    if not script_ids:
+        raise HTTPException(status_code=400, detail="script_ids must not be empty")
+    if len(script_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {MAX_BATCH_SIZE} scripts")
+    
+    # Validate everything up front so a batch starts either completely or not at all
+    runs = [_prepare_manual_run(script_id, current_user) for script_id in script_ids]
+    
+    with get_session() as session:
+        batch = ExecutionBatch(total=len(runs), created_by=current_user.id)
+        session.add(batch)
+        session.commit()
+        session.refresh(batch)
+        
+        create_audit_log(
+            session=session,
+            user_id=current_user.id,
+            action="execute",
+            resource_type="batch",
+            resource_id=batch.id,
+            details={"script_ids": script_ids}
+        )
+        session.commit()
+        session.refresh(batch)
+    
+    executions = []
+    for script, command in runs:
+        execution = create_execution_record(
+            script, triggered_by="batch", executed_by=current_user.id, batch_id=batch.id
+        )
+        # Batch runs always execute, but successful ones still refresh the result cache
+        result_key = result_key_for(script, command, UPLOAD_DIR)
+        run_in_background(_run_manual_execution(
+            execution, command, current_user.id, effective_timeout(script),
+            result_key, script.cache_ttl_seconds
+        ))
+        executions.append({
+            "execution_id": execution.id,
+            "script_id": script.id,
+            "filename": script.filename,
+            "stream_url": f"/executions/{execution.id}/stream"
+        })
+    
+    return {
+        "batch_id": batch.id,
+        "total": batch.total,
+        "status_url": f"/batches/{batch.id}",
+        "stream_url": f"/batches/{batch.id}/stream",
+        "executions": executions
+    }
+
+@app.post("/scripts/{script_id}/matrix/", status_code=202)
+async def create_matrix_run(
+    script_id: int,
+    request: MatrixRunRequest,
+    current_user: User = Depends(require_admin_or_editor)
+):
+    """Run a script once per combination of parameter values - requires admin or editor role
+    
+    {"matrix": {"REGION": ["us", "eu"], "TIER": ["free", "paid"]}} starts four
+    runs, each with REGION and TIER set in its environment; {REGION} in args
+    is replaced with the run's value. Runs are grouped under one batch and
+    execute in parallel as far as the execution pool allows.
+    """
+    script, command = _prepare_manual_run(script_id, current_user)
+    try:
+        runs = expand_matrix(request, MAX_BATCH_SIZE)
+    except InvalidParameters as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    with get_session() as session:
+        batch = ExecutionBatch(kind="matrix", total=len(runs), created_by=current_user.id)
+        session.add(batch)
+        session.commit()
+        session.refresh(batch)
+        
+        create_audit_log(
+            session=session,
+            user_id=current_user.id,
+            action="execute",
+            resource_type="batch",
+            resource_id=batch.id,
+            details={"script_id": script_id, "matrix": request.matrix}
+        )
+        session.commit()
+        session.refresh(batch)
+    
+    timeout = effective_timeout(script)
+    executions = []
+    for parameters in runs:
+        execution = create_execution_record(
+            script, triggered_by="batch", executed_by=current_user.id, batch_id=batch.id, parameters=parameters
+        )
+        result_key = result_key_for(script, command, UPLOAD_DIR, parameters)
+        run_in_background(_run_manual_execution(
+            execution, command, current_user.id, timeout, result_key, script.cache_ttl_seconds, parameters
+        ))
+        executions.append({
+            "execution_id": execution.id,
+            "parameters": parameters.model_dump(),
+            "stream_url": f"/executions/{execution.id}/stream"
+        })
+    
+    return {
+        "batch_id": batch.id,
+        "total": batch.total,
+        "status_url": f"/batches/{batch.id}",
+        "stream_url": f"/batches/{batch.id}/stream",
+        "executions": executions
+    }
+
+def _get_batch_for_user(batch_id: int, current_user: User) -> ExecutionBatch:
+    with get_session() as session:
+        batch = session.get(ExecutionBatch, batch_id)
+        if not batch:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        if current_user.role != UserRole.ADMIN and batch.created_by != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized to view this batch")
+        return batch
+
+def _batch_executions(batch_id: int) -> List[ExecutionHistory]:
+    with get_session() as session:
+        return session.exec(
+            select(ExecutionHistory).options(*WITHOUT_OUTPUT).where(
+                ExecutionHistory.batch_id == batch_id
+            ).order_by(ExecutionHistory.id)
+        ).all()
+
+def _execution_result_summary(execution: ExecutionHistory) -> dict:
+    return {
+        "execution_id": execution.id,
+        "script_id": execution.script_id,
+        "filename": execution.filename,
+        "status": execution.status,
+        "exit_code": execution.exit_code,
+        "success": execution.success,
+        "execution_time_seconds": execution.execution_time_seconds,
+        "error_message": execution.error_message,
+        "parameters": json.loads(execution.parameters) if execution.parameters else None
+    }
+
+@app.get("/batches/{batch_id}")
+def get_batch(batch_id: int, current_user: User = Depends(get_current_user_from_token)):
+    """Get progress and per-script results of a batch"""
+    batch = _get_batch_for_user(batch_id, current_user)
+    executions = _batch_executions(batch_id)
+    
+    counts = {status.value: 0 for status in ExecutionStatus}
+    for execution in executions:
+        counts[execution.status.value] += 1
+    pending = counts[ExecutionStatus.QUEUED.value] + counts[ExecutionStatus.RUNNING.value]
+    
+    return {
+        "batch_id": batch.id,
+        "kind": batch.kind,
+        "created_at": batch.created_at.isoformat(),
+        "total": batch.total,
+        "finished": batch.total - pending,
+        "done": pending == 0,
+        "succeeded": len([e for e in executions if e.success]),
+        "status_counts": counts,
+        "executions": [_execution_result_summary(e) for e in executions]
+    }
+
+@app.get("/batches/{batch_id}/stream")
+async def stream_batch_results(batch_id: int, current_user: User = Depends(get_current_user_from_token)):
+    """Stream per-script results of a batch as Server-Sent Events.
+    
+    Emits a "result" event as each execution finishes (immediately for those
+    already done) and a final "end" event once the whole batch is done. Output
+    of individual executions is available on /executions/{id}/stream.
+    """
+    _get_batch_for_user(batch_id, current_user)
+    executions = _batch_executions(batch_id)
+    
+    def sse(event: str, data) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    async def wait_until_finished(execution_id: int, finished: asyncio.Queue):
+        await finished.put(await wait_for_execution(execution_id))
+    
+    async def event_stream():
+        finished = asyncio.Queue()
+        waiters = [
+            asyncio.create_task(wait_until_finished(execution.id, finished))
+            for execution in executions
+        ]
+        try:
+            succeeded = 0
+            for _ in waiters:
+                execution = await finished.get()
+                succeeded += execution.success
+                yield sse("result", _execution_result_summary(execution))
+            yield sse("end", {"batch_id": batch_id, "total": len(waiters), "succeeded": succeeded})
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# ===== PIPELINE ENDPOINTS =====
+
+def _get_pipeline_for_user(pipeline_id: int, current_user: User) -> Pipeline:
+    with get_session() as session:
+        pipeline = session.get(Pipeline, pipeline_id)
+        if not pipeline:
+            raise HTTPException(status_code=404, detail="Pipeline not found")
+        if current_user.role != UserRole.ADMIN and pipeline.created_by != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized to access this pipeline")
+        return pipeline
+
+def _pipeline_steps(pipeline_id: int) -> List[PipelineStep]:
+    with get_session() as session:
+        return session.exec(
+            select(PipelineStep).where(PipelineStep.pipeline_id == pipeline_id).order_by(PipelineStep.id)
+        ).all()
+
+def _pipeline_response(pipeline: Pipeline, steps: List[PipelineStep]) -> dict:
+    return {
+        "id": pipeline.id,
+        "name": pipeline.name,
+        "description": pipeline.description,
+        "created_by": pipeline.created_by,
+        "created_at": pipeline.created_at.isoformat(),
+        "steps": [
+            {
+                "name": step.name,
+                "script_id": step.script_id,
+                "depends_on": step_dependencies(step)
+            }
+            for step in steps
+        ]
+    }
+
+@app.post("/pipelines/")
+def create_pipeline(
+    pipeline_data: PipelineCreate,
+    current_user: User = Depends(require_admin_or_editor)
+):
+    """Create a pipeline (a DAG of scripts) - requires admin or editor role"""
+    try:
+        validate_steps(pipeline_data.steps)
+    except PipelineError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    with get_session() as session:
+        for step in pipeline_data.steps:
+            script = session.get(Script, step.script_id)
+            if not script:
+                raise HTTPException(status_code=404, detail=f"Script {step.script_id} not found (step {step.name})")
+            if current_user.role != UserRole.ADMIN and script.owner_id != current_user.id:
+                raise HTTPException(status_code=403, detail=f"Not authorized to use script {step.script_id}")
+        
+        pipeline = Pipeline(
+            name=pipeline_data.name,
+            description=pipeline_data.description,
+            created_by=current_user.id
+        )
+        session.add(pipeline)
+        session.commit()
+        session.refresh(pipeline)
+        
+        for step in pipeline_data.steps:
+            session.add(PipelineStep(
+                pipeline_id=pipeline.id,
+                name=step.name,
+                script_id=step.script_id,
+                depends_on=json.dumps(step.depends_on)
+            ))
+        
+        create_audit_log(
+            session=session,
+            user_id=current_user.id,
+            action="create",
+            resource_type="pipeline",
+            resource_id=pipeline.id,
+            details={"name": pipeline.name, "steps": len(pipeline_data.steps)}
+        )
+        session.commit()
+        session.refresh(pipeline)
+    
+    return _pipeline_response(pipeline, _pipeline_steps(pipeline.id))
+
+@app.get("/pipelines/")
+def list_pipelines(current_user: User = Depends(get_current_user_from_token)):
+    """List pipelines - users see their own, admins see all"""
+    with get_session() as session:
+        query = select(Pipeline).order_by(Pipeline.id)
+        if current_user.role != UserRole.ADMIN:
+            query = query.where(Pipeline.created_by == current_user.id)
+        pipelines = session.exec(query).all()
+    return [_pipeline_response(pipeline, _pipeline_steps(pipeline.id)) for pipeline in pipelines]
+
+@app.get("/pipelines/{pipeline_id}")
+def get_pipeline(pipeline_id: int, current_user: User = Depends(get_current_user_from_token)):
+    """Get a pipeline with its steps and most recent runs"""
+    pipeline = _get_pipeline_for_user(pipeline_id, current_user)
+    with get_session() as session:
+        runs = session.exec(
+            select(PipelineRun).where(PipelineRun.pipeline_id == pipeline_id)
+            .order_by(PipelineRun.id.desc()).limit(20)
+        ).all()
+    response = _pipeline_response(pipeline, _pipeline_steps(pipeline_id))
+    response["recent_runs"] = [_pipeline_run_summary(run) for run in runs]
+    return response
+
+@app.delete("/pipelines/{pipeline_id}")
+def delete_pipeline(pipeline_id: int, current_user: User = Depends(require_admin_or_editor)):
+    """Delete a pipeline - requires admin or editor role"""
+    _get_pipeline_for_user(pipeline_id, current_user)
+    with get_session() as session:
+        scheduled = session.exec(select(Schedule).where(Schedule.pipeline_id == pipeline_id)).first()
+        if scheduled:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Pipeline is used by schedule {scheduled.id}; delete the schedule first"
+            )
+        if session.exec(
+            select(PipelineRun.id).where(
+                PipelineRun.pipeline_id == pipeline_id, PipelineRun.status == PipelineRunStatus.RUNNING
+            )
+        ).first() is not None:
+            raise HTTPException(status_code=409, detail="The pipeline is running; wait for its run to finish")
+        
+        # Run history goes with the pipeline, including the runs' step executions
+        run_ids = session.exec(select(PipelineRun.id).where(PipelineRun.pipeline_id == pipeline_id)).all()
+        if run_ids:
+            delete_executions(session.exec(
+                select(ExecutionHistory.id).where(ExecutionHistory.pipeline_run_id.in_(run_ids))
+            ).all())
+            session.execute(delete(PipelineRun).where(PipelineRun.id.in_(run_ids)))
+        for step in session.exec(select(PipelineStep).where(PipelineStep.pipeline_id == pipeline_id)).all():
+            session.delete(step)
+        session.delete(session.get(Pipeline, pipeline_id))
         
-        return execution
+        create_audit_log(
+            session=session,
+            user_id=current_user.id,
+            action="delete",
+            resource_type="pipeline",
+            resource_id=pipeline_id
+        )
+        session.commit()
+    
+    return {"message": f"Pipeline {pipeline_id} deleted successfully"}
 
-@app.get("/scripts/{script_id}/executions/", response_model=List[ExecutionHistory])
-def get_script_execution_history(
-    script_id: int,
-    limit: int = Query(default=20, le=100),
-    current_user: User = Depends(get_current_user_from_token)
-):
-    """Get execution history for a specific script with RBAC check"""
+@app.post("/pipelines/{pipeline_id}/run", status_code=202)
+async def run_pipeline_now(pipeline_id: int, current_user: User = Depends(require_admin_or_editor)):
+    """Start a pipeline run - requires admin or editor role
+    
+    Returns immediately; progress is available on /pipelines/runs/{run_id}.
+    """
+    _get_pipeline_for_user(pipeline_id, current_user)
+    pipeline_run = create_pipeline_run(pipeline_id, triggered_by="manual", started_by=current_user.id)
     
     with get_session() as session:
-        # Verify script exists
-        script = session.get(Script, script_id)
-        if not script:
-            raise HTTPException(status_code=404, detail="Script not found")
-        
-        # Check ownership if not admin
-        if current_user.role != UserRole.ADMIN and script.owner_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized to view this script's executions")
-        
-        # Get executions for this script
-        query = select(ExecutionHistory).where(
-            ExecutionHistory.script_id == script_id
-        ).order_by(ExecutionHistory.executed_at.desc()).limit(limit)
-        
-        executions = session.exec(query).all()
-        return executions
+        create_audit_log(
+            session=session,
+            user_id=current_user.id,
+            action="execute",
+            resource_type="pipeline",
+            resource_id=pipeline_id,
+            details={"pipeline_run_id": pipeline_run.id}
+        )
+        session.commit()
+    
+    run_in_background(run_pipeline(
+        pipeline_run, cwd=UPLOAD_DIR, user_id=current_user.id, priority=ExecutionPriority.INTERACTIVE
+    ))
+    return {
+        "pipeline_run_id": pipeline_run.id,
+        "status": pipeline_run.status,
+        "status_url": f"/pipelines/runs/{pipeline_run.id}"
+    }
 
-@app.get("/executions/stats/")
-def get_execution_statistics(current_user: User = Depends(get_current_user_from_token)):
-    """Get overall execution statistics with RBAC filtering"""
+def _pipeline_run_summary(pipeline_run: PipelineRun) -> dict:
+    return {
+        "pipeline_run_id": pipeline_run.id,
+        "pipeline_id": pipeline_run.pipeline_id,
+        "status": pipeline_run.status,
+        "triggered_by": pipeline_run.triggered_by,
+        "schedule_id": pipeline_run.schedule_id,
+        "started_at": pipeline_run.started_at.isoformat(),
+        "finished_at": pipeline_run.finished_at.isoformat() if pipeline_run.finished_at else None
+    }
+
+@app.get("/pipelines/runs/{run_id}")
+def get_pipeline_run(run_id: int, current_user: User = Depends(get_current_user_from_token)):
+    """Get the status of a pipeline run and the execution of each of its steps"""
+    with get_session() as session:
+        pipeline_run = session.get(PipelineRun, run_id)
+        if not pipeline_run:
+            raise HTTPException(status_code=404, detail="Pipeline run not found")
+    _get_pipeline_for_user(pipeline_run.pipeline_id, current_user)
     
     with get_session() as session:
-        # Apply RBAC filtering for executions
-        if current_user.role == UserRole.ADMIN:
-            # Admins can see all executions
-            total_executions = session.exec(
-                select(ExecutionHistory).where(ExecutionHistory.id.isnot(None))
-            ).all()
-        else:
-            # Non-admins can only see executions from their own scripts
-            user_scripts = session.exec(
-                select(Script.id).where(Script.owner_id == current_user.id)
-            ).all()
-            total_executions = session.exec(
-                select(ExecutionHistory).where(ExecutionHistory.script_id.in_(user_scripts))
-            ).all()
-        
-        total_count = len(total_executions)
-        successful_count = len([e for e in total_executions if e.success])
-        failed_count = total_count - successful_count
-        
-        # Average execution time
-        avg_execution_time = 0.0
-        if total_executions:
-            avg_execution_time = sum(e.execution_time_seconds for e in total_executions) / total_count
-        
-        # Most executed scripts
-        script_execution_counts = {}
-        for execution in total_executions:
-            script_execution_counts[execution.filename] = script_execution_counts.get(execution.filename, 0) + 1
-        
-        most_executed = sorted(script_execution_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-        
-        return {
-            "total_executions": total_count,
-            "successful_executions": successful_count,
-            "failed_executions": failed_count,
-            "success_rate": round((successful_count / total_count * 100) if total_count > 0 else 0, 2),
-            "average_execution_time_seconds": round(avg_execution_time, 2),
-            "most_executed_scripts": [{"filename": filename, "count": count} for filename, count in most_executed]
-        }
+        executions = session.exec(
+            select(ExecutionHistory).options(*WITHOUT_OUTPUT).where(
+                ExecutionHistory.pipeline_run_id == run_id
+            ).order_by(ExecutionHistory.id)
+        ).all()
+    by_step = {execution.pipeline_step: execution for execution in executions}
+    
+    steps = []
+    for step in _pipeline_steps(pipeline_run.pipeline_id):
+        execution = by_step.get(step.name)
+        steps.append({
+            "name": step.name,
+            "depends_on": step_dependencies(step),
+            # Steps without a row are still waiting on upstream steps
+            "status": execution.status if execution else "pending",
+            "execution": _execution_result_summary(execution) if execution else None
+        })
+    
+    response = _pipeline_run_summary(pipeline_run)
+    response["steps"] = steps
+    return response
 
 # ===== SCHEDULE MANAGEMENT ENDPOINTS =====
 
+def validate_jitter(jitter_seconds: Optional[int]):
+    if jitter_seconds is not None and not 0 <= jitter_seconds <= MAX_JITTER_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"jitter_seconds must be between 0 and {MAX_JITTER_SECONDS}"
+        )
+
+def validate_run_policy(max_instances: Optional[int], misfire_grace_seconds: Optional[int]):
+    if max_instances is not None and max_instances < 1:
+        raise HTTPException(status_code=400, detail="max_instances must be at least 1")
+    if misfire_grace_seconds is not None and misfire_grace_seconds < 0:
+        raise HTTPException(status_code=400, detail="misfire_grace_seconds must not be negative")
+
+def check_schedule_access(session: Session, schedule: Schedule, current_user: User, action: str):
+    """Non-admins may only use schedules of their own scripts and pipelines"""
+    if current_user.role == UserRole.ADMIN:
+        return
+    if schedule.pipeline_id is not None:
+        pipeline = session.get(Pipeline, schedule.pipeline_id)
+        owner_id = pipeline.created_by if pipeline else None
+    else:
+        script = session.get(Script, schedule.script_id)
+        owner_id = script.owner_id if script else None
+    if owner_id is not None and owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail=f"Not authorized to {action} this schedule")
+
+def owned_schedules(current_user: User):
+    """Filter for the schedules of the user's own scripts and pipelines"""
+    return or_(
+        Schedule.script_id.in_(select(Script.id).where(Script.owner_id == current_user.id)),
+        Schedule.pipeline_id.in_(select(Pipeline.id).where(Pipeline.created_by == current_user.id))
+    )
+
 @app.post("/schedules/", response_model=Schedule)
 def create_schedule(
-    script_id: int = Form(...),
     name: str = Form(...),
     schedule_type: ScheduleType = Form(...),
     start_time: datetime = Form(...),
+    script_id: int = Form(default=None),
+    pipeline_id: int = Form(default=None),
     end_time: datetime = Form(default=None),
     cron_expression: str = Form(default=None),
     max_runs: int = Form(default=None),
+    timeout_seconds: float = Form(default=None),
+    parameters: str = Form(default=None),
+    priority: ExecutionPriority = Form(default=ExecutionPriority.SCHEDULED),
+    single_flight: bool = Form(default=False),
+    jitter_seconds: int = Form(default=None),
+    spread: bool = Form(default=False),
+    overlap_policy: OverlapPolicy = Form(default=OverlapPolicy.SKIP),
+    max_instances: int = Form(default=None),
+    misfire_policy: MisfirePolicy = Form(default=MisfirePolicy.COALESCE),
+    misfire_grace_seconds: int = Form(default=300),
     current_user: User = Depends(require_admin_or_editor)
 ):
-    """Create a new schedule for a script - requires admin or editor role"""
+    """Create a new schedule for a script or a pipeline - requires admin or editor role
+    
+    parameters is an optional JSON object {"args": [...], "env": {...}}
+    passed to every scheduled run of a script. jitter_seconds and spread
+    move recurring runs off the exact trigger time. overlap_policy and
+    max_instances decide what happens when a run is still going at the next
+    fire; misfire_policy and misfire_grace_seconds what happens to fire
+    times missed while the scheduler was down.
+    """
+    validate_timeout(timeout_seconds)
+    validate_jitter(jitter_seconds)
+    validate_run_policy(max_instances, misfire_grace_seconds)
+    try:
+        run_parameters = parse_parameters_form(parameters)
+    except InvalidParameters as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if run_parameters is not None and pipeline_id is not None:
+        raise HTTPException(status_code=400, detail="Parameters are not supported for pipeline schedules")
+    if (script_id is None) == (pipeline_id is None):
+        raise HTTPException(status_code=400, detail="Provide either script_id or pipeline_id")
+    
+    if pipeline_id is not None:
+        _get_pipeline_for_user(pipeline_id, current_user)
     
-    # Verify script exists and check ownership
     with get_session() as session:
-        script = session.get(Script, script_id)
-        if not script:
-            raise HTTPException(status_code=404, detail="Script not found")
-        
-        # Check ownership if not admin
-        if current_user.role != UserRole.ADMIN and script.owner_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized to schedule this script")
+        if script_id is not None:
+            # Verify script exists and check ownership
+            script = session.get(Script, script_id)
+            if not script:
+                raise HTTPException(status_code=404, detail="Script not found")
+            
+            # Check ownership if not admin
+            if current_user.role != UserRole.ADMIN and script.owner_id != current_user.id:
+                raise HTTPException(status_code=403, detail="Not authorized to schedule this script")
         
         # Create schedule
         schedule = Schedule(
             script_id=script_id,
+            pipeline_id=pipeline_id,
             name=name,
             schedule_type=schedule_type,
             start_time=start_time,
             end_time=end_time,
             cron_expression=cron_expression,
             max_runs=max_runs,
+            timeout_seconds=timeout_seconds,
+            parameters=dump_parameters(run_parameters),
+            priority=priority,
+            single_flight=single_flight,
+            jitter_seconds=jitter_seconds,
+            spread=spread,
+            overlap_policy=overlap_policy,
+            max_instances=max_instances,
+            misfire_policy=misfire_policy,
+            misfire_grace_seconds=misfire_grace_seconds,
             status=ScheduleStatus.ACTIVE,
-            created_by_user_id=current_user.id
+            created_by=current_user.id
         )
         
         session.add(schedule)
@@ -836,6 +1920,7 @@ def create_schedule(
             details={
                 "name": name,
                 "script_id": script_id,
+                "pipeline_id": pipeline_id,
                 "schedule_type": schedule_type,
                 "start_time": start_time.isoformat()
             }
@@ -861,11 +1946,8 @@ def list_schedules(
         
         # Apply RBAC filtering
         if current_user.role != UserRole.ADMIN:
-            # Non-admins can only see schedules for their own scripts
-            user_scripts = session.exec(
-                select(Script.id).where(Script.owner_id == current_user.id)
-            ).all()
-            query = query.where(Schedule.script_id.in_(user_scripts))
+            # Non-admins can only see schedules for their own scripts and pipelines
+            query = query.where(owned_schedules(current_user))
         
         if status:
             query = query.where(Schedule.status == status)
@@ -888,11 +1970,7 @@ def get_schedule(
         if not schedule:
             raise HTTPException(status_code=404, detail="Schedule not found")
         
-        # Check RBAC - non-admins can only see schedules for their own scripts
-        if current_user.role != UserRole.ADMIN:
-            script = session.get(Script, schedule.script_id)
-            if script and script.owner_id != current_user.id:
-                raise HTTPException(status_code=403, detail="Not authorized to view this schedule")
+        check_schedule_access(session, schedule, current_user, "view")
         
         return schedule
 
@@ -909,11 +1987,7 @@ def update_schedule_status(
         if not schedule:
             raise HTTPException(status_code=404, detail="Schedule not found")
         
-        # Check ownership if not admin
-        if current_user.role != UserRole.ADMIN:
-            script = session.get(Script, schedule.script_id)
-            if script and script.owner_id != current_user.id:
-                raise HTTPException(status_code=403, detail="Not authorized to modify this schedule")
+        check_schedule_access(session, schedule, current_user, "modify")
         
         old_status = schedule.status
         schedule.status = status
@@ -934,6 +2008,132 @@ def update_schedule_status(
         
         return {"message": f"Schedule status updated to {status}", "schedule_id": schedule_id}
 
+@app.put("/schedules/{schedule_id}/priority/")
+def update_schedule_priority(
+    schedule_id: int,
+    priority: ExecutionPriority = Form(...),
+    current_user: User = Depends(require_admin_or_editor)
+):
+    """Change the queue priority of a schedule's runs - requires admin or editor role"""
+    
+    with get_session() as session:
+        schedule = session.get(Schedule, schedule_id)
+        if not schedule:
+            raise HTTPException(status_code=404, detail="Schedule not found")
+        
+        check_schedule_access(session, schedule, current_user, "modify")
+        
+        schedule.priority = priority
+        schedule.updated_at = datetime.utcnow()
+        session.commit()
+        
+        return {"message": f"Schedule priority updated to {priority.value}", "schedule_id": schedule_id}
+
+@app.put("/schedules/{schedule_id}/dispatch/")
+def update_schedule_dispatch(
+    schedule_id: int,
+    jitter_seconds: int = Form(default=None),
+    spread: bool = Form(default=None),
+    current_user: User = Depends(require_admin_or_editor)
+):
+    """Change jitter and spreading of a schedule's runs - requires admin or editor role
+    
+    Only the fields sent change; jitter_seconds=0 turns jitter off.
+    """
+    validate_jitter(jitter_seconds)
+    
+    with get_session() as session:
+        schedule = session.get(Schedule, schedule_id)
+        if not schedule:
+            raise HTTPException(status_code=404, detail="Schedule not found")
+        
+        check_schedule_access(session, schedule, current_user, "modify")
+        
+        if jitter_seconds is not None:
+            schedule.jitter_seconds = jitter_seconds or None
+        if spread is not None:
+            schedule.spread = spread
+        schedule.updated_at = datetime.utcnow()
+        session.commit()
+        session.refresh(schedule)
+        
+        # Rebuild the job with the new trigger
+        if schedule.status == ScheduleStatus.ACTIVE:
+            add_schedule_to_scheduler(schedule)
+        
+        return {
+            "message": "Schedule dispatch settings updated",
+            "schedule_id": schedule_id,
+            "jitter_seconds": schedule.jitter_seconds,
+            "spread": schedule.spread,
+            "spread_offset_seconds": spread_offset(schedule_id) if schedule.spread else 0
+        }
+
+@app.put("/schedules/{schedule_id}/policy/")
+def update_schedule_policy(
+    schedule_id: int,
+    overlap_policy: OverlapPolicy = Form(default=None),
+    max_instances: int = Form(default=None),
+    misfire_policy: MisfirePolicy = Form(default=None),
+    misfire_grace_seconds: int = Form(default=None),
+    current_user: User = Depends(require_admin_or_editor)
+):
+    """Change how a schedule handles overlapping and late runs - requires admin or editor role
+    
+    Only the fields sent are changed; max_instances=0 removes the instance limit.
+    Takes effect at the next fire; the scheduler job itself is unchanged.
+    """
+    validate_run_policy(max_instances or None, misfire_grace_seconds)
+    
+    with get_session() as session:
+        schedule = session.get(Schedule, schedule_id)
+        if not schedule:
+            raise HTTPException(status_code=404, detail="Schedule not found")
+        
+        check_schedule_access(session, schedule, current_user, "modify")
+        
+        if overlap_policy is not None:
+            schedule.overlap_policy = overlap_policy
+        if max_instances is not None:
+            schedule.max_instances = max_instances or None
+        if misfire_policy is not None:
+            schedule.misfire_policy = misfire_policy
+        if misfire_grace_seconds is not None:
+            schedule.misfire_grace_seconds = misfire_grace_seconds
+        schedule.updated_at = datetime.utcnow()
+        session.commit()
+        
+        return {
+            "message": "Schedule run policy updated",
+            "schedule_id": schedule_id,
+            "overlap_policy": schedule.overlap_policy.value,
+            "max_instances": schedule.max_instances,
+            "misfire_policy": schedule.misfire_policy.value,
+            "misfire_grace_seconds": schedule.misfire_grace_seconds
+        }
+
+@app.get("/schedules/{schedule_id}/decisions/", response_model=List[ScheduleDecision])
+def list_schedule_decisions(
+    schedule_id: int,
+    kind: ScheduleDecisionKind = Query(default=None),
+    limit: int = Query(default=50, le=500),
+    current_user: User = Depends(get_current_user_from_token)
+):
+    """Skipped, queued, missed and merged fires of a schedule, newest first - RBAC filtered"""
+    
+    with get_session() as session:
+        schedule = session.get(Schedule, schedule_id)
+        if not schedule:
+            raise HTTPException(status_code=404, detail="Schedule not found")
+        
+        check_schedule_access(session, schedule, current_user, "view")
+        
+        query = select(ScheduleDecision).where(ScheduleDecision.schedule_id == schedule_id)
+        if kind:
+            query = query.where(ScheduleDecision.kind == kind)
+        query = query.order_by(ScheduleDecision.decided_at.desc(), ScheduleDecision.id.desc()).limit(limit)
+        return session.exec(query).all()
+
 @app.delete("/schedules/{schedule_id}")
 def delete_schedule(
     schedule_id: int,
@@ -946,11 +2146,7 @@ def delete_schedule(
         if not schedule:
             raise HTTPException(status_code=404, detail="Schedule not found")
         
-        # Check ownership if not admin
-        if current_user.role != UserRole.ADMIN:
-            script = session.get(Script, schedule.script_id)
-            if script and script.owner_id != current_user.id:
-                raise HTTPException(status_code=403, detail="Not authorized to delete this schedule")
+        check_schedule_access(session, schedule, current_user, "delete")
         
         # Remove from scheduler
         try:
@@ -958,6 +2154,7 @@ def delete_schedule(
         except:
             pass  # Job might not exist
         
+        session.execute(delete(ScheduleDecision).where(ScheduleDecision.schedule_id == schedule_id))
         session.delete(schedule)
         session.commit()
         
@@ -975,18 +2172,37 @@ def run_schedule_now(
         if not schedule:
             raise HTTPException(status_code=404, detail="Schedule not found")
         
-        # Check ownership if not admin
-        if current_user.role != UserRole.ADMIN:
-            script = session.get(Script, schedule.script_id)
-            if script and script.owner_id != current_user.id:
-                raise HTTPException(status_code=403, detail="Not authorized to run this schedule")
+        check_schedule_access(session, schedule, current_user, "run")
         
-        # Execute the scheduled script in the background
-        try:
-            execute_scheduled_script(schedule_id)
-            return {"message": f"Schedule '{schedule.name}' executed successfully"}
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to execute schedule: {str(e)}")
+        name = schedule.name
+    
+    # Run through the execution pool and wait for the result
+    future = submit_scheduled_run(schedule_id)
+    if future is None:
+        raise HTTPException(status_code=503, detail="The server's event loop is not running; nothing was run")
+    try:
+        record = future.result()
+    except ScheduleRunFailed as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to execute schedule: {str(e)}")
+    
+    if isinstance(record, PipelineRun):
+        return {
+            "message": f"Schedule '{name}' pipeline run {record.status.value}",
+            "pipeline_run_id": record.id,
+            "status": record.status.value
+        }
+    return {
+        "message": (
+            f"Schedule '{name}' executed successfully" if record.success
+            else f"Schedule '{name}' run failed ({record.status.value}, exit code {record.exit_code})"
+        ),
+        "execution_id": record.id,
+        "status": record.status.value,
+        "exit_code": record.exit_code,
+        "success": record.success
+    }
 
 @app.get("/schedules/stats/")
 def get_schedule_statistics(current_user: User = Depends(get_current_user_from_token)):
@@ -998,13 +2214,8 @@ def get_schedule_statistics(current_user: User = Depends(get_current_user_from_t
             # Admins can see all schedules
             all_schedules = session.exec(select(Schedule)).all()
         else:
-            # Non-admins can only see schedules for their own scripts
-            user_scripts = session.exec(
-                select(Script.id).where(Script.owner_id == current_user.id)
-            ).all()
-            all_schedules = session.exec(
-                select(Schedule).where(Schedule.script_id.in_(user_scripts))
-            ).all()
+            # Non-admins can only see schedules for their own scripts and pipelines
+            all_schedules = session.exec(select(Schedule).where(owned_schedules(current_user))).all()
         
         total_schedules = len(all_schedules)
         active_schedules = len([s for s in all_schedules if s.status == ScheduleStatus.ACTIVE])
@@ -1013,7 +2224,7 @@ def get_schedule_statistics(current_user: User = Depends(get_current_user_from_t
         
         # Get scheduled executions
         scheduled_executions = session.exec(
-            select(ExecutionHistory).where(ExecutionHistory.triggered_by == "schedule")
+            select(ExecutionHistory).options(*WITHOUT_OUTPUT).where(ExecutionHistory.triggered_by == "schedule")
         ).all()
         
         total_scheduled_runs = len(scheduled_executions)
@@ -1041,12 +2252,167 @@ def get_schedule_statistics(current_user: User = Depends(get_current_user_from_t
             "total_scheduled_executions": total_scheduled_runs,
             "successful_scheduled_executions": successful_scheduled_runs,
             "scheduled_success_rate": round((successful_scheduled_runs / total_scheduled_runs * 100) if total_scheduled_runs > 0 else 0, 2),
+            "scheduled_resource_usage": summarize_resource_usage(scheduled_executions),
             "upcoming_executions_24h": len(upcoming_jobs),
             "upcoming_executions": upcoming_jobs[:10]  # Show next 10
         }
 
+def _schedule_forecast(forecast: ScheduleForecastRequest, current_user: User) -> dict:
+    """Forecast the load of the user's visible active schedules plus forecast.proposed"""
+    if not 0 < forecast.hours <= MAX_FORECAST_HOURS:
+        raise HTTPException(status_code=400, detail=f"hours must be between 0 and {MAX_FORECAST_HOURS}")
+    bucket_seconds = int(forecast.bucket_minutes * 60)
+    if bucket_seconds < 60:
+        raise HTTPException(status_code=400, detail="bucket_minutes must be at least 1")
+    if forecast.hours * 3600 / bucket_seconds > MAX_FORECAST_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many buckets; use larger buckets or a shorter horizon (at most {MAX_FORECAST_BUCKETS})"
+        )
+    if forecast.hotspot_factor <= 1:
+        raise HTTPException(status_code=400, detail="hotspot_factor must be greater than 1")
+    
+    with get_session() as session:
+        query = select(Schedule).where(Schedule.status == ScheduleStatus.ACTIVE)
+        user_scripts = None
+        if current_user.role != UserRole.ADMIN:
+            # Non-admins only see schedules of their own scripts and pipelines
+            user_scripts = set(session.exec(select(Script.id).where(Script.owner_id == current_user.id)).all())
+            query = query.where(owned_schedules(current_user))
+        schedules = session.exec(query).all()
+    
+    total_proposed = 0
+    for spec in forecast.proposed:
+        if not 1 <= spec.copies <= MAX_FORECAST_PROPOSED:
+            raise HTTPException(status_code=400, detail=f"copies must be between 1 and {MAX_FORECAST_PROPOSED}")
+        total_proposed += spec.copies
+    if total_proposed > MAX_FORECAST_PROPOSED:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many proposed schedules; at most {MAX_FORECAST_PROPOSED} including copies"
+        )
+    
+    # Proposed schedules get negative IDs, which also decide their spread offsets.
+    # Copies only differ in that offset, so those sharing one are forecast as one entry.
+    proposed = []
+    next_id = -1
+    for index, spec in enumerate(forecast.proposed):
+        validate_jitter(spec.jitter_seconds)
+        if spec.script_id is not None and user_scripts is not None and spec.script_id not in user_scripts:
+            raise HTTPException(status_code=403, detail=f"Not authorized to use script {spec.script_id}")
+        by_offset = {}
+        for copy_id in range(next_id, next_id - spec.copies, -1):
+            by_offset.setdefault(spread_offset(copy_id) if spec.spread else 0, []).append(copy_id)
+        next_id -= spec.copies
+        for copy_ids in by_offset.values():
+            schedule = Schedule(
+                id=copy_ids[0],
+                name=f"Proposed schedule {index + 1}" + (
+                    f" ({len(copy_ids)} of {spec.copies} copies)" if spec.copies > 1 else ""
+                ),
+                script_id=spec.script_id or 0,
+                schedule_type=spec.schedule_type,
+                start_time=spec.start_time,
+                end_time=spec.end_time,
+                cron_expression=spec.cron_expression,
+                jitter_seconds=spec.jitter_seconds,
+                spread=spec.spread
+            )
+            proposed.append((schedule, spec, len(copy_ids)))
+    
+    runtimes = expected_runtimes(schedules + [schedule for schedule, _, _ in proposed])
+    cron_templates = {}
+    entries = []
+    for schedule in schedules:
+        try:
+            trigger = build_schedule_trigger(schedule, cron_templates)
+        except ValueError:
+            continue  # Never fires either: add_schedule_to_scheduler couldn't build it
+        if trigger is None:
+            continue
+        remaining = schedule.max_runs - schedule.run_count if schedule.max_runs else None
+        entries.append(ForecastEntry(schedule.id, schedule.name, trigger, runtimes.get(schedule.id), remaining))
+    for schedule, spec, copies in proposed:
+        try:
+            trigger = build_schedule_trigger(schedule, cron_templates)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"{schedule.name}: {e}")
+        if trigger is None:
+            raise HTTPException(status_code=400, detail=f"{schedule.name}: a cron schedule needs a 5-field cron_expression")
+        expected_runtime = spec.expected_runtime_seconds
+        if expected_runtime is None:
+            expected_runtime = runtimes.get(schedule.id)
+        entries.append(ForecastEntry(schedule.id, schedule.name, trigger, expected_runtime, copies=copies))
+    
+    result = forecast_load(
+        entries, datetime.now(scheduler.timezone), forecast.hours, bucket_seconds,
+        capacity=execution_pool.max_concurrent, hotspot_factor=forecast.hotspot_factor
+    )
+    result["history_days"] = FORECAST_HISTORY_DAYS
+    result["proposed_schedules"] = total_proposed
+    return result
+
+@app.get("/schedules/forecast/")
+def get_schedule_forecast(
+    hours: float = Query(default=24),
+    bucket_minutes: float = Query(default=1),
+    hotspot_factor: float = Query(default=3.0),
+    current_user: User = Depends(get_current_user_from_token)
+):
+    """Forecast runs started and expected runtime per time bucket for the active schedules - RBAC filtered
+    
+    Expected runtimes are averaged from past runs; hotspots are buckets
+    far above the average load or beyond the execution pool's capacity.
+    """
+    return _schedule_forecast(
+        ScheduleForecastRequest(hours=hours, bucket_minutes=bucket_minutes, hotspot_factor=hotspot_factor),
+        current_user
+    )
+
+@app.post("/schedules/forecast/")
+def simulate_schedule_forecast(
+    forecast: ScheduleForecastRequest,
+    current_user: User = Depends(get_current_user_from_token)
+):
+    """Forecast the schedule load with proposed schedules added - RBAC filtered
+    
+    Nothing is created; use it to check where new schedules would land
+    before adding them.
+    """
+    return _schedule_forecast(forecast, current_user)
+
 # ===== ADMIN ENDPOINTS =====
 
+@app.get("/admin/workers/")
+def get_remote_workers(current_user: User = Depends(require_admin)):
+    """Get remote worker agents and the remote execution queue - admin only"""
+    return remote_dispatcher.stats()
+
+@app.get("/admin/scheduler/")
+def get_scheduler_status(current_user: User = Depends(require_admin)):
+    """Get which process is the scheduler leader and whether this one fires triggers - admin only"""
+    status = scheduler_election.status()
+    status["scheduler_running"] = scheduler.running and scheduler.state != STATE_PAUSED
+    return status
+
+@app.get("/admin/scheduler/dispatch/")
+def get_schedule_dispatch_metrics(current_user: User = Depends(require_admin)):
+    """Get scheduled-run dispatch lag, rate limiting, runs started per minute and
+    overlap/misfire decisions of the last 24 hours - admin only"""
+    stats = dispatch_metrics.stats(dispatch_limiter)
+    with get_session() as session:
+        decisions = session.exec(
+            select(ScheduleDecision.kind, func.count(), func.sum(ScheduleDecision.count))
+            .where(ScheduleDecision.decided_at >= datetime.utcnow() - timedelta(hours=24))
+            .group_by(ScheduleDecision.kind)
+        ).all()
+    stats["decisions_24h"] = {
+        kind.value: {"decisions": decisions_count, "fire_times": fire_times}
+        for kind, decisions_count, fire_times in decisions
+    }
+    stats["overlap"] = overlap_control.stats()
+    return stats
+
 @app.get("/admin/audit-logs/")
 def get_audit_logs(
     limit: int = Query(default=50, le=200),
@@ -1295,7 +2661,25 @@ async def update_script_content(
     content_data: dict,
     current_user: User = Depends(require_admin_or_editor)
 ):
-    """Update script content - requires admin or editor role"""
+    """Update script content and settings - requires admin or editor role
+
+    Only the fields present in the body change; the file is rewritten only
+    when "content" is sent. A cache_ttl_seconds of null uses the server's
+    default result cache TTL.
+    """
+    validate_timeout(content_data.get('timeout_seconds'))
+    validate_cache_ttl(content_data.get('cache_ttl_seconds'))
+    for name in SCRIPT_FLAG_FIELDS:
+        if name in content_data and not isinstance(content_data[name], bool):
+            raise HTTPException(status_code=400, detail=f"{name} must be true or false")
+    if 'content' in content_data and not isinstance(content_data['content'], str):
+        raise HTTPException(status_code=400, detail="content must be a string")
+    limit_updates = {
+        name: validate_resource_limit(name, content_data[name])
+        for name in RESOURCE_LIMIT_FIELDS if name in content_data
+    }
+    if 'dependencies' in content_data:
+        dependencies = validate_dependencies(content_data['dependencies'])
     try:
         with get_session() as session:
             script = session.get(Script, script_id)
@@ -1311,15 +2695,41 @@ async def update_script_content(
             if not os.path.exists(file_path):
                 raise HTTPException(status_code=404, detail="Script file not found")
             
-            # Write the new content to the file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content_data.get('content', ''))
+            # Write the new content to the file (settings-only updates leave it alone)
+            if 'content' in content_data:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(content_data['content'])
             
             # Update description if provided
             if 'description' in content_data:
                 script.description = content_data['description']
                 session.commit()
             
+            # Update timeout if provided (null resets to the server default)
+            if 'timeout_seconds' in content_data:
+                script.timeout_seconds = content_data['timeout_seconds']
+                session.commit()
+            
+            # Result caching settings (results are keyed by content, so edits never hit stale entries)
+            if 'cache_ttl_seconds' in content_data:
+                script.cache_ttl_seconds = content_data['cache_ttl_seconds']
+                session.commit()
+            for name in SCRIPT_FLAG_FIELDS:
+                if name in content_data:
+                    setattr(script, name, content_data[name])
+                    session.commit()
+            
+            # Dependencies (null or empty uses the script's inline metadata, if any)
+            if 'dependencies' in content_data:
+                script.dependencies = dependencies
+                session.commit()
+            
+            # Resource limits (null falls back to the language / server limits)
+            if limit_updates:
+                for name, value in limit_updates.items():
+                    setattr(script, name, value)
+                session.commit()
+            
             return {
                 "message": "Script content updated successfully",
                 "script_id": script_id,
@@ -1327,6 +2737,8 @@ async def update_script_content(
                 "updated_at": datetime.utcnow()
             }
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating script: {str(e)}")
 
@@ -1346,6 +2758,26 @@ async def delete_script(
             if current_user.role != UserRole.ADMIN and script.owner_id != current_user.id:
                 raise HTTPException(status_code=403, detail="Not authorized to delete this script")
             
+            if session.exec(select(Schedule.id).where(Schedule.script_id == script_id)).first() is not None:
+                raise HTTPException(status_code=409, detail="Delete the script's schedules first")
+            used_by = session.exec(
+                select(Pipeline.name).join(PipelineStep, PipelineStep.pipeline_id == Pipeline.id)
+                .where(PipelineStep.script_id == script_id).distinct()
+            ).all()
+            if used_by:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Remove the script from pipelines {', '.join(sorted(used_by))} first"
+                )
+            execution_ids = session.exec(
+                select(ExecutionHistory.id).where(ExecutionHistory.script_id == script_id)
+            ).all()
+            if any(execution_id in live_executions for execution_id in execution_ids):
+                raise HTTPException(status_code=409, detail="The script is running; cancel its runs first")
+            
+            # Execution history goes with the script, including log files and artifacts
+            delete_executions(execution_ids)
+            
             # Delete the actual file
             file_path = os.path.join(UPLOAD_DIR, script.filename)
             if os.path.exists(file_path):
@@ -1374,6 +2806,8 @@ async def delete_script(
                 "filename": script.filename
             }
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting script: {str(e)}")
 
@@ -1,7 +1,9 @@
 from sqlmodel import SQLModel, Field, Relationship
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
+from sqlalchemy import Column
+from output_store import CompressedText
 
 class ScheduleType(str, Enum):
     ONCE = "once"
@@ -16,6 +18,49 @@ class ScheduleStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class ExecutionStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"  # Process ran to completion (see exit_code/success)
+    TIMED_OUT = "timed_out"
+    ERROR = "error"  # Process could not be started or the run failed internally
+    SKIPPED = "skipped"  # Pipeline step not run because an upstream step failed
+    CANCELLED = "cancelled"  # Stopped on request through the cancel endpoint
+
+class ExecutionPriority(str, Enum):
+    """Queue class of a run; higher classes get free execution slots first"""
+    INTERACTIVE = "interactive"  # Runs started from the dashboard or API
+    SCHEDULED = "scheduled"
+    BULK = "bulk"  # Batches and matrix runs
+
+    @property
+    def rank(self) -> int:
+        """0 is served first"""
+        return list(ExecutionPriority).index(self)
+
+class OverlapPolicy(str, Enum):
+    """What a schedule does when it fires while an earlier run is still going"""
+    SKIP = "skip"  # Drop the new run
+    QUEUE = "queue"  # Start it once the earlier run has finished
+    PARALLEL = "parallel"  # Run alongside, up to max_instances at once
+
+class MisfirePolicy(str, Enum):
+    """What a schedule does with fire times that passed while nothing could run them"""
+    COALESCE = "coalesce"  # Run once for all of them
+    CATCH_UP = "catch_up"  # Run once for each
+
+class ScheduleDecisionKind(str, Enum):
+    QUEUED = "queued"  # Started after waiting for an earlier run
+    SKIPPED = "skipped"  # Not run because of the overlap policy
+    MISSED = "missed"  # Fire time(s) older than the misfire grace time
+    COALESCED = "coalesced"  # Several late fire times merged into one run
+    CAUGHT_UP = "caught_up"  # Late fire times each run afterwards
+
+class PipelineRunStatus(str, Enum):
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
 class UserRole(str, Enum):
     ADMIN = "admin"
     EDITOR = "editor"
@@ -76,6 +121,18 @@ class Script(SQLModel, table=True):
     language: str
     upload_time: datetime = Field(default_factory=datetime.utcnow)
     description: Optional[str] = None
+    timeout_seconds: Optional[float] = None  # Maximum runtime; None uses the server default
+    cacheable: bool = Field(default=False)  # Output depends only on the script and its inputs
+    cache_ttl_seconds: Optional[float] = None  # How long a cached result is reused; None uses the default
+    single_flight: bool = Field(default=False)  # Identical requests during a run attach to it instead of starting another
+    retain_artifacts: bool = Field(default=False)  # Keep files runs write to their working directory for download
+    dependencies: Optional[str] = None  # requirements.txt style packages to install; else the script's inline metadata
+    # Resource limits for runs; None falls back to the language / server limits
+    memory_limit_mb: Optional[int] = None
+    cpu_limit_seconds: Optional[int] = None
+    process_limit: Optional[int] = None
+    file_size_limit_mb: Optional[int] = None
+    output_limit_mb: Optional[int] = None
     
     # Security additions
     owner_id: Optional[int] = Field(default=None, foreign_key="user.id")
@@ -88,7 +145,8 @@ class Script(SQLModel, table=True):
 
 class Schedule(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    script_id: int = Field(foreign_key="script.id")
+    script_id: Optional[int] = Field(default=None, foreign_key="script.id")  # None for pipeline schedules
+    pipeline_id: Optional[int] = Field(default=None, foreign_key="pipeline.id")  # Run this pipeline instead of a script
     name: str  # User-friendly name for the schedule
     schedule_type: ScheduleType
     status: ScheduleStatus = Field(default=ScheduleStatus.ACTIVE)
@@ -103,6 +161,19 @@ class Schedule(SQLModel, table=True):
     last_run: Optional[datetime] = None  # When was the last execution
     run_count: int = Field(default=0)  # How many times has it run
     max_runs: Optional[int] = None  # Maximum number of runs (optional)
+    timeout_seconds: Optional[float] = None  # Overrides the script's timeout for scheduled runs
+    parameters: Optional[str] = None  # JSON RunParameters passed to every scheduled run
+    priority: ExecutionPriority = Field(default=ExecutionPriority.SCHEDULED)
+    single_flight: bool = Field(default=False)  # Skip starting a run while an identical one is still going
+    # Thundering-herd control for recurring schedules
+    jitter_seconds: Optional[int] = None  # Random delay of up to this many seconds per run
+    spread: bool = Field(default=False)  # Fire at a stable offset within the spread window instead of on the dot
+    # Overlapping and late runs
+    overlap_policy: OverlapPolicy = Field(default=OverlapPolicy.SKIP)  # One run at a time, as scheduler jobs always had
+    max_instances: Optional[int] = None  # Concurrent runs allowed with the parallel policy; None = unlimited
+    misfire_policy: MisfirePolicy = Field(default=MisfirePolicy.COALESCE)  # Late fires merge into one run
+    misfire_grace_seconds: Optional[int] = 300  # How late a fire time may still run; None = any
+    job_fingerprint: Optional[str] = None  # Settings the stored scheduler job was built from
     
     # Security additions
     created_by: Optional[int] = Field(default=None, foreign_key="user.id")
@@ -112,33 +183,163 @@ class Schedule(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships
-    script: Script = Relationship(back_populates="schedules")
+    script: Optional[Script] = Relationship(back_populates="schedules")
     created_by_user: Optional[User] = Relationship(back_populates="schedules")
     executions: List["ExecutionHistory"] = Relationship(back_populates="schedule")
 
-class ExecutionHistory(SQLModel, table=True):
+class ScheduleDecision(SQLModel, table=True):
+    """A fire of a schedule that didn't simply start a run on time"""
     id: Optional[int] = Field(default=None, primary_key=True)
+    schedule_id: int = Field(foreign_key="schedule.id", index=True)
+    decided_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    kind: ScheduleDecisionKind
+    scheduled_for: Optional[datetime] = None  # Nominal fire time (the latest one for merged decisions)
+    count: int = Field(default=1)  # Fire times this decision covers
+    detail: Optional[str] = None
+
+class SchedulerLease(SQLModel, table=True):
+    """Which process runs schedule triggers; held while the process keeps renewing it"""
+    name: str = Field(primary_key=True)
+    holder: str
+    acquired_at: datetime
+    expires_at: datetime
+
+class Pipeline(SQLModel, table=True):
+    """A DAG of scripts; each step starts once all of its upstream steps succeeded"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str
+    description: Optional[str] = None
+    created_by: Optional[int] = Field(default=None, foreign_key="user.id")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    steps: List["PipelineStep"] = Relationship(back_populates="pipeline")
+
+class PipelineStep(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    pipeline_id: int = Field(foreign_key="pipeline.id", index=True)
+    name: str  # Unique within the pipeline
+    script_id: int = Field(foreign_key="script.id")
+    depends_on: str = Field(default="[]")  # JSON list of upstream step names
+
+    pipeline: Pipeline = Relationship(back_populates="steps")
+
+class PipelineStepCreate(SQLModel):
+    name: str
+    script_id: int
+    depends_on: List[str] = []
+
+class PipelineCreate(SQLModel):
+    name: str
+    description: Optional[str] = None
+    steps: List[PipelineStepCreate]
+
+class PipelineRun(SQLModel, table=True):
+    """One execution of a pipeline; its steps are ExecutionHistory rows"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    pipeline_id: int = Field(foreign_key="pipeline.id", index=True)
+    status: PipelineRunStatus = Field(default=PipelineRunStatus.RUNNING)
+    triggered_by: str = Field(default="manual")  # "manual" or "schedule"
+    schedule_id: Optional[int] = Field(default=None, foreign_key="schedule.id")
+    started_by: Optional[int] = Field(default=None, foreign_key="user.id")
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    server_id: Optional[str] = None  # Server process running it
+
+class RunParameters(SQLModel):
+    """Command line arguments and environment variables for one run"""
+    args: List[str] = []
+    env: Dict[str, str] = {}
+
+class MatrixRunRequest(SQLModel):
+    """One run per combination of the matrix values.
+
+    Each matrix key becomes an environment variable of the run and can be
+    referenced as {KEY} in args.
+    """
+    matrix: Dict[str, List[str]]
+    args: List[str] = []
+    env: Dict[str, str] = {}
+
+class ProposedSchedule(SQLModel):
+    """A schedule that doesn't exist yet, added to a load forecast to see its effect"""
+    schedule_type: ScheduleType
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    cron_expression: Optional[str] = None
+    jitter_seconds: Optional[int] = None
+    spread: bool = False
+    script_id: Optional[int] = None  # Its run history gives the expected runtime
+    expected_runtime_seconds: Optional[float] = None  # Overrides the script's history
+    copies: int = 1  # Identical schedules to add
+
+class ScheduleForecastRequest(SQLModel):
+    """Load forecast of the visible active schedules plus any proposed ones"""
+    hours: float = 24
+    bucket_minutes: float = 1
+    hotspot_factor: float = 3.0
+    proposed: List[ProposedSchedule] = []
+
+class ExecutionBatch(SQLModel, table=True):
+    """A group of executions started with one request"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str = Field(default="batch")  # "batch" or "matrix"
+    total: int = 0  # Number of executions in the batch
+    created_by: Optional[int] = Field(default=None, foreign_key="user.id")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ExecutionHistoryBase(SQLModel):
+    """Execution fields without the captured output (used for listings)"""
     script_id: int = Field(foreign_key="script.id")
     schedule_id: Optional[int] = Field(default=None, foreign_key="schedule.id")  # Link to schedule if scheduled
     filename: str  # Store filename for easier querying
     language: str
-    exit_code: int
-    execution_time_seconds: float
-    stdout: str
-    stderr: str
+    status: ExecutionStatus = Field(default=ExecutionStatus.COMPLETED, index=True)
+    exit_code: int = 0  # Only meaningful once the run has finished
+    execution_time_seconds: float = 0.0
+    stdout_size: int = 0  # Full size in bytes of the spooled log
+    stderr_size: int = 0
+    output_truncated: bool = False
     executed_at: datetime = Field(default_factory=datetime.utcnow)
-    success: bool
+    finished_at: Optional[datetime] = None
+    success: bool = False
     error_message: Optional[str] = None  # For execution errors
-    triggered_by: str = Field(default="manual")  # "manual" or "schedule"
+    triggered_by: str = Field(default="manual")  # "manual", "schedule", "batch" or "pipeline"
+    batch_id: Optional[int] = Field(default=None, foreign_key="executionbatch.id", index=True)
+    pipeline_run_id: Optional[int] = Field(default=None, foreign_key="pipelinerun.id", index=True)
+    pipeline_step: Optional[str] = None  # Step name within the pipeline run
+    parameters: Optional[str] = None  # JSON RunParameters the run was started with
+    priority: ExecutionPriority = Field(default=ExecutionPriority.INTERACTIVE)
+    worker_id: Optional[str] = None  # Remote worker agent that ran it; None for local runs
+    server_id: Optional[str] = None  # Server process that started it; its runs are failed once it has exited
+    script_hash: Optional[str] = None  # SHA-256 of the script as handed to a remote worker
+
+    # Resource usage of the script process (from wait4; None where unavailable)
+    cpu_user_seconds: Optional[float] = None
+    cpu_system_seconds: Optional[float] = None
+    peak_rss_kb: Optional[int] = None
+    io_read_blocks: Optional[int] = None  # Filesystem blocks read / written
+    io_write_blocks: Optional[int] = None
     
     # Security additions
     executed_by: Optional[int] = Field(default=None, foreign_key="user.id")
+
+class ExecutionHistory(ExecutionHistoryBase, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # Inline copy of the output (head and tail only when output_truncated),
+    # compressed at rest
+    stdout: str = Field(default="", sa_column=Column(CompressedText, nullable=False))
+    stderr: str = Field(default="", sa_column=Column(CompressedText, nullable=False))
     
     # Relationships
     script: Script = Relationship(back_populates="executions")
     schedule: Optional[Schedule] = Relationship(back_populates="executions")
     executed_by_user: Optional[User] = Relationship(back_populates="executions")
 
+class ExecutionSummary(ExecutionHistoryBase):
+    """Execution as returned by list endpoints, without stdout/stderr"""
+    id: int
+
 class AuditLog(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: Optional[int] = Field(default=None, foreign_key="user.id")
@@ -0,0 +1,169 @@
+import lzma
+import os
+import zlib
+from typing import Callable, Dict, Optional, Set
+
+from sqlalchemy.types import Text, TypeDecorator
+
+from executor import decode_output
+
+# Directory holding the full stdout/stderr log of every execution
+OUTPUT_DIR = os.getenv(
+    "SCRIPTPILOT_OUTPUT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "execution_logs")
+)
+# Bytes of each stream kept inline in ExecutionHistory (half head, half tail)
+INLINE_OUTPUT_BYTES = int(os.getenv("SCRIPTPILOT_INLINE_OUTPUT_BYTES", str(64 * 1024)))
+
+# Compression for output stored in the database: "zlib", "lzma" or "none"
+OUTPUT_COMPRESSION = os.getenv("SCRIPTPILOT_OUTPUT_COMPRESSION", "zlib").lower()
+# Values shorter than this are stored as plain text; compressing them doesn't pay off
+MIN_COMPRESS_CHARS = 256
+
+OUTPUT_STREAMS = ("stdout", "stderr")
+
+# One-byte prefixes identifying how a stored value was compressed
+_ZLIB_PREFIX = b"Z"
+_LZMA_PREFIX = b"X"
+
+def compress_text(value: str):
+    """Compress text for storage; returns bytes, or the text itself if not worth it"""
+    if OUTPUT_COMPRESSION == "none" or len(value) < MIN_COMPRESS_CHARS:
+        return value
+    data = value.encode("utf-8", errors="surrogatepass")
+    if OUTPUT_COMPRESSION == "lzma":
+        return _LZMA_PREFIX + lzma.compress(data, preset=6)
+    return _ZLIB_PREFIX + zlib.compress(data, 6)
+
+def decompress_text(value) -> str:
+    """Inverse of compress_text; plain text (including rows written before
+    compression was introduced) is returned unchanged"""
+    if not isinstance(value, (bytes, bytearray, memoryview)):
+        return value
+    value = bytes(value)
+    prefix, payload = value[:1], value[1:]
+    if prefix == _LZMA_PREFIX:
+        data = lzma.decompress(payload)
+    elif prefix == _ZLIB_PREFIX:
+        data = zlib.decompress(payload)
+    else:
+        data = value
+    return data.decode("utf-8", errors="surrogatepass")
+
+class CompressedText(TypeDecorator):
+    """Text column that is transparently compressed in the database.
+
+    Compressed values are stored as BLOBs in the same TEXT column, so existing
+    uncompressed rows keep working without a migration.
+    """
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
+
+def log_path(execution_id: int, stream: str) -> str:
+    """Path of the full log file for one stream of an execution"""
+    return os.path.join(OUTPUT_DIR, f"{execution_id}.{stream}.log")
+
+def delete_logs(execution_id: int):
+    for stream in OUTPUT_STREAMS:
+        try:
+            os.remove(log_path(execution_id, stream))
+        except FileNotFoundError:
+            pass
+
+def logged_execution_ids() -> Set[int]:
+    """IDs of the executions that have log files on disk"""
+    if not os.path.isdir(OUTPUT_DIR):
+        return set()
+    ids = set()
+    for name in os.listdir(OUTPUT_DIR):
+        execution_id = name.split(".", 1)[0]
+        if execution_id.isdigit():
+            ids.add(int(execution_id))
+    return ids
+
+class OutputSpool:
+    """Writes process output to per-execution log files as it arrives.
+
+    Only the first and last INLINE_OUTPUT_BYTES / 2 bytes of each stream are
+    kept in memory; that head and tail is what gets stored in the database
+    row while the full log stays on disk. With max_bytes set, output beyond
+    that many bytes (both streams together) is dropped and on_limit is
+    called once so the run can be stopped.
+    """
+
+    def __init__(self, execution_id: int, inline_limit: int = INLINE_OUTPUT_BYTES,
+                 max_bytes: int = 0, on_limit: Optional[Callable[[], None]] = None):
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        self.execution_id = execution_id
+        self.max_bytes = max_bytes
+        self.on_limit = on_limit
+        self.limit_exceeded = False
+        self.half = max(inline_limit // 2, 1)
+        self.files = {stream: open(log_path(execution_id, stream), "wb") for stream in OUTPUT_STREAMS}
+        self.heads: Dict[str, bytearray] = {stream: bytearray() for stream in OUTPUT_STREAMS}
+        self.tails: Dict[str, bytearray] = {stream: bytearray() for stream in OUTPUT_STREAMS}
+        self.sizes: Dict[str, int] = {stream: 0 for stream in OUTPUT_STREAMS}
+
+    def write(self, stream: str, data: bytes):
+        if self.max_bytes:
+            room = max(self.max_bytes - sum(self.sizes.values()), 0)
+            if len(data) > room:
+                data = data[:room]
+                if not self.limit_exceeded:
+                    self.limit_exceeded = True
+                    if self.on_limit:
+                        self.on_limit()
+            if not data:
+                return
+        self.files[stream].write(data)
+        self.sizes[stream] += len(data)
+
+        head = self.heads[stream]
+        room = self.half - len(head)
+        if room > 0:
+            head.extend(data[:room])
+            data = data[room:]
+        if data:
+            tail = self.tails[stream]
+            tail.extend(data)
+            if len(tail) > self.half:
+                del tail[:len(tail) - self.half]
+
+    def close(self):
+        for stream, handle in self.files.items():
+            if handle.closed:
+                continue
+            handle.close()
+            # Don't keep empty log files around
+            if self.sizes[stream] == 0:
+                try:
+                    os.remove(log_path(self.execution_id, stream))
+                except FileNotFoundError:
+                    pass
+
+    def truncated(self, stream: Optional[str] = None) -> bool:
+        streams = [stream] if stream else OUTPUT_STREAMS
+        return any(self.sizes[s] > 2 * self.half for s in streams)
+
+    def text(self, stream: str) -> str:
+        """Inline copy of a stream: the whole output, or its head and tail if too large"""
+        head = bytes(self.heads[stream])
+        tail = bytes(self.tails[stream])
+        if not self.truncated(stream):
+            return decode_output(head + tail)
+        omitted = self.sizes[stream] - len(head) - len(tail)
+        return (
+            decode_output(head)
+            + f"\n... [{omitted} bytes omitted, full log available for download] ...\n"
+            + decode_output(tail)
+        )
@@ -0,0 +1,195 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlmodel import select
+
+from database import get_session
+from executions import create_execution_record, run_execution, effective_timeout
+from leader_election import SERVER_ID, server_gone
+from models import (
+    ExecutionHistory, ExecutionPriority, ExecutionStatus, PipelineRun, PipelineRunStatus, PipelineStep,
+    PipelineStepCreate, Script
+)
+from runtimes import runtime_registry, RuntimeNotAvailable
+
+class PipelineError(ValueError):
+    """Raised for pipeline definitions that aren't a valid DAG"""
+
+def step_dependencies(step: PipelineStep) -> List[str]:
+    return json.loads(step.depends_on or "[]")
+
+def validate_steps(steps: List[PipelineStepCreate]) -> List[str]:
+    """Check step names and dependencies form a DAG; returns the names in run order"""
+    if not steps:
+        raise PipelineError("A pipeline needs at least one step")
+    dependencies = {}
+    for step in steps:
+        if step.name in dependencies:
+            raise PipelineError(f"Duplicate step name: {step.name}")
+        dependencies[step.name] = list(dict.fromkeys(step.depends_on))
+    for name, upstream in dependencies.items():
+        for dependency in upstream:
+            if dependency not in dependencies:
+                raise PipelineError(f"Step {name} depends on unknown step {dependency}")
+            if dependency == name:
+                raise PipelineError(f"Step {name} depends on itself")
+
+    # Kahn's algorithm; anything left over is part of a cycle
+    remaining = {name: set(upstream) for name, upstream in dependencies.items()}
+    order = []
+    ready = [name for name, upstream in remaining.items() if not upstream]
+    while ready:
+        name = ready.pop(0)
+        order.append(name)
+        del remaining[name]
+        for other, upstream in remaining.items():
+            if name in upstream:
+                upstream.discard(name)
+                if not upstream and other not in ready:
+                    ready.append(other)
+    if remaining:
+        raise PipelineError(f"Dependency cycle between steps: {', '.join(sorted(remaining))}")
+    return order
+
+def mark_interrupted_pipeline_runs():
+    """Fail pipeline runs left running by server processes that have exited"""
+    with get_session() as session:
+        stale = [
+            pipeline_run
+            for pipeline_run in session.exec(
+                select(PipelineRun).where(PipelineRun.status == PipelineRunStatus.RUNNING)
+            ).all()
+            if server_gone(pipeline_run.server_id)
+        ]
+        for pipeline_run in stale:
+            pipeline_run.status = PipelineRunStatus.FAILED
+            pipeline_run.finished_at = datetime.utcnow()
+            session.add(pipeline_run)
+        session.commit()
+        if stale:
+            print(f"Marked {len(stale)} interrupted pipeline runs as failed")
+
+def create_pipeline_run(
+    pipeline_id: int,
+    triggered_by: str = "manual",
+    started_by: Optional[int] = None,
+    schedule_id: Optional[int] = None
+) -> PipelineRun:
+    with get_session() as session:
+        pipeline_run = PipelineRun(
+            pipeline_id=pipeline_id,
+            triggered_by=triggered_by,
+            started_by=started_by,
+            schedule_id=schedule_id,
+            server_id=SERVER_ID
+        )
+        session.add(pipeline_run)
+        session.commit()
+        session.refresh(pipeline_run)
+        return pipeline_run
+
+def _record_skipped(pipeline_run_id: int, step: PipelineStep, script: Optional[Script], reason: str, user_id: Optional[int]):
+    """Record a step that never ran so every step of a run has a history row"""
+    with get_session() as session:
+        execution = ExecutionHistory(
+            script_id=step.script_id,
+            filename=script.filename if script else "",
+            language=script.language if script else "Unknown",
+            status=ExecutionStatus.SKIPPED,
+            exit_code=-4,  # Special code for steps that were not run
+            success=False,
+            error_message=reason,
+            triggered_by="pipeline",
+            executed_by=user_id,
+            pipeline_run_id=pipeline_run_id,
+            pipeline_step=step.name,
+            finished_at=datetime.utcnow()
+        )
+        session.add(execution)
+        session.commit()
+        session.refresh(execution)
+        return execution
+
+async def _run_step(pipeline_run_id: int, step: PipelineStep, cwd: str, user_id: Optional[int],
+                    priority: Optional[ExecutionPriority]) -> ExecutionHistory:
+    with get_session() as session:
+        script = session.get(Script, step.script_id)
+    if script is None:
+        return _record_skipped(pipeline_run_id, step, None, f"Script {step.script_id} no longer exists", user_id)
+    try:
+        command = runtime_registry.command_for(script.filename)
+    except RuntimeNotAvailable as e:
+        return _record_skipped(pipeline_run_id, step, script, str(e), user_id)
+
+    execution = create_execution_record(
+        script,
+        triggered_by="pipeline",
+        executed_by=user_id,
+        pipeline_run_id=pipeline_run_id,
+        pipeline_step=step.name,
+        priority=priority
+    )
+    return await run_execution(execution, command, cwd=cwd, user_id=user_id, timeout=effective_timeout(script))
+
+async def run_pipeline(pipeline_run: PipelineRun, cwd: str, user_id: Optional[int] = None,
+                       priority: Optional[ExecutionPriority] = None) -> PipelineRun:
+    """Run a pipeline's steps as a DAG and record the outcome on the PipelineRun.
+
+    Every step is started as soon as all of its upstream steps succeeded, so
+    independent branches run concurrently (within the execution pool's
+    limits). Steps downstream of a failure are recorded as skipped while
+    unaffected branches carry on.
+    """
+    with get_session() as session:
+        steps = session.exec(
+            select(PipelineStep).where(PipelineStep.pipeline_id == pipeline_run.pipeline_id)
+        ).all()
+    upstream = {step.name: step_dependencies(step) for step in steps}
+    by_name = {step.name: step for step in steps}
+    outcomes: Dict[str, bool] = {}
+    running: Dict[asyncio.Task, str] = {}
+
+    try:
+        while len(outcomes) < len(steps):
+            settled = len(outcomes)
+            for name, step in by_name.items():
+                if name in outcomes or name in running.values():
+                    continue
+                failed = [dependency for dependency in upstream[name] if outcomes.get(dependency) is False]
+                if failed:
+                    with get_session() as session:
+                        script = session.get(Script, step.script_id)
+                    _record_skipped(
+                        pipeline_run.id, step, script,
+                        f"Skipped because upstream step {failed[0]} did not succeed", user_id
+                    )
+                    outcomes[name] = False
+                elif all(outcomes.get(dependency) for dependency in upstream[name]):
+                    task = asyncio.create_task(_run_step(pipeline_run.id, step, cwd, user_id, priority))
+                    running[task] = name
+
+            if not running:
+                if len(outcomes) == settled:
+                    # Nothing can start; only possible if the stored steps aren't a DAG
+                    break
+                # Skips above may have settled more steps; look again
+                continue
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                execution = task.result()
+                outcomes[name] = execution.status == ExecutionStatus.COMPLETED and execution.success
+    finally:
+        for task in running:
+            task.cancel()
+        succeeded = len(outcomes) == len(steps) and all(outcomes.values())
+        with get_session() as session:
+            pipeline_run = session.get(PipelineRun, pipeline_run.id)
+            pipeline_run.status = PipelineRunStatus.SUCCEEDED if succeeded else PipelineRunStatus.FAILED
+            pipeline_run.finished_at = datetime.utcnow()
+            session.add(pipeline_run)
+            session.commit()
+            session.refresh(pipeline_run)
+    return pipeline_run
@@ -0,0 +1,231 @@
+"""Warm Python worker ("zygote") for ScriptPilot.
+
+Started by warm_pool.WarmPythonPool with the same interpreter that cold runs
+use. It imports commonly used modules once, then waits for run requests on a
+SOCK_SEQPACKET socket inherited as file descriptor ZYGOTE_FD. For every
+request it forks a fresh child which runs the script as __main__ with the
+stdout/stderr pipes passed along with the request, so output capture and exit
+codes match `python script.py`.
+
+This file is executed as a standalone script and must only use the stdlib.
+"""
+import importlib.machinery
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import sys
+import traceback
+import types
+
+# Modules imported up front so forked children don't pay for them
+DEFAULT_PRELOAD = (
+    "json,re,datetime,csv,collections,itertools,functools,pathlib,logging,"
+    "subprocess,urllib.request,http.client,decimal,random,math,statistics,"
+    "sqlite3,argparse,typing,dataclasses"
+)
+
+def preload_modules():
+    modules = os.environ.get("SCRIPTPILOT_WARM_PYTHON_PRELOAD", DEFAULT_PRELOAD)
+    for name in modules.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            __import__(name)
+        except Exception as e:
+            print(f"python_zygote: could not preload {name}: {e}", file=sys.stderr)
+
+def send(sock: socket.socket, message: dict):
+    sock.send(json.dumps(message).encode())
+
+def _exit_code(exc: SystemExit) -> int:
+    """Exit status the interpreter would use for an uncaught SystemExit"""
+    code = exc.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code & 0xFF
+    print(code, file=sys.stderr)
+    return 1
+
+def _print_script_exception(exc: BaseException, script_path: str):
+    """Print a traceback the way the interpreter would, without zygote frames"""
+    tb = exc.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename != script_path:
+        tb = tb.tb_next
+    traceback.print_exception(type(exc), exc, tb or exc.__traceback__)
+
+def _finalize(code: int) -> int:
+    """Mirror interpreter shutdown: join threads, run atexit hooks, flush streams"""
+    import atexit
+    import threading
+    try:
+        threading._shutdown()
+    except Exception:
+        pass
+    atexit._run_exitfuncs()
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except Exception:
+            # Same status the interpreter uses when flushing stdout fails
+            code = 120
+    return code
+
+def run_main(source: bytes, script_path: str):
+    """Execute source as the __main__ module, like `python script.py` does.
+
+    runpy.run_path would rewrite sys.argv[0] to the absolute path, so the
+    module is set up directly instead.
+    """
+    main_module = types.ModuleType("__main__")
+    main_module.__file__ = script_path
+    main_module.__cached__ = None
+    main_module.__loader__ = importlib.machinery.SourceFileLoader("__main__", script_path)
+    sys.modules["__main__"] = main_module
+    code = compile(source, script_path, "exec", dont_inherit=True)
+    exec(code, main_module.__dict__)
+
+def apply_rlimits(rlimits: dict):
+    for name, (soft, hard) in rlimits.items():
+        _, current_hard = resource.getrlimit(getattr(resource, name))
+        if current_hard != resource.RLIM_INFINITY:
+            soft, hard = min(soft, current_hard), min(hard, current_hard)
+        resource.setrlimit(getattr(resource, name), (soft, hard))
+
+def run_script(request: dict) -> int:
+    apply_rlimits(request.get("rlimits") or {})
+    os.chdir(request["cwd"])
+    os.environ.update(request.get("env") or {})
+    script = request["script"]
+    script_path = os.path.abspath(script)
+    sys.argv = [script] + list(request.get("args") or [])
+    sys.path[0] = os.path.dirname(script_path)
+
+    try:
+        with open(script_path, "rb") as f:
+            source = f.read()
+    except OSError as e:
+        program = getattr(sys, "orig_argv", [sys.executable])[0]
+        sys.stderr.write(f"{program}: can't open file {script_path!r}: [Errno {e.errno}] {e.strerror}\n")
+        return 2
+
+    try:
+        run_main(source, script_path)
+        code = 0
+    except SystemExit as e:
+        code = _exit_code(e)
+    except BaseException as e:
+        _print_script_exception(e, script_path)
+        code = 1
+    return _finalize(code)
+
+def spawn(request: dict, fds: list) -> int:
+    """Fork a child that runs one script with the given stdout/stderr fds"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid != 0:
+        for fd in fds:
+            os.close(fd)
+        return pid
+
+    code = 1
+    try:
+        # Own process group so the whole tree can be signalled at once
+        os.setsid()
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(fds[0], 1)
+        os.dup2(fds[1], 2)
+        # Drop everything inherited from the zygote (socket, selector, pipes)
+        os.closerange(3, 65536)
+        code = run_script(request)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        os._exit(code)
+
+def _rusage_dict(rusage) -> dict:
+    return {
+        "ru_utime": rusage.ru_utime,
+        "ru_stime": rusage.ru_stime,
+        "ru_maxrss": rusage.ru_maxrss,
+        "ru_inblock": rusage.ru_inblock,
+        "ru_oublock": rusage.ru_oublock
+    }
+
+def reap(children: dict, sock: socket.socket):
+    while children:
+        try:
+            pid, status, rusage = os.wait4(-1, os.WNOHANG)
+        except ChildProcessError:
+            children.clear()
+            return
+        if pid == 0:
+            return
+        request_id = children.pop(pid, None)
+        if request_id is not None:
+            send(sock, {
+                "id": request_id,
+                "event": "exit",
+                "pid": pid,
+                "returncode": os.waitstatus_to_exitcode(status),
+                "rusage": _rusage_dict(rusage)
+            })
+
+def serve(sock: socket.socket):
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_r, False)
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+    selector.register(wakeup_r, selectors.EVENT_READ)
+    children = {}
+
+    while True:
+        for key, _ in selector.select(timeout=1.0):
+            if key.fileobj is sock:
+                data, fds, _, _ = socket.recv_fds(sock, 65536, 2)
+                if not data:
+                    # Parent went away
+                    return
+                request = json.loads(data)
+                try:
+                    pid = spawn(request, fds)
+                except OSError as e:
+                    for fd in fds:
+                        os.close(fd)
+                    send(sock, {"id": request["id"], "event": "error", "message": str(e)})
+                    continue
+                children[pid] = request["id"]
+                send(sock, {"id": request["id"], "event": "started", "pid": pid})
+            else:
+                try:
+                    while os.read(wakeup_r, 512):
+                        pass
+                except BlockingIOError:
+                    pass
+        reap(children, sock)
+
+def main():
+    sock = socket.socket(fileno=int(os.environ.pop("ZYGOTE_FD")))
+    # The zygote's own module directory shouldn't leak into scripts' sys.path
+    del sys.path[0]
+    preload_modules()
+    sys.path.insert(0, "")
+    try:
+        serve(sock)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import asyncio
+import hmac
+import os
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from database import get_session
+from executor import (
+    ExecutionTimeout, OutputCallback, ProcessResult, ResourceLimits, ResourceUsage, decode_output, effective_priority
+)
+from models import ExecutionHistory, ExecutionStatus
+
+# "local" runs everything on this host, "remote" hands every run to worker
+# agents, "auto" uses workers when one that can run the language is online
+EXECUTION_MODE = os.getenv("SCRIPTPILOT_EXECUTION_MODE", "local").lower()
+# Shared secret worker agents authenticate with; remote execution is off without it
+WORKER_TOKEN = os.getenv("SCRIPTPILOT_WORKER_TOKEN", "")
+# A worker that hasn't been heard from for this long is considered gone
+WORKER_LEASE_SECONDS = float(os.getenv("SCRIPTPILOT_WORKER_LEASE_SECONDS", "60"))
+# Longest a claim request may wait for work to show up
+MAX_CLAIM_WAIT_SECONDS = 30.0
+
+class RemoteExecutionError(Exception):
+    """A remote run failed on (or was lost together with) its worker"""
+
+class RunNotActive(Exception):
+    """A worker reported on a run that is no longer assigned to it"""
+
+@dataclass
+class WorkerInfo:
+    worker_id: str
+    hostname: str
+    languages: List[str]
+    last_seen: datetime = field(default_factory=datetime.utcnow)
+    running: Set[int] = field(default_factory=set)
+
+    def to_dict(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "hostname": self.hostname,
+            "languages": self.languages,
+            "last_seen": self.last_seen.isoformat(),
+            "running": sorted(self.running)
+        }
+
+class RemoteRun:
+    """An execution handed to the worker queue, from enqueue until its result arrives"""
+
+    def __init__(self, execution: ExecutionHistory, script_hash: str, timeout: float, output, on_output,
+                 args: Optional[List[str]] = None, env: Optional[Dict[str, str]] = None, priority: int = 0,
+                 limits: Optional[ResourceLimits] = None, dependencies: Optional[List[str]] = None):
+        self.execution_id = execution.id
+        self.filename = execution.filename
+        self.language = execution.language
+        self.script_hash = script_hash
+        self.timeout = timeout
+        self.args = args or []
+        self.env = env or {}
+        self.priority = priority
+        self.limits = limits or ResourceLimits()
+        self.dependencies = dependencies or []
+        self.enqueued_at = asyncio.get_running_loop().time()
+        self.output = output
+        self.on_output = on_output
+        self.result: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.worker_id: Optional[str] = None
+        self.last_heartbeat: Optional[float] = None
+
+    def to_job(self) -> dict:
+        return {
+            "execution_id": self.execution_id,
+            "filename": self.filename,
+            "language": self.language,
+            "script_hash": self.script_hash,
+            "timeout_seconds": self.timeout,
+            "args": self.args,
+            "env": self.env,
+            "limits": asdict(self.limits),
+            "dependencies": self.dependencies
+        }
+
+class RemoteDispatcher:
+    """Queue of executions waiting for remote worker agents.
+
+    The API process stays the owner of every run: it queues the run, waits
+    for the result and records it in ExecutionHistory exactly like a local
+    run. Workers only claim jobs, stream output back and report how the
+    process ended.
+    """
+
+    def __init__(self, mode: str = "local", token: str = "", lease_seconds: float = 60.0):
+        self.mode = mode
+        self.token = token
+        self.lease_seconds = lease_seconds
+        self.queue = deque()
+        self.active: Dict[int, RemoteRun] = {}
+        self.workers: Dict[str, WorkerInfo] = {}
+        self._work_available = asyncio.Condition()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token) and self.mode in ("remote", "auto")
+
+    def check_token(self, token: Optional[str]) -> bool:
+        return bool(self.token) and hmac.compare_digest(token or "", self.token)
+
+    def live_workers(self, language: Optional[str] = None) -> List[WorkerInfo]:
+        now = datetime.utcnow()
+        return [
+            worker for worker in self.workers.values()
+            if (now - worker.last_seen).total_seconds() < self.lease_seconds
+            and (language is None or language.lower() in worker.languages)
+        ]
+
+    def should_dispatch(self, language: str) -> bool:
+        """Whether a run of this language goes to the worker queue"""
+        if not self.enabled:
+            return False
+        if self.mode == "remote":
+            return True
+        return bool(self.live_workers(language))
+
+    async def run(self, execution: ExecutionHistory, script_hash: str, timeout: float,
+                  on_output: Optional[OutputCallback], output,
+                  args: Optional[List[str]] = None, env: Optional[Dict[str, str]] = None,
+                  priority: int = 0, limits: Optional[ResourceLimits] = None,
+                  dependencies: Optional[List[str]] = None) -> ProcessResult:
+        """Queue a run for the workers and wait for its result.
+
+        Returns a ProcessResult or raises ExecutionTimeout, like run_command.
+        """
+        run = RemoteRun(execution, script_hash, timeout, output, on_output, args, env, priority, limits, dependencies)
+        self.queue.append(run)
+        async with self._work_available:
+            self._work_available.notify_all()
+        try:
+            return await run.result
+        finally:
+            if run in self.queue:
+                self.queue.remove(run)
+            self.active.pop(run.execution_id, None)
+            if run.worker_id in self.workers:
+                self.workers[run.worker_id].running.discard(run.execution_id)
+            output.close()
+
+    def _touch_worker(self, worker_id: str, hostname: str = "", languages: Optional[List[str]] = None) -> WorkerInfo:
+        worker = self.workers.get(worker_id)
+        if worker is None:
+            worker = self.workers[worker_id] = WorkerInfo(worker_id, hostname, [])
+            print(f"Remote worker {worker_id} connected")
+        if hostname:
+            worker.hostname = hostname
+        if languages is not None:
+            worker.languages = [language.lower() for language in languages]
+        worker.last_seen = datetime.utcnow()
+        return worker
+
+    def claim(self, worker_id: str, hostname: str, languages: List[str]) -> Optional[RemoteRun]:
+        """Hand the worker the queued run it can execute with the best (aged) priority"""
+        worker = self._touch_worker(worker_id, hostname, languages)
+        now = asyncio.get_running_loop().time()
+        candidates = [run for run in self.queue if run.language.lower() in worker.languages]
+        if not candidates:
+            return None
+        run = min(candidates, key=lambda run: (effective_priority(run.priority, now - run.enqueued_at), run.enqueued_at))
+
+        self.queue.remove(run)
+        run.worker_id = worker_id
+        run.last_heartbeat = asyncio.get_running_loop().time()
+        self.active[run.execution_id] = run
+        worker.running.add(run.execution_id)
+        with get_session() as session:
+            execution = session.get(ExecutionHistory, run.execution_id)
+            execution.status = ExecutionStatus.RUNNING
+            execution.executed_at = datetime.utcnow()
+            execution.worker_id = worker_id
+            session.add(execution)
+            session.commit()
+        return run
+
+    async def wait_for_claim(self, worker_id: str, hostname: str, languages: List[str], wait: float) -> Optional[RemoteRun]:
+        """Long-poll variant of claim: wait up to `wait` seconds for work"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + min(wait, MAX_CLAIM_WAIT_SECONDS)
+        while True:
+            run = self.claim(worker_id, hostname, languages)
+            remaining = deadline - loop.time()
+            if run is not None or remaining <= 0:
+                return run
+            async with self._work_available:
+                try:
+                    # Wake up now and then anyway in case a notification was missed
+                    await asyncio.wait_for(self._work_available.wait(), timeout=min(remaining, 2.0))
+                except asyncio.TimeoutError:
+                    pass
+
+    def get_run(self, execution_id: int, worker_id: str) -> RemoteRun:
+        run = self.active.get(execution_id)
+        if run is None or run.worker_id != worker_id:
+            raise RunNotActive(f"Execution {execution_id} is not assigned to worker {worker_id}")
+        self._touch_worker(worker_id)
+        run.last_heartbeat = asyncio.get_running_loop().time()
+        return run
+
+    def append_output(self, run: RemoteRun, stream: str, data: bytes):
+        run.output.write(stream, data)
+        if run.on_output and data:
+            run.on_output(stream, decode_output(data))
+
+    def complete(self, run: RemoteRun, status: str, returncode: int = 0, wall_time_seconds: float = 0.0,
+                 usage: Optional[dict] = None, error_message: Optional[str] = None):
+        """Resolve a run with the outcome its worker reported"""
+        if run.result.done():
+            return
+        if status == "error":
+            run.result.set_exception(RemoteExecutionError(
+                f"Worker {run.worker_id}: {error_message or 'execution failed'}"
+            ))
+            return
+        run.output.close()
+        result = ProcessResult(
+            returncode=returncode,
+            stdout=run.output.text("stdout"),
+            stderr=run.output.text("stderr"),
+            wall_time_seconds=wall_time_seconds,
+            usage=ResourceUsage(**usage) if usage else None
+        )
+        if status == "timed_out":
+            run.result.set_exception(ExecutionTimeout([run.filename], run.timeout, result))
+        else:
+            run.result.set_result(result)
+
+    def abort(self, execution_id: int, reason: str):
+        """Fail a queued or claimed run; its worker stops the process on its next report"""
+        runs = [run for run in self.queue if run.execution_id == execution_id]
+        runs += [run for run in [self.active.get(execution_id)] if run is not None]
+        for run in runs:
+            if not run.result.done():
+                run.result.set_exception(RemoteExecutionError(reason))
+
+    def expire_stale_runs(self):
+        """Fail runs whose worker stopped sending heartbeats"""
+        now = asyncio.get_running_loop().time()
+        for run in list(self.active.values()):
+            if now - run.last_heartbeat > self.lease_seconds and not run.result.done():
+                print(f"Worker {run.worker_id} lost execution {run.execution_id}")
+                run.result.set_exception(RemoteExecutionError(
+                    f"Worker {run.worker_id} stopped responding"
+                ))
+
+    async def watch_leases(self):
+        """Background task: periodically expire runs of vanished workers"""
+        while True:
+            await asyncio.sleep(max(self.lease_seconds / 4, 1.0))
+            self.expire_stale_runs()
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "enabled": self.enabled,
+            "queued": len(self.queue),
+            "running": len(self.active),
+            "workers": [worker.to_dict() for worker in self.workers.values()],
+            "live_workers": len(self.live_workers())
+        }
+
+# Shared dispatcher; worker endpoints and run_execution use the same instance
+remote_dispatcher = RemoteDispatcher(EXECUTION_MODE, WORKER_TOKEN, WORKER_LEASE_SECONDS)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Most results kept for cacheable scripts; least recently used go first
+RESULT_CACHE_SIZE = int(os.getenv("SCRIPTPILOT_RESULT_CACHE_SIZE", "1000"))
+# How long a cached result stays valid unless the script sets its own TTL
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("SCRIPTPILOT_RESULT_CACHE_TTL_SECONDS", "3600"))
+
+def cache_key(script_id: int, script_hash: str, command: List[str], parameters: Optional[dict] = None,
+              dependencies: Optional[List[str]] = None) -> str:
+    """Key identifying a run's inputs: the script and its contents, interpreter, parameters and dependencies.
+
+    The script ID keeps identical copies of a script (possibly owned by other
+    users) from serving each other's executions.
+    """
+    payload = json.dumps(
+        {"script_id": script_id, "script": script_hash, "interpreter": command[:-1],
+         "parameters": parameters or {}, "dependencies": dependencies or []},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+@dataclass
+class CacheEntry:
+    execution_id: int
+    stored_at: float
+    expires_at: float
+
+class ResultCache:
+    """LRU cache from a run's inputs to the ExecutionHistory row of an earlier identical run.
+
+    Only IDs are cached; results are read back from the database so a hit
+    returns exactly what the original run recorded.
+    """
+
+    def __init__(self, max_entries: int = 1000, default_ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[int]:
+        """Execution ID cached for a key, or None (counted as a miss)"""
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            del self.entries[key]
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry.execution_id
+
+    def put(self, key: str, execution_id: int, ttl: Optional[float] = None):
+        now = time.monotonic()
+        self.entries[key] = CacheEntry(execution_id, now, now + (ttl or self.default_ttl))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key: str):
+        """Drop an entry whose execution no longer exists; turns the hit into a miss"""
+        if self.entries.pop(key, None) is not None:
+            self.hits -= 1
+            self.misses += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "default_ttl_seconds": self.default_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+# Shared cache of results for scripts marked cacheable
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS)
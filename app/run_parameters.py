@@ -0,0 +1,65 @@
+import itertools
+import json
+import re
+from typing import List, Optional
+
+from models import MatrixRunRequest, RunParameters
+
+ENV_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+class InvalidParameters(ValueError):
+    """Raised for args/env that can't be passed to a process"""
+
+def validate_parameters(parameters: RunParameters) -> RunParameters:
+    for arg in parameters.args:
+        if "\0" in arg:
+            raise InvalidParameters("Arguments must not contain NUL characters")
+    for name, value in parameters.env.items():
+        if not ENV_NAME.match(name):
+            raise InvalidParameters(f"Invalid environment variable name: {name!r}")
+        if "\0" in value:
+            raise InvalidParameters(f"Value of {name} must not contain NUL characters")
+    return parameters
+
+def dump_parameters(parameters: Optional[RunParameters]) -> Optional[str]:
+    """JSON for the parameters column; None when there's nothing to pass"""
+    if parameters is None or (not parameters.args and not parameters.env):
+        return None
+    return json.dumps(parameters.model_dump(), sort_keys=True)
+
+def load_parameters(value: Optional[str]) -> Optional[RunParameters]:
+    if not value:
+        return None
+    return RunParameters.model_validate(json.loads(value))
+
+def parse_parameters_form(value: Optional[str]) -> Optional[RunParameters]:
+    """Parameters from a JSON form field, e.g. '{"args": ["eu"], "env": {"TIER": "gold"}}'"""
+    if not value:
+        return None
+    try:
+        parameters = RunParameters.model_validate(json.loads(value))
+    except ValueError as e:
+        raise InvalidParameters(f"Invalid parameters: {e}")
+    return validate_parameters(parameters)
+
+def expand_matrix(request: MatrixRunRequest, max_runs: int) -> List[RunParameters]:
+    """Cartesian product of the matrix values, one RunParameters per combination"""
+    if not request.matrix:
+        raise InvalidParameters("matrix must have at least one key")
+    total = 1
+    for name, values in request.matrix.items():
+        if not values:
+            raise InvalidParameters(f"Matrix key {name} has no values")
+        total *= len(values)
+    if total > max_runs:
+        raise InvalidParameters(f"Matrix expands to {total} runs; at most {max_runs} are allowed")
+
+    names = list(request.matrix)
+    runs = []
+    for combination in itertools.product(*(request.matrix[name] for name in names)):
+        values = dict(zip(names, combination))
+        args = list(request.args)
+        for name, value in values.items():
+            args = [arg.replace("{" + name + "}", value) for arg in args]
+        runs.append(validate_parameters(RunParameters(args=args, env={**request.env, **values})))
+    return runs
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import shutil
+import subprocess
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from executor import run_command
+
+# How long a single interpreter version probe may take
+PROBE_TIMEOUT_SECONDS = 10.0
+
+@dataclass
+class Runtime:
+    """How to run scripts of one language, plus what was found on this host"""
+    name: str
+    language: str
+    extensions: List[str]
+    candidates: List[str]  # Executables to look for on PATH, in order of preference
+    args: List[str] = field(default_factory=list)  # Inserted between interpreter and script
+    version_args: List[str] = field(default_factory=lambda: ["--version"])
+
+    # Filled in by RuntimeRegistry.probe()
+    path: Optional[str] = None
+    version: Optional[str] = None
+
+    @property
+    def available(self) -> bool:
+        return self.path is not None
+
+    def build_command(self, filename: str) -> List[str]:
+        return [self.path, *self.args, filename]
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "language": self.language,
+            "extensions": self.extensions,
+            "available": self.available,
+            "path": self.path,
+            "version": self.version
+        }
+
+def default_runtimes() -> List[Runtime]:
+    return [
+        Runtime("python", "Python", [".py"], ["python", "python3"]),
+        Runtime("powershell", "PowerShell", [".ps1"], ["powershell", "pwsh"],
+                args=["-ExecutionPolicy", "Bypass", "-File"],
+                version_args=["-NoProfile", "-Command", "$PSVersionTable.PSVersion.ToString()"]),
+        Runtime("bash", "Bash", [".sh"], ["bash"]),
+        Runtime("node", "JavaScript", [".js"], ["node"]),
+        Runtime("cmd", "Batch", [".bat", ".cmd"], ["cmd"], args=["/c"], version_args=["/c", "ver"]),
+        Runtime("ruby", "Ruby", [".rb"], ["ruby"]),
+        Runtime("php", "PHP", [".php"], ["php"]),
+        Runtime("perl", "Perl", [".pl"], ["perl"], version_args=["-e", "print $^V"]),
+        Runtime("rscript", "R", [".r"], ["Rscript"]),
+    ]
+
+class RuntimeNotAvailable(Exception):
+    """Raised when a script's interpreter isn't installed on this host"""
+
+class RuntimeRegistry:
+    """Single source of truth for supported script types and their interpreters.
+
+    Interpreter paths and versions are resolved once (at startup or on
+    refresh) so executions never search PATH or discover a missing
+    interpreter by failing to exec.
+    """
+
+    def __init__(self, runtimes: List[Runtime]):
+        self.runtimes = runtimes
+        self.by_extension: Dict[str, Runtime] = {
+            extension: runtime for runtime in runtimes for extension in runtime.extensions
+        }
+        self.probed_at: Optional[datetime] = None
+
+    @property
+    def supported_extensions(self) -> List[str]:
+        return list(self.by_extension)
+
+    def for_filename(self, filename: str) -> Optional[Runtime]:
+        return self.by_extension.get(os.path.splitext(filename)[1].lower())
+
+    def language_for(self, filename: str) -> str:
+        runtime = self.for_filename(filename)
+        return runtime.language if runtime else "Unknown"
+
+    def command_for(self, filename: str) -> List[str]:
+        """Command line for running a script, or RuntimeNotAvailable"""
+        runtime = self.for_filename(filename)
+        if runtime is None:
+            raise RuntimeNotAvailable(f"Unsupported script type: {os.path.splitext(filename)[1].lower()}")
+        if not runtime.available:
+            raise RuntimeNotAvailable(f"Required interpreter not found for {runtime.language} scripts")
+        return runtime.build_command(filename)
+
+    def _resolve(self, runtime: Runtime) -> Optional[str]:
+        # Allow pinning an interpreter, e.g. SCRIPTPILOT_INTERPRETER_PYTHON=/usr/bin/python3.12
+        override = os.getenv(f"SCRIPTPILOT_INTERPRETER_{runtime.name.upper()}")
+        for candidate in ([override] if override else runtime.candidates):
+            path = shutil.which(candidate)
+            if path:
+                return path
+        return None
+
+    async def _probe_version(self, runtime: Runtime) -> Optional[str]:
+        try:
+            result = await run_command(
+                [runtime.path, *runtime.version_args],
+                cwd=os.getcwd(),
+                timeout=PROBE_TIMEOUT_SECONDS
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        # Some interpreters (older Python, Rscript) report on stderr
+        for line in (result.stdout + "\n" + result.stderr).splitlines():
+            if line.strip():
+                return line.strip()
+        return None
+
+    async def probe(self):
+        """Resolve every interpreter on PATH and record its version"""
+        for runtime in self.runtimes:
+            runtime.path = self._resolve(runtime)
+            runtime.version = None
+        available = [runtime for runtime in self.runtimes if runtime.available]
+        versions = await asyncio.gather(*(self._probe_version(runtime) for runtime in available))
+        for runtime, version in zip(available, versions):
+            runtime.version = version
+        self.probed_at = datetime.utcnow()
+        print("Available runtimes: " + ", ".join(
+            f"{runtime.language} ({runtime.version or runtime.path})" for runtime in available
+        ))
+
+    def to_dict(self) -> dict:
+        return {
+            "probed_at": self.probed_at.isoformat() if self.probed_at else None,
+            "runtimes": [runtime.to_dict() for runtime in self.runtimes]
+        }
+
+# Shared registry; probed on application startup
+runtime_registry = RuntimeRegistry(default_runtimes())
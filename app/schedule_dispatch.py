@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import os
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from apscheduler.triggers.base import BaseTrigger
+
+# Schedules with spreading on fire at a fixed offset within this window after their nominal time
+SPREAD_WINDOW_SECONDS = int(os.getenv("SCRIPTPILOT_SPREAD_WINDOW_SECONDS", "300"))
+# Most scheduled runs started per second across all schedules (0 = unlimited)
+DISPATCH_RATE = float(os.getenv("SCRIPTPILOT_SCHEDULE_DISPATCH_RATE", "0"))
+# Runs that may start back to back before the rate applies
+DISPATCH_BURST = int(os.getenv("SCRIPTPILOT_SCHEDULE_DISPATCH_BURST", "10"))
+# Largest per-schedule jitter, in seconds
+MAX_JITTER_SECONDS = 86400
+
+def spread_offset(schedule_id: int, window: int = SPREAD_WINDOW_SECONDS) -> int:
+    """Stable offset for a schedule within the spread window, from a hash of its ID"""
+    if window <= 0:
+        return 0
+    digest = hashlib.sha1(f"schedule_{schedule_id}".encode()).digest()
+    return int.from_bytes(digest[:4], "big") % window
+
+class ShiftedTrigger(BaseTrigger):
+    """Fires a fixed offset plus a random jitter after every fire time of another trigger.
+
+    Each next time is computed from the wrapped trigger's nominal times, not
+    from the previous (shifted) fire time, so jitter never accumulates into
+    drift. Jitter should be shorter than the wrapped trigger's period.
+    """
+
+    def __init__(self, trigger: BaseTrigger, offset_seconds: int = 0, jitter_seconds: int = 0):
+        self.trigger = trigger
+        self.offset_seconds = offset_seconds
+        self.jitter_seconds = jitter_seconds
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        shift = timedelta(seconds=self.offset_seconds)
+        # First nominal time after the one behind the previous fire
+        after = previous_fire_time + timedelta(microseconds=1) if previous_fire_time else now
+        nominal = self.trigger.get_next_fire_time(None, after - shift)
+        if nominal is None:
+            return None
+        if self.jitter_seconds:
+            shift += timedelta(seconds=random.uniform(0, self.jitter_seconds))
+        return nominal + shift
+
+    def __str__(self):
+        return f"{self.trigger} + {self.offset_seconds}s (jitter {self.jitter_seconds}s)"
+
+    def __repr__(self):
+        return (
+            f"<ShiftedTrigger ({self.trigger!r}, offset_seconds={self.offset_seconds}, "
+            f"jitter_seconds={self.jitter_seconds})>"
+        )
+
+class DispatchLimiter:
+    """Spaces out scheduled run starts to a global rate (GCRA token bucket).
+
+    Up to `burst` runs start immediately; beyond that each waits for its turn
+    at `rate` per second. Slots are reserved on arrival, so runs fired in the
+    same second start in that order.
+    """
+
+    def __init__(self, rate: float = DISPATCH_RATE, burst: int = DISPATCH_BURST):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._theoretical_arrival = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    async def acquire(self) -> float:
+        """Wait for a dispatch slot; returns the seconds waited"""
+        if not self.enabled:
+            return 0.0
+        interval = 1.0 / self.rate
+        now = time.monotonic()
+        arrival = max(self._theoretical_arrival, now)
+        wait = arrival - now - (self.burst - 1) * interval
+        self._theoretical_arrival = arrival + interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+            return wait
+        return 0.0
+
+def _percentiles(samples: List[float]) -> dict:
+    if not samples:
+        return {"count": 0, "p50": None, "p95": None, "max": None}
+    ordered = sorted(samples)
+    def at(fraction: float) -> float:
+        return round(ordered[min(int(fraction * len(ordered)), len(ordered) - 1)], 3)
+    return {"count": len(ordered), "p50": at(0.5), "p95": at(0.95), "max": round(ordered[-1], 3)}
+
+class DispatchMetrics:
+    """How late scheduled runs start and how bunched up they are.
+
+    scheduler_lag is the time from a job's nominal fire time (after jitter
+    and spreading) to the scheduler submitting it; throttle_wait is the time
+    spent waiting for the dispatch rate limit after that.
+    """
+
+    def __init__(self, samples: int = 1000, minutes: int = 60):
+        self.scheduler_lag = deque(maxlen=samples)
+        self.throttle_wait = deque(maxlen=samples)
+        self.minutes = minutes
+        self.per_minute: Dict[int, int] = {}
+        self.dispatched = 0
+        self.throttled = 0
+
+    def record_fire(self, scheduled_run_times: List[datetime]):
+        now = datetime.now(timezone.utc)
+        for scheduled in scheduled_run_times:
+            self.scheduler_lag.append(max((now - scheduled).total_seconds(), 0.0))
+
+    def record_dispatch(self, waited: float):
+        self.dispatched += 1
+        if waited > 0:
+            self.throttled += 1
+        self.throttle_wait.append(waited)
+        minute = int(time.time() // 60)
+        self.per_minute[minute] = self.per_minute.get(minute, 0) + 1
+        for old in [m for m in self.per_minute if m <= minute - self.minutes]:
+            del self.per_minute[old]
+
+    def stats(self, limiter: Optional[DispatchLimiter] = None) -> dict:
+        histogram = [
+            {"minute": datetime.fromtimestamp(minute * 60, timezone.utc).isoformat(), "dispatched": count}
+            for minute, count in sorted(self.per_minute.items())
+        ]
+        busiest = max(histogram, key=lambda bucket: bucket["dispatched"]) if histogram else None
+        return {
+            "dispatch_rate": limiter.rate if limiter else None,
+            "dispatch_burst": limiter.burst if limiter else None,
+            "spread_window_seconds": SPREAD_WINDOW_SECONDS,
+            "dispatched": self.dispatched,
+            "throttled": self.throttled,
+            "scheduler_lag_seconds": _percentiles(list(self.scheduler_lag)),
+            "throttle_wait_seconds": _percentiles(list(self.throttle_wait)),
+            "busiest_minute": busiest,
+            "dispatched_per_minute": histogram
+        }
+
+# Shared by every scheduled run of this process
+dispatch_limiter = DispatchLimiter()
+dispatch_metrics = DispatchMetrics()
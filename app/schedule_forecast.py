@@ -0,0 +1,336 @@
+import math
+import os
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.util import localize, normalize
+from sqlalchemy import func
+from sqlmodel import select
+
+from database import get_session
+from models import ExecutionHistory, ExecutionStatus, PipelineRun, Schedule
+from schedule_dispatch import ShiftedTrigger
+
+# Days of execution history averaged into a schedule's expected runtime
+FORECAST_HISTORY_DAYS = int(os.getenv("SCRIPTPILOT_FORECAST_HISTORY_DAYS", "30"))
+# Longest forecast horizon, in hours
+MAX_FORECAST_HOURS = 24 * 31
+# Most buckets one forecast histogram may have
+MAX_FORECAST_BUCKETS = 20160
+# Hotspots listed per forecast
+MAX_HOTSPOTS = 10
+# Most proposed schedules (counting copies) one forecast may add
+MAX_FORECAST_PROPOSED = 10000
+
+# Cron fields that only depend on the date / on the time of day
+CRON_DATE_FIELDS = ("year", "month", "day", "week", "day_of_week")
+CRON_TIME_FIELDS = ("hour", "minute", "second")
+
+@dataclass
+class ForecastEntry:
+    """A schedule (or a proposed one) whose future runs are forecast"""
+    schedule_id: int
+    name: str
+    trigger: BaseTrigger
+    expected_runtime_seconds: Optional[float] = None  # None = no history
+    remaining_runs: Optional[int] = None  # Runs left before max_runs completes the schedule
+    copies: int = 1  # Identical schedules the entry stands for
+
+def _field_values(field, template: datetime) -> List[int]:
+    """Every value a time-of-day cron field allows, asked from the field itself"""
+    values = []
+    value = field.get_next_value(template.replace(**{field.name: 0}))
+    while value is not None:
+        values.append(value)
+        if value >= field.get_max(template):
+            break
+        value = field.get_next_value(template.replace(**{field.name: value + 1}))
+    return values
+
+def _cron_fire_times(trigger: CronTrigger, start: float, end: float) -> List[float]:
+    """Fire times (epoch seconds) of a cron trigger in [start, end).
+
+    Cron fields split into a date part and a time-of-day part: each day in the
+    window is matched once against the date fields, and every matching day
+    fires at the same times of day. That is exact and far cheaper than asking
+    the trigger for one fire time after another.
+    """
+    fields = {field.name: field for field in trigger.fields}
+    tz = trigger.timezone
+    template = datetime(2000, 1, 1)
+    hours, minutes, seconds = (_field_values(fields[name], template) for name in CRON_TIME_FIELDS)
+    times_of_day = [h * 3600 + m * 60 + s for h in hours for m in minutes for s in seconds]
+
+    if trigger.start_date:
+        start = max(start, trigger.start_date.timestamp())
+    if trigger.end_date:
+        end = min(end, trigger.end_date.timestamp() + 1)
+    if start >= end:
+        return []
+
+    fire_times = []
+    day = datetime.fromtimestamp(start, tz).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    last_day = datetime.fromtimestamp(end, tz).replace(tzinfo=None)
+    while day <= last_day:
+        next_day = day + timedelta(days=1)
+        if all(fields[name].get_next_value(day) == fields[name].get_value(day) for name in CRON_DATE_FIELDS):
+            midnight = localize(day, tz).timestamp()
+            if localize(next_day, tz).timestamp() - midnight == 86400:
+                day_times = [midnight + t for t in times_of_day]
+            else:
+                # Daylight saving time changes on this day; wall times it skips never fire
+                day_times = []
+                for t in times_of_day:
+                    wall_time = day + timedelta(seconds=t)
+                    fire_time = localize(wall_time, tz).timestamp()
+                    if datetime.fromtimestamp(fire_time, tz).replace(tzinfo=None) == wall_time:
+                        day_times.append(fire_time)
+            fire_times.extend(t for t in day_times if start <= t < end)
+        day = next_day
+    return fire_times
+
+def _interval_fire_times(trigger: IntervalTrigger, start: float, end: float) -> List[float]:
+    """Fire times of an interval trigger in [start, end), counted from the start date like APScheduler does"""
+    def nth_fire_time(number: int) -> float:
+        return normalize(trigger.start_date + trigger.interval * number).timestamp()
+
+    number = max(0, math.ceil((start - trigger.start_date.timestamp()) / trigger.interval.total_seconds()) - 1)
+    # Wall-clock zones add intervals in local time, which can put fire times up to a DST shift earlier
+    while number > 0 and nth_fire_time(number) >= start:
+        number -= 1
+    if trigger.end_date:
+        end = min(end, trigger.end_date.timestamp() + 1)
+    fire_times = []
+    while True:
+        fire_time = nth_fire_time(number)
+        if fire_time >= end:
+            return fire_times
+        if fire_time >= start:
+            fire_times.append(fire_time)
+        number += 1
+
+def _generic_fire_times(trigger: BaseTrigger, start: float, end: float, limit: int) -> List[float]:
+    fire_times = []
+    now = datetime.fromtimestamp(start).astimezone()
+    fire_time = trigger.get_next_fire_time(None, now)
+    while fire_time is not None and fire_time.timestamp() < end and len(fire_times) < limit:
+        fire_times.append(fire_time.timestamp())
+        fire_time = trigger.get_next_fire_time(fire_time, fire_time + timedelta(microseconds=1))
+    return fire_times
+
+def _pattern_key(trigger: BaseTrigger, start: float, end: float, field_keys: dict) -> Optional[tuple]:
+    """Key under which schedules share fire times: cron triggers with the same
+    fields and effective window fire at the same times, whatever their start date"""
+    if not isinstance(trigger, CronTrigger):
+        return None
+    # Triggers sharing parsed fields (see build_schedule_trigger) describe them once
+    fields = field_keys.get(id(trigger.fields))
+    if fields is None:
+        fields = field_keys[id(trigger.fields)] = tuple(str(field) for field in trigger.fields)
+    effective_start = max(start, trigger.start_date.timestamp()) if trigger.start_date else start
+    effective_end = min(end, trigger.end_date.timestamp() + 1) if trigger.end_date else end
+    return ("cron", fields, str(trigger.timezone), effective_start, effective_end)
+
+def fire_times(trigger: BaseTrigger, start: float, end: float, limit: int = 100000) -> List[float]:
+    """Nominal fire times (epoch seconds) of an APScheduler trigger in [start, end)"""
+    if isinstance(trigger, CronTrigger):
+        return _cron_fire_times(trigger, start, end)
+    if isinstance(trigger, IntervalTrigger):
+        return _interval_fire_times(trigger, start, end)
+    if isinstance(trigger, DateTrigger):
+        run_date = trigger.run_date.timestamp()
+        return [run_date] if start <= run_date < end else []
+    return _generic_fire_times(trigger, start, end, limit)
+
+def expected_runtimes(schedules: List[Schedule]) -> Dict[int, Optional[float]]:
+    """Average runtime of each schedule's runs over the history window.
+
+    Uses the schedule's own finished runs, else every run of its script (or
+    of its pipeline); None when there is no history at all.
+    """
+    since = datetime.utcnow() - timedelta(days=FORECAST_HISTORY_DAYS)
+    finished = [ExecutionStatus.COMPLETED, ExecutionStatus.TIMED_OUT]
+    with get_session() as session:
+        by_schedule = dict(session.exec(
+            select(ExecutionHistory.schedule_id, func.avg(ExecutionHistory.execution_time_seconds))
+            .where(ExecutionHistory.executed_at >= since, ExecutionHistory.status.in_(finished),
+                   ExecutionHistory.schedule_id.is_not(None), ExecutionHistory.pipeline_run_id.is_(None))
+            .group_by(ExecutionHistory.schedule_id)
+        ).all())
+        by_script = dict(session.exec(
+            select(ExecutionHistory.script_id, func.avg(ExecutionHistory.execution_time_seconds))
+            .where(ExecutionHistory.executed_at >= since, ExecutionHistory.status.in_(finished))
+            .group_by(ExecutionHistory.script_id)
+        ).all())
+        pipeline_ids = {schedule.pipeline_id for schedule in schedules if schedule.pipeline_id}
+        pipeline_durations: Dict[int, List[float]] = {}
+        if pipeline_ids:
+            for pipeline_id, started_at, finished_at in session.exec(
+                select(PipelineRun.pipeline_id, PipelineRun.started_at, PipelineRun.finished_at)
+                .where(PipelineRun.pipeline_id.in_(pipeline_ids), PipelineRun.started_at >= since,
+                       PipelineRun.finished_at.is_not(None))
+            ).all():
+                pipeline_durations.setdefault(pipeline_id, []).append((finished_at - started_at).total_seconds())
+
+    runtimes = {}
+    for schedule in schedules:
+        if schedule.pipeline_id:
+            durations = pipeline_durations.get(schedule.pipeline_id)
+            runtimes[schedule.id] = sum(durations) / len(durations) if durations else None
+        else:
+            runtimes[schedule.id] = by_schedule.get(schedule.id, by_script.get(schedule.script_id))
+    return runtimes
+
+def forecast_load(entries: List[ForecastEntry], start: datetime, hours: float, bucket_seconds: int,
+                  capacity: int = 0, hotspot_factor: float = 3.0) -> dict:
+    """Histogram of the runs the entries will start and the runtime they bring.
+
+    Schedules that fire at the same times (e.g. the same cron expression and
+    spread offset) are computed once and counted together, so thousands of
+    schedules cost about as much as their distinct triggers. Spread offsets
+    are applied exactly; random jitter is counted at its expected (middle)
+    delay. Runs are assumed to occupy an execution slot for their expected
+    runtime, which gives the concurrency estimate compared with capacity
+    (the execution pool's max_concurrent, 0 = unlimited).
+
+    A bucket is a hotspot when it starts at least hotspot_factor times the
+    average runs per busy bucket, or when the concurrency estimate exceeds
+    capacity.
+    """
+    origin = start.timestamp()
+    bucket_count = math.ceil(hours * 3600 / bucket_seconds)
+    end = origin + bucket_count * bucket_seconds
+
+    # Entries firing at the same shifted times with the same runtime span are counted together
+    shifts = {}
+    for entry in entries:
+        trigger, shift = entry.trigger, 0.0
+        if isinstance(trigger, ShiftedTrigger):
+            trigger, shift = trigger.trigger, trigger.offset_seconds + trigger.jitter_seconds / 2
+        shifts[entry.schedule_id] = (trigger, shift)
+    lookback = max((shift for _, shift in shifts.values()), default=0.0)
+
+    patterns: Dict[tuple, List[float]] = {}
+    groups: Dict[tuple, dict] = {}
+    field_keys = {}
+    for entry in entries:
+        trigger, shift = shifts[entry.schedule_id]
+        key = _pattern_key(trigger, origin - lookback, end, field_keys) or ("schedule", entry.schedule_id)
+        if key not in patterns:
+            # Seconds after the first bucket's start, in order
+            patterns[key] = sorted(t - origin for t in fire_times(trigger, origin - lookback, end))
+        runtime = entry.expected_runtime_seconds or 0.0
+        span = max(1, math.ceil(runtime / bucket_seconds))
+        group = groups.setdefault((key, shift, entry.remaining_runs, span), {
+            "schedule_ids": [], "count": 0, "runtime": 0.0
+        })
+        group["schedule_ids"].append(entry.schedule_id)
+        group["count"] += entry.copies
+        group["runtime"] += runtime * entry.copies
+
+    runs = [0] * bucket_count
+    runtime = [0.0] * bucket_count
+    starting = [0] * bucket_count  # Runs starting minus runs ending, per bucket
+    horizon = end - origin
+    group_buckets = []
+    for (key, shift, remaining, span), group in groups.items():
+        count, group_runtime = group["count"], group["runtime"]
+        times = patterns[key]
+        first, last = bisect_left(times, -shift), bisect_left(times, horizon - shift)
+        if remaining is not None:
+            last = min(last, first + max(remaining, 0))
+        if last - first > bucket_count:
+            # More fire times than buckets: count them per bucket rather than placing each one
+            bounds = [
+                bisect_left(times, index * bucket_seconds - shift, first, last) for index in range(bucket_count + 1)
+            ]
+            fires = [
+                (index, bounds[index + 1] - bounds[index])
+                for index in range(bucket_count) if bounds[index + 1] > bounds[index]
+            ]
+        else:
+            fires = Counter(int((t + shift) // bucket_seconds) for t in times[first:last]).items()
+        for index, number in fires:
+            runs[index] += count * number
+            runtime[index] += group_runtime * number
+            starting[index] += count * number
+            if index + span < bucket_count:
+                starting[index + span] -= count * number
+        group_buckets.append((group, {index for index, _ in fires}))
+
+    concurrency = []
+    in_progress = 0
+    for index in range(bucket_count):
+        in_progress += starting[index]
+        concurrency.append(in_progress)
+
+    busy = [count for count in runs if count]
+    average = sum(busy) / len(busy) if busy else 0.0
+    candidates = [
+        index for index in range(bucket_count)
+        if (runs[index] >= 2 and runs[index] >= hotspot_factor * average)
+        or (capacity and concurrency[index] > capacity)
+    ]
+    candidates.sort(key=lambda index: (runs[index], concurrency[index]), reverse=True)
+    hotspot_indexes = candidates[:MAX_HOTSPOTS]
+
+    # Proposed schedules (negative IDs) first, then those firing together in the largest groups
+    group_buckets.sort(key=lambda item: (item[0]["schedule_ids"][0] >= 0, -item[0]["count"]))
+    names = {entry.schedule_id: entry.name for entry in entries}
+    tz = start.tzinfo
+    def bucket_start(index: int) -> str:
+        return datetime.fromtimestamp(origin + index * bucket_seconds, tz).isoformat()
+
+    copies = {entry.schedule_id: entry.copies for entry in entries}
+    hotspots = []
+    for index in hotspot_indexes:
+        contributors = [
+            schedule_id for group, indexes in group_buckets if index in indexes
+            for schedule_id in group["schedule_ids"]
+        ]
+        hotspots.append({
+            "start": bucket_start(index),
+            "runs": runs[index],
+            "expected_runtime_seconds": round(runtime[index], 3),
+            "expected_concurrency": concurrency[index],
+            "over_capacity": bool(capacity) and concurrency[index] > capacity,
+            "schedules": sum(copies[schedule_id] for schedule_id in contributors),
+            "top_schedules": [
+                {"schedule_id": schedule_id, "name": names.get(schedule_id)}
+                for schedule_id in contributors[:MAX_HOTSPOTS]
+            ]
+        })
+
+    total_runs = sum(runs)
+    return {
+        "start": bucket_start(0),
+        "end": datetime.fromtimestamp(end, tz).isoformat(),
+        "bucket_seconds": bucket_seconds,
+        "schedules": sum(entry.copies for entry in entries),
+        "schedules_without_history": sum(entry.copies for entry in entries if entry.expected_runtime_seconds is None),
+        "distinct_fire_patterns": len(patterns),
+        "capacity": capacity,
+        "total_runs": total_runs,
+        "total_expected_runtime_seconds": round(sum(runtime), 3),
+        "average_runs_per_busy_bucket": round(average, 3),
+        "peak_runs": max(runs, default=0),
+        "peak_concurrency": max(concurrency, default=0),
+        "over_capacity_buckets": sum(1 for level in concurrency if capacity and level > capacity),
+        "hotspots": hotspots,
+        "buckets": [
+            {
+                "start": bucket_start(index),
+                "runs": runs[index],
+                "expected_runtime_seconds": round(runtime[index], 3),
+                "expected_concurrency": concurrency[index]
+            }
+            for index in range(bucket_count)
+        ]
+    }
@@ -0,0 +1,130 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from apscheduler.executors.base import BaseExecutor
+from apscheduler.job import Job
+
+from database import get_session
+from models import MisfirePolicy, OverlapPolicy, ScheduleDecision, ScheduleDecisionKind
+
+# Fires of one queue-policy schedule that may wait for its running run; later ones are skipped
+MAX_QUEUED_RUNS = int(os.getenv("SCRIPTPILOT_MAX_QUEUED_SCHEDULE_RUNS", "10"))
+
+def record_decision(schedule_id: int, kind: ScheduleDecisionKind, detail: str,
+                    scheduled_for: Optional[datetime] = None, count: int = 1):
+    """Keep what the scheduler decided about a fire, for tuning overlap and misfire settings"""
+    with get_session() as session:
+        session.add(ScheduleDecision(
+            schedule_id=schedule_id,
+            kind=kind,
+            scheduled_for=scheduled_for.replace(tzinfo=None) if scheduled_for else None,
+            count=count,
+            detail=detail
+        ))
+        session.commit()
+
+def due_run_times(run_times: List[datetime], now: datetime, policy: MisfirePolicy,
+                  grace_seconds: Optional[int]) -> Tuple[List[datetime], List[datetime], List[datetime]]:
+    """Split a job's due fire times by the misfire policy: (to run, missed, merged into a later run)"""
+    def on_time(run_time: datetime) -> bool:
+        return grace_seconds is None or (now - run_time).total_seconds() <= grace_seconds
+
+    if policy == MisfirePolicy.COALESCE:
+        # Like APScheduler's coalesce: only the latest fire time counts
+        if run_times and not on_time(run_times[-1]):
+            return [], list(run_times), []
+        return run_times[-1:], [], run_times[:-1]
+    return [t for t in run_times if on_time(t)], [t for t in run_times if not on_time(t)], []
+
+class ScheduleExecutor(BaseExecutor):
+    """APScheduler executor for schedule jobs.
+
+    Jobs are added with coalescing off and no grace time, so the executor
+    receives every fire time that came due and hands them to `fire`, which
+    applies the schedule's own misfire policy. Firing only hands runs to the
+    event loop, so it happens right in the scheduler thread.
+    """
+
+    def __init__(self, fire: Callable[[Job, List[datetime]], None]):
+        super().__init__()
+        self.fire = fire
+
+    def submit_job(self, job: Job, run_times: List[datetime]):
+        # No per-job instance count here: runs outlive the fire, OverlapControl limits them
+        self._do_submit_job(job, run_times)
+
+    def _do_submit_job(self, job: Job, run_times: List[datetime]):
+        try:
+            self.fire(job, run_times)
+        except Exception as e:
+            print(f"Error firing scheduler job {job.id}: {e}")
+
+class OverlapControl:
+    """Triggered runs in progress per schedule, and the schedule's overlap policy applied to new ones"""
+
+    def __init__(self, max_queued: int = MAX_QUEUED_RUNS):
+        self.max_queued = max_queued
+        self.running: Dict[int, int] = {}
+        self.waiting: Dict[int, int] = {}
+        self._released: Dict[int, asyncio.Condition] = {}
+
+    @staticmethod
+    def limit(policy: OverlapPolicy, max_instances: Optional[int]) -> Optional[int]:
+        if policy == OverlapPolicy.PARALLEL:
+            return max_instances
+        return 1
+
+    async def enter(self, schedule_id: int, policy: OverlapPolicy,
+                    max_instances: Optional[int]) -> Tuple[bool, Optional[ScheduleDecisionKind], str]:
+        """Admit a run: (whether it may start, decision worth recording, detail).
+
+        With the queue policy this waits until the earlier run has finished.
+        Every admitted run must call leave().
+        """
+        limit = self.limit(policy, max_instances)
+        released = self._released.setdefault(schedule_id, asyncio.Condition())
+        async with released:
+            running = self.running.get(schedule_id, 0)
+            if limit is None or running < limit:
+                self.running[schedule_id] = running + 1
+                return True, None, ""
+            if policy != OverlapPolicy.QUEUE:
+                return False, ScheduleDecisionKind.SKIPPED, (
+                    "Previous run still in progress" if policy == OverlapPolicy.SKIP
+                    else f"{running} runs in progress (max_instances {limit})"
+                )
+            if self.waiting.get(schedule_id, 0) >= self.max_queued:
+                return False, ScheduleDecisionKind.SKIPPED, f"{self.max_queued} runs already queued"
+
+            self.waiting[schedule_id] = self.waiting.get(schedule_id, 0) + 1
+            started = asyncio.get_running_loop().time()
+            try:
+                await released.wait_for(lambda: self.running.get(schedule_id, 0) < limit)
+            finally:
+                self.waiting[schedule_id] -= 1
+                if not self.waiting[schedule_id]:
+                    del self.waiting[schedule_id]
+            self.running[schedule_id] = self.running.get(schedule_id, 0) + 1
+            waited = asyncio.get_running_loop().time() - started
+            return True, ScheduleDecisionKind.QUEUED, f"Waited {waited:.1f} s for the previous run"
+
+    async def leave(self, schedule_id: int):
+        released = self._released[schedule_id]
+        async with released:
+            self.running[schedule_id] -= 1
+            if not self.running[schedule_id]:
+                del self.running[schedule_id]
+            released.notify()
+        if schedule_id not in self.running and schedule_id not in self.waiting:
+            self._released.pop(schedule_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "running": dict(self.running),
+            "queued": dict(self.waiting)
+        }
+
+# Overlap state of the scheduled runs of this process (only the scheduler leader fires them)
+overlap_control = OverlapControl()
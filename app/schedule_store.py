@@ -0,0 +1,64 @@
+import hashlib
+import json
+from datetime import datetime, tzinfo
+from typing import Dict, List, Optional
+
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from sqlalchemy import select, update
+
+from database import engine, get_session
+from models import Schedule
+
+# Table APScheduler keeps its jobs in, next to the application tables
+JOB_TABLE = "apscheduler_jobs"
+
+# Bump when add_schedule_to_scheduler builds jobs differently, so every stored job is rebuilt once
+JOB_FORMAT_VERSION = 2
+
+def create_job_store() -> SQLAlchemyJobStore:
+    """Durable job store in the application database; jobs survive restarts"""
+    return SQLAlchemyJobStore(engine=engine, tablename=JOB_TABLE)
+
+def schedule_job_id(schedule_id: int) -> str:
+    return f"schedule_{schedule_id}"
+
+def schedule_fingerprint(schedule: Schedule) -> str:
+    """Hash of the schedule settings its stored job was built from"""
+    payload = json.dumps({
+        "version": JOB_FORMAT_VERSION,
+        "name": schedule.name,
+        "schedule_type": schedule.schedule_type.value,
+        "start_time": schedule.start_time.isoformat() if schedule.start_time else None,
+        "end_time": schedule.end_time.isoformat() if schedule.end_time else None,
+        "cron_expression": schedule.cron_expression,
+        "jitter_seconds": schedule.jitter_seconds,
+        "spread": schedule.spread
+    }, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def local_next_run(next_run_time: Optional[datetime]) -> Optional[datetime]:
+    """A job's next fire time as stored in Schedule.next_run (naive, scheduler time zone)"""
+    return next_run_time.replace(tzinfo=None) if next_run_time else None
+
+def stored_schedule_jobs(job_store: SQLAlchemyJobStore, timezone: tzinfo) -> Dict[str, Optional[datetime]]:
+    """Next fire time of every stored schedule job, read without unpickling the jobs"""
+    jobs_table = job_store.jobs_t
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(jobs_table.c.id, jobs_table.c.next_run_time).where(jobs_table.c.id.like("schedule_%"))
+        ).all()
+    return {
+        job_id: datetime.fromtimestamp(timestamp, timezone).replace(tzinfo=None) if timestamp is not None else None
+        for job_id, timestamp in rows
+    }
+
+def save_schedule_jobs(updates: List[dict]):
+    """Write next_run / job_fingerprint of any number of schedules in one transaction.
+
+    Each update is a dict with the schedule "id" and the columns to set.
+    """
+    if not updates:
+        return
+    with get_session() as session:
+        session.execute(update(Schedule), updates)
+        session.commit()
@@ -0,0 +1,45 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+# Content-addressed copies of script files, as handed to remote workers
+SCRIPT_BLOB_DIR = os.getenv(
+    "SCRIPTPILOT_SCRIPT_BLOB_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "script_blobs")
+)
+
+_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file's contents, as a hex string"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def is_content_hash(value: str) -> bool:
+    return bool(_HASH_PATTERN.match(value))
+
+def blob_path(content_hash: str) -> str:
+    if not is_content_hash(content_hash):
+        raise ValueError(f"Invalid content hash: {content_hash}")
+    return os.path.join(SCRIPT_BLOB_DIR, content_hash)
+
+def snapshot_script(path: str) -> str:
+    """Store the current contents of a script under its hash and return the hash.
+
+    The snapshot stays valid even if the script is edited before the run
+    that needs it is picked up.
+    """
+    content_hash = hash_file(path)
+    destination = blob_path(content_hash)
+    if not os.path.exists(destination):
+        os.makedirs(SCRIPT_BLOB_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=SCRIPT_BLOB_DIR)
+        with os.fdopen(fd, "wb") as out, open(path, "rb") as src:
+            shutil.copyfileobj(src, out)
+        os.replace(temp_path, destination)
+    return content_hash
@@ -945,11 +945,12 @@ class ScriptPilot {
     async runScheduleNow(scheduleId) {
         this.showLoading();
         try {
-            await this.apiCall(`/schedules/${scheduleId}/run-now/`, {
+            const result = await this.apiCall(`/schedules/${scheduleId}/run-now/`, {
                 method: 'POST'
             });
             
-            this.showToast('Schedule executed successfully!', 'success');
+            const succeeded = result.success === true || result.status === 'succeeded';
+            this.showToast(result.message, succeeded ? 'success' : 'warning');
             await this.loadExecutions();
             await this.loadSchedules();
             await this.loadStats();
@@ -0,0 +1,253 @@
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import signal
+import socket
+import time
+from typing import Callable, Dict, List, Optional
+
+from executor import (
+    run_command, run_child, ProcessResult, ResourceLimits, ResourceUsage, BufferedOutput, OutputCallback,
+    open_pipe_readers, signal_process_group, terminate_process_group, DEFAULT_TIMEOUT_SECONDS
+)
+
+# Number of warm Python workers to keep running (0 disables warm mode)
+WARM_PYTHON_WORKERS = int(os.getenv("SCRIPTPILOT_WARM_PYTHON_WORKERS", "0"))
+# Interpreter used for .py scripts; must match the cold execution path
+PYTHON_INTERPRETER = "python"
+
+ZYGOTE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_zygote.py")
+
+class _Zygote:
+    """Connection to one running python_zygote.py process"""
+
+    def __init__(self, process: asyncio.subprocess.Process, sock: socket.socket):
+        self.process = process
+        self.sock = sock
+        self.pending: Dict[int, Dict[str, asyncio.Future]] = {}
+        self.closed = False
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._on_readable)
+
+    @property
+    def alive(self) -> bool:
+        return not self.closed and self.process.returncode is None
+
+    def submit(self, request_id: int, request: dict, fds: List[int]) -> Dict[str, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        futures = {"started": loop.create_future(), "exit": loop.create_future()}
+        self.pending[request_id] = futures
+        try:
+            socket.send_fds(self.sock, [json.dumps(request).encode()], fds)
+        except OSError:
+            self.pending.pop(request_id, None)
+            self.close()
+            raise
+        return futures
+
+    def _on_readable(self):
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                return
+            except OSError:
+                data = b""
+            if not data:
+                self.close()
+                return
+            message = json.loads(data)
+            futures = self.pending.get(message["id"])
+            if futures is None:
+                continue
+            if message["event"] == "started":
+                futures["started"].set_result(message["pid"])
+            elif message["event"] == "exit":
+                self.pending.pop(message["id"], None)
+                futures["exit"].set_result(message)
+            elif message["event"] == "error":
+                self.pending.pop(message["id"], None)
+                futures["started"].set_exception(OSError(message["message"]))
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            asyncio.get_running_loop().remove_reader(self.sock.fileno())
+        except RuntimeError:
+            pass
+        self.sock.close()
+        # Fail anything still waiting on this zygote
+        for futures in self.pending.values():
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Warm Python worker exited"))
+        self.pending.clear()
+        if self.process.returncode is None:
+            self.process.kill()
+
+class WarmPythonPool:
+    """Pool of pre-started Python interpreters that fork a fresh child per run.
+
+    Children run the script as __main__ with the run's own stdout/stderr
+    pipes, so output and exit codes are the same as a cold `python script.py`.
+    Only available on POSIX; everything else falls back to run_command.
+    """
+
+    def __init__(self, size: int = 0, interpreter: str = PYTHON_INTERPRETER):
+        self.size = size if os.name == "posix" and hasattr(socket, "send_fds") else 0
+        self.interpreter = interpreter
+        self.zygotes: List[Optional[_Zygote]] = []
+        self._request_ids = itertools.count(1)
+        self._next = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def accepts(self, command: List[str]) -> bool:
+        """Whether a command is a plain `python script.py [args...]` run the pool can take"""
+        return (
+            self.enabled
+            and len(command) >= 2
+            and command[0] == self.interpreter
+            and command[1].lower().endswith(".py")
+        )
+
+    async def start(self, interpreter: Optional[str] = None):
+        """Start the workers with the interpreter cold runs resolve to"""
+        if not self.enabled:
+            return
+        if interpreter:
+            self.interpreter = interpreter
+        if shutil.which(self.interpreter) is None:
+            print(f"Warm Python pool disabled: {self.interpreter} not found")
+            self.size = 0
+            return
+        self.zygotes = [await self._spawn_zygote() for _ in range(self.size)]
+        print(f"Started {self.size} warm Python worker(s)")
+
+    async def stop(self):
+        for zygote in self.zygotes:
+            if zygote is not None:
+                zygote.close()
+                await zygote.process.wait()
+        self.zygotes = []
+
+    async def _spawn_zygote(self) -> Optional[_Zygote]:
+        parent_sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        try:
+            env = dict(os.environ, ZYGOTE_FD=str(child_sock.fileno()))
+            process = await asyncio.create_subprocess_exec(
+                self.interpreter, ZYGOTE_SCRIPT,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                pass_fds=[child_sock.fileno()],
+                env=env
+            )
+        except (OSError, NotImplementedError) as e:
+            print(f"Could not start warm Python worker: {e}")
+            parent_sock.close()
+            return None
+        finally:
+            child_sock.close()
+        parent_sock.setblocking(False)
+        return _Zygote(process, parent_sock)
+
+    async def _get_zygote(self) -> Optional[_Zygote]:
+        if not self.zygotes:
+            return None
+        index = next(self._next) % len(self.zygotes)
+        zygote = self.zygotes[index]
+        if zygote is None or not zygote.alive:
+            # Replace a worker that died
+            if zygote is not None:
+                zygote.close()
+            zygote = self.zygotes[index] = await self._spawn_zygote()
+        return zygote
+
+    async def run_command(
+        self,
+        command: List[str],
+        cwd: str,
+        timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS,
+        on_output: Optional[OutputCallback] = None,
+        output=None,
+        env: Optional[Dict[str, str]] = None,
+        on_spawn: Optional[Callable[[int], None]] = None,
+        limits: Optional[ResourceLimits] = None
+    ) -> ProcessResult:
+        """Drop-in replacement for executor.run_command for `python script.py [args...]`"""
+        zygote = await self._get_zygote() if self.accepts(command) else None
+        if zygote is None:
+            return await run_command(command, cwd, timeout, on_output, output, env, on_spawn, limits)
+
+        if output is None:
+            output = BufferedOutput()
+        started = time.monotonic()
+        stdout_r, stdout_w = os.pipe()
+        stderr_r, stderr_w = os.pipe()
+        request_id = next(self._request_ids)
+        try:
+            futures = zygote.submit(
+                request_id,
+                {
+                    "id": request_id,
+                    "script": command[1],
+                    "args": command[2:],
+                    "env": env or {},
+                    "rlimits": limits.rlimits() if limits else {},
+                    "cwd": cwd
+                },
+                [stdout_w, stderr_w]
+            )
+        except OSError:
+            for fd in (stdout_r, stdout_w, stderr_r, stderr_w):
+                os.close(fd)
+            return await run_command(command, cwd, timeout, on_output, output, env, on_spawn, limits)
+        finally:
+            # The zygote has its own copies now
+            if not zygote.closed:
+                os.close(stdout_w)
+                os.close(stderr_w)
+
+        readers = await open_pipe_readers({
+            "stdout": os.fdopen(stdout_r, "rb", 0),
+            "stderr": os.fdopen(stderr_r, "rb", 0)
+        })
+
+        try:
+            pid = await futures["started"]
+        except BaseException:
+            output.close()
+            raise
+        if on_spawn:
+            on_spawn(pid)
+        return await run_child(_WarmChild(pid, readers, futures["exit"]), command, timeout, output, on_output, started)
+
+class _WarmChild:
+    """A script process forked by a zygote, in the interface run_child expects.
+
+    Children call setsid, so the pid doubles as the process group to signal.
+    """
+
+    def __init__(self, pid: int, readers: Dict[str, asyncio.StreamReader], exited: asyncio.Future):
+        self.pid = pid
+        self.readers = readers
+        self.exited = exited
+
+    def kill(self):
+        signal_process_group(self.pid, signal.SIGKILL)
+
+    async def terminate(self):
+        await terminate_process_group(self.pid, self.exited)
+
+    async def wait(self):
+        message = await asyncio.shield(self.exited)
+        usage = ResourceUsage.from_dict(message["rusage"]) if message.get("rusage") else None
+        return message["returncode"], usage
+
+# Shared warm pool; started on application startup when enabled
+warm_python_pool = WarmPythonPool(size=WARM_PYTHON_WORKERS)
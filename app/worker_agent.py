@@ -0,0 +1,281 @@
+"""ScriptPilot remote worker agent.
+
+Runs on any node that can reach the ScriptPilot API. It claims queued
+executions, fetches the script by content hash (cached locally), runs it with
+the interpreters found on this node and streams output and the result back.
+
+    SCRIPTPILOT_SERVER_URL=http://scriptpilot:8000 \\
+    SCRIPTPILOT_WORKER_TOKEN=... python worker_agent.py
+
+Only needs the stdlib plus executor.py, runtimes.py, workspaces.py and
+environments.py from this directory.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from dataclasses import asdict
+from typing import List, Optional
+
+from environments import EnvironmentCache, EnvironmentBuildError, MAX_ENVIRONMENTS
+from executor import run_command, ExecutionTimeout, ResourceLimits
+from runtimes import runtime_registry, RuntimeNotAvailable
+from workspaces import copy_script
+
+SERVER_URL = os.getenv("SCRIPTPILOT_SERVER_URL", "http://localhost:8000").rstrip("/")
+WORKER_TOKEN = os.getenv("SCRIPTPILOT_WORKER_TOKEN", "")
+WORKER_ID = os.getenv("SCRIPTPILOT_WORKER_ID", f"{socket.gethostname()}-{os.getpid()}")
+# Executions this agent runs at once
+WORKER_CONCURRENCY = int(os.getenv("SCRIPTPILOT_WORKER_CONCURRENCY", str(os.cpu_count() or 1)))
+# Where fetched scripts are kept, one directory per content hash
+CACHE_DIR = os.getenv(
+    "SCRIPTPILOT_WORKER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".scriptpilot", "script_cache")
+)
+# Where dependency environments of scripts are built and reused
+ENV_DIR = os.getenv(
+    "SCRIPTPILOT_WORKER_ENV_DIR",
+    os.path.join(os.path.expanduser("~"), ".scriptpilot", "environments")
+)
+
+# How long one claim request waits on the server for work
+CLAIM_WAIT_SECONDS = 20.0
+# Output is sent at least this often while a script runs
+FLUSH_INTERVAL_SECONDS = 0.5
+# An empty output post keeps the run's lease alive on the server
+HEARTBEAT_SECONDS = 15.0
+# Pause after the server couldn't be reached
+RETRY_SECONDS = 5.0
+
+class RunRevoked(Exception):
+    """The server no longer considers this agent the owner of a run"""
+
+class ApiClient:
+    """Minimal JSON client for the /workers API (urllib, run in threads)"""
+
+    def __init__(self, base_url: str, token: str):
+        self.base_url = base_url
+        self.token = token
+
+    def _request(self, method: str, path: str, payload: Optional[dict] = None, timeout: float = 60.0):
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method)
+        request.add_header("X-Worker-Token", self.token)
+        if data is not None:
+            request.add_header("Content-Type", "application/json")
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                raise RunRevoked(e.read().decode(errors="replace"))
+            raise
+
+    async def post(self, path: str, payload: dict, timeout: float = 60.0):
+        status, body = await asyncio.to_thread(self._request, "POST", path, payload, timeout)
+        return json.loads(body) if status == 200 and body else None
+
+    async def download(self, path: str) -> bytes:
+        _, body = await asyncio.to_thread(self._request, "GET", path)
+        return body
+
+class ScriptCache:
+    """Scripts fetched from the server, stored by SHA-256 so each version is downloaded once"""
+
+    def __init__(self, client: ApiClient, directory: str):
+        self.client = client
+        self.directory = directory
+        self._downloads = {}
+
+    def directory_for(self, script_hash: str) -> str:
+        return os.path.join(self.directory, script_hash)
+
+    async def fetch(self, script_hash: str, filename: str) -> str:
+        """Local path of a script, downloading it if this node hasn't seen it yet"""
+        path = os.path.join(self.directory_for(script_hash), os.path.basename(filename))
+        if os.path.exists(path):
+            return path
+        # Concurrent runs of the same script share one download
+        download = self._downloads.get(path)
+        if download is None:
+            download = self._downloads[path] = asyncio.ensure_future(self._download(script_hash, path))
+            download.add_done_callback(lambda _: self._downloads.pop(path, None))
+        await download
+        return path
+
+    async def _download(self, script_hash: str, path: str):
+        content = await self.client.download(f"/workers/scripts/{script_hash}")
+        if hashlib.sha256(content).hexdigest() != script_hash:
+            raise ValueError(f"Downloaded script does not match hash {script_hash}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+class ForwardingOutput:
+    """Output sink that collects chunks until they're sent to the server"""
+
+    def __init__(self):
+        self.pending: List[dict] = []
+
+    def write(self, stream: str, data: bytes):
+        self.pending.append({"stream": stream, "data": base64.b64encode(data).decode()})
+
+    def take(self) -> List[dict]:
+        chunks, self.pending = self.pending, []
+        return chunks
+
+    def close(self):
+        pass
+
+    def text(self, stream: str) -> str:
+        # The server keeps the full output
+        return ""
+
+class WorkerAgent:
+    def __init__(self, client: ApiClient, concurrency: int = WORKER_CONCURRENCY):
+        self.client = client
+        self.concurrency = max(concurrency, 1)
+        self.cache = ScriptCache(client, CACHE_DIR)
+        self.environments = EnvironmentCache(ENV_DIR, MAX_ENVIRONMENTS)
+        self.languages: List[str] = []
+
+    async def run(self):
+        await runtime_registry.probe()
+        self.languages = [runtime.language for runtime in runtime_registry.runtimes if runtime.available]
+        print(f"Worker {WORKER_ID} serving {SERVER_URL} with {self.concurrency} slot(s)")
+        await asyncio.gather(*(self._slot() for _ in range(self.concurrency)))
+
+    async def _slot(self):
+        while True:
+            try:
+                job = await self.client.post("/workers/claim", {
+                    "worker_id": WORKER_ID,
+                    "hostname": socket.gethostname(),
+                    "languages": self.languages,
+                    "wait_seconds": CLAIM_WAIT_SECONDS
+                }, timeout=CLAIM_WAIT_SECONDS + 30)
+            except (OSError, urllib.error.URLError) as e:
+                print(f"Could not reach {SERVER_URL}: {e}")
+                await asyncio.sleep(RETRY_SECONDS)
+                continue
+            if job:
+                await self._execute(job)
+
+    async def _report(self, execution_id: int, **fields):
+        await self.client.post(f"/workers/executions/{execution_id}/result", {"worker_id": WORKER_ID, **fields})
+
+    async def _flush(self, execution_id: int, output: ForwardingOutput):
+        await self.client.post(
+            f"/workers/executions/{execution_id}/output",
+            {"worker_id": WORKER_ID, "chunks": output.take()}
+        )
+
+    async def _execute(self, job: dict):
+        execution_id = job["execution_id"]
+        print(f"Running execution {execution_id}: {job['filename']}")
+        try:
+            try:
+                path = await self.cache.fetch(job["script_hash"], job["filename"])
+                command = runtime_registry.command_for(os.path.basename(path))
+            except (OSError, ValueError, RuntimeNotAvailable) as e:
+                await self._report(execution_id, status="error", error_message=str(e))
+                return
+
+            # Scratch directory per run; the cache directory is shared by every run of the script
+            workspace = tempfile.mkdtemp(prefix=f"run-{execution_id}-")
+            copy_script(path, os.path.join(workspace, os.path.basename(path)))
+            environment = None
+            try:
+                env = job.get("env")
+                if job.get("dependencies"):
+                    try:
+                        environment = await self._prepare_environment(execution_id, job, command)
+                    except EnvironmentBuildError as e:
+                        await self._report(execution_id, status="error", error_message=f"Could not prepare dependencies: {e}")
+                        return
+                    command, env = environment.wrap(command), {**environment.env, **(env or {})}
+                await self._run_job(execution_id, job, command, workspace, env)
+            finally:
+                if environment is not None:
+                    self.environments.release(environment.key)
+                await asyncio.to_thread(shutil.rmtree, workspace, True)
+        except RunRevoked as e:
+            print(f"Execution {execution_id} revoked by server: {e}")
+        except (OSError, urllib.error.URLError) as e:
+            print(f"Lost contact with server during execution {execution_id}: {e}")
+
+    async def _prepare_environment(self, execution_id: int, job: dict, command: List[str]):
+        """Build or reuse the job's dependency environment, keeping the run's lease alive meanwhile"""
+        build = asyncio.ensure_future(self.environments.acquire(job["language"], command[0], job["dependencies"]))
+        try:
+            while not build.done():
+                await asyncio.wait({build}, timeout=HEARTBEAT_SECONDS)
+                if not build.done():
+                    await self._flush(execution_id, ForwardingOutput())
+        finally:
+            if not build.done():
+                build.cancel()
+        return build.result()
+
+    async def _run_job(self, execution_id: int, job: dict, command: List[str], cwd: str,
+                       env: Optional[dict] = None):
+        output = ForwardingOutput()
+        started = time.monotonic()
+        task = asyncio.ensure_future(run_command(
+            command + job.get("args", []),
+            cwd=cwd,
+            timeout=job["timeout_seconds"],
+            output=output,
+            env=env,
+            limits=ResourceLimits(**job["limits"]) if job.get("limits") else None
+        ))
+        last_sent = time.monotonic()
+        try:
+            while not task.done():
+                await asyncio.wait({task}, timeout=FLUSH_INTERVAL_SECONDS)
+                if output.pending or time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+                    await self._flush(execution_id, output)
+                    last_sent = time.monotonic()
+        finally:
+            if not task.done():
+                # Revoked on the server or the server is unreachable; stop the process tree
+                task.cancel()
+
+        try:
+            result = task.result()
+            fields = dict(status="completed", returncode=result.returncode)
+        except ExecutionTimeout as e:
+            result = e.result
+            fields = dict(status="timed_out", returncode=result.returncode)
+        except (FileNotFoundError, subprocess.SubprocessError) as e:
+            await self._report(execution_id, status="error", error_message=str(e))
+            return
+        if output.pending:
+            await self._flush(execution_id, output)
+        await self._report(
+            execution_id,
+            wall_time_seconds=time.monotonic() - started,
+            usage=asdict(result.usage) if result.usage else None,
+            **fields
+        )
+
+def main():
+    if not WORKER_TOKEN:
+        raise SystemExit("SCRIPTPILOT_WORKER_TOKEN must be set")
+    try:
+        asyncio.run(WorkerAgent(ApiClient(SERVER_URL, WORKER_TOKEN)).run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import base64
+import os
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, ConfigDict
+
+from remote_workers import remote_dispatcher, RunNotActive
+from script_store import blob_path, is_content_hash
+
+def verify_worker_token(x_worker_token: Optional[str] = Header(default=None)):
+    """Worker agents authenticate with the shared SCRIPTPILOT_WORKER_TOKEN"""
+    if not remote_dispatcher.token:
+        raise HTTPException(status_code=503, detail="Remote workers are not enabled on this server")
+    if not remote_dispatcher.check_token(x_worker_token):
+        raise HTTPException(status_code=401, detail="Invalid worker token")
+
+router = APIRouter(prefix="/workers", tags=["Workers"], dependencies=[Depends(verify_worker_token)])
+
+class ClaimRequest(BaseModel):
+    worker_id: str
+    hostname: str = ""
+    languages: List[str]
+    wait_seconds: float = 0.0
+
+class OutputChunk(BaseModel):
+    stream: str  # "stdout" or "stderr"
+    data: str  # Base64 encoded bytes
+
+class OutputRequest(BaseModel):
+    worker_id: str
+    chunks: List[OutputChunk] = []
+
+class UsageReport(BaseModel):
+    """Mirrors executor.ResourceUsage"""
+    model_config = ConfigDict(extra="forbid")
+
+    cpu_user_seconds: float
+    cpu_system_seconds: float
+    peak_rss_kb: int
+    io_read_blocks: int
+    io_write_blocks: int
+
+class ResultRequest(BaseModel):
+    worker_id: str
+    status: Literal["completed", "timed_out", "error"]
+    returncode: int = 0
+    wall_time_seconds: float = 0.0
+    usage: Optional[UsageReport] = None
+    error_message: Optional[str] = None
+
+def _active_run(execution_id: int, worker_id: str):
+    try:
+        return remote_dispatcher.get_run(execution_id, worker_id)
+    except RunNotActive as e:
+        # Tells the worker to stop the process
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/claim")
+async def claim_execution(request: ClaimRequest):
+    """Take the next queued execution; 204 if none arrived within wait_seconds"""
+    run = await remote_dispatcher.wait_for_claim(
+        request.worker_id, request.hostname, request.languages, request.wait_seconds
+    )
+    if run is None:
+        return Response(status_code=204)
+    return run.to_job()
+
+@router.get("/scripts/{script_hash}")
+def download_script(script_hash: str):
+    """Script contents by SHA-256, for workers to cache"""
+    if not is_content_hash(script_hash):
+        raise HTTPException(status_code=400, detail="Invalid script hash")
+    path = blob_path(script_hash)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Script not found")
+    return FileResponse(path, media_type="application/octet-stream")
+
+@router.post("/executions/{execution_id}/output")
+async def report_output(execution_id: int, request: OutputRequest):
+    """Append output from a running execution; an empty post is a heartbeat"""
+    run = _active_run(execution_id, request.worker_id)
+    for chunk in request.chunks:
+        if chunk.stream not in ("stdout", "stderr"):
+            raise HTTPException(status_code=400, detail=f"Unknown stream: {chunk.stream}")
+        remote_dispatcher.append_output(run, chunk.stream, base64.b64decode(chunk.data))
+    return {"received": len(request.chunks)}
+
+@router.post("/executions/{execution_id}/result")
+async def report_result(execution_id: int, request: ResultRequest):
+    """Finish an execution with the outcome of its process"""
+    run = _active_run(execution_id, request.worker_id)
+    remote_dispatcher.complete(
+        run,
+        request.status,
+        returncode=request.returncode,
+        wall_time_seconds=request.wall_time_seconds,
+        usage=request.usage.model_dump() if request.usage else None,
+        error_message=request.error_message
+    )
+    return {"execution_id": execution_id, "status": request.status}
@@ -0,0 +1,88 @@
+import os
+import shutil
+from typing import List, Optional, Set
+
+# Scratch working directories, one per local run, removed after the run
+WORKSPACE_DIR = os.getenv(
+    "SCRIPTPILOT_WORKSPACE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "workspaces")
+)
+# Files produced by runs of scripts that retain artifacts, one directory per execution
+ARTIFACT_DIR = os.getenv(
+    "SCRIPTPILOT_ARTIFACT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts")
+)
+
+def workspace_path(execution_id: int) -> str:
+    return os.path.join(WORKSPACE_DIR, str(execution_id))
+
+def artifact_path(execution_id: int) -> str:
+    return os.path.join(ARTIFACT_DIR, str(execution_id))
+
+def copy_script(script_path: str, target: str):
+    """Copy the script into the workspace.
+
+    A copy rather than a link: runs are not sandboxed, so a script that writes
+    to its own file would otherwise change the stored original behind its
+    content hash (and the cached results and blobs keyed by it). File
+    permissions are no protection when runs have the server's user.
+    """
+    shutil.copyfile(script_path, target)
+
+def create_workspace(execution_id: int, script_path: str) -> str:
+    """Fresh working directory for a run containing only a copy of the script"""
+    path = workspace_path(execution_id)
+    # Leftover from a run with the same ID in an earlier database; start clean
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    copy_script(script_path, os.path.join(path, os.path.basename(script_path)))
+    return path
+
+def release_workspace(execution_id: int, script_name: str, retain_artifacts: bool = False):
+    """Remove a run's workspace, first moving the files the run produced to the artifact store.
+
+    Blocking; call it from a thread.
+    """
+    path = workspace_path(execution_id)
+    if retain_artifacts and os.path.isdir(path):
+        produced = [name for name in os.listdir(path) if name != script_name]
+        if produced:
+            destination = artifact_path(execution_id)
+            os.makedirs(destination, exist_ok=True)
+            for name in produced:
+                shutil.move(os.path.join(path, name), os.path.join(destination, name))
+    shutil.rmtree(path, ignore_errors=True)
+
+def list_artifacts(execution_id: int) -> List[dict]:
+    """Files retained from a run, with paths relative to its artifact directory"""
+    root = artifact_path(execution_id)
+    artifacts = []
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            full_path = os.path.join(directory, filename)
+            artifacts.append({
+                "path": os.path.relpath(full_path, root).replace(os.sep, "/"),
+                "size": os.path.getsize(full_path)
+            })
+    return sorted(artifacts, key=lambda artifact: artifact["path"])
+
+def resolve_artifact(execution_id: int, relative_path: str) -> Optional[str]:
+    """Absolute path of a retained file, or None if it doesn't exist or escapes the directory"""
+    root = os.path.realpath(artifact_path(execution_id))
+    full_path = os.path.realpath(os.path.join(root, relative_path))
+    if not full_path.startswith(root + os.sep) or not os.path.isfile(full_path):
+        return None
+    return full_path
+
+def delete_artifacts(execution_id: int):
+    shutil.rmtree(artifact_path(execution_id), ignore_errors=True)
+
+def sweep_workspaces(keep: Set[int] = frozenset()):
+    """Remove workspaces left behind by previous server processes, except those of the runs in keep"""
+    if not os.path.isdir(WORKSPACE_DIR):
+        return
+    leftovers = [name for name in os.listdir(WORKSPACE_DIR) if not (name.isdigit() and int(name) in keep)]
+    for name in leftovers:
+        shutil.rmtree(os.path.join(WORKSPACE_DIR, name), ignore_errors=True)
+    if leftovers:
+        print(f"Removed {len(leftovers)} leftover run workspaces")